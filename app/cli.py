@@ -0,0 +1,290 @@
+"""Headless command-line interface for reports and batch jobs.
+
+Never imports tkinter; charts are rendered with Matplotlib's Agg canvas.
+
+Usage: python app/cli.py [--db PATH] COMMAND [options]
+"""
+import argparse
+import calendar
+import csv
+import datetime
+import json
+import logging
+import sys
+
+from typing import List, Optional, Sequence, Tuple
+
+from config import configure_database, setup_logging
+from mvc.controller import Controller
+from mvc.model import Model
+from utils.downsampling import downsample
+from utils.methods import get_current_month, get_current_year
+from utils.profiling import setup_profiling
+from utils.tracing import setup_tracing, tracer
+
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None
+                    ) -> argparse.Namespace:
+    """Parses the command-line arguments of the headless interface."""
+    parser = argparse.ArgumentParser(
+        description="Expense Manager reports and batch jobs"
+    )
+    parser.add_argument('--db',
+                        help="path to the SQLite database, or ':memory:' "
+                             "(default: $EXPENSE_MANAGER_DB or "
+                             "database/database.db)")
+    parser.add_argument('--trace',
+                        metavar='PATH',
+                        help="write timing spans to PATH as a Chrome trace")
+    parser.add_argument('--profile-sql',
+                        action='store_true',
+                        help="collect per-statement SQL statistics")
+    parser.add_argument('-v', '--verbose',
+                        action='store_true',
+                        help="log debug messages to the console "
+                             "(default: warnings and errors only)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    totals = commands.add_parser('totals',
+                                 help="total expenses per month")
+    add_period_arguments(totals)
+    add_format_argument(totals)
+
+    breakdown = commands.add_parser('breakdown',
+                                    help="record count and total "
+                                         "per category for a month")
+    add_period_arguments(breakdown)
+    add_format_argument(breakdown)
+
+    import_parser = commands.add_parser('import',
+                                        help="import a CSV or JSON-lines "
+                                             "file (.gz/.xz accepted)")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--chunk-size',
+                               type=int,
+                               default=10000,
+                               help="rows validated and committed at a "
+                                    "time (default: 10000)")
+
+    export = commands.add_parser('export',
+                                 help="export records to CSV or JSON-lines "
+                                      "(.gz/.xz compresses)")
+    export.add_argument('path')
+    add_period_arguments(export)
+    export.add_argument('--category',
+                        help="only export records of this category")
+    export.add_argument('--columns',
+                        type=lambda text: tuple(text.split(',')),
+                        help="comma-separated columns to export, e.g. "
+                             "date,category,subtotal (default: all; "
+                             "only complete files can be imported back)")
+
+    chart = commands.add_parser('chart',
+                                help="render the category chart of a month, "
+                                     "or a trend with --start, to an image "
+                                     "(PNG, SVG or PDF by suffix)")
+    chart.add_argument('path')
+    add_period_arguments(chart)
+    chart.add_argument('--start',
+                       help="first day (YYYY-MM-DD) of a trend chart")
+    chart.add_argument('--end',
+                       help="day after the last of a trend chart "
+                            "(default: tomorrow)")
+    chart.add_argument('--unit',
+                       choices=('day', 'week', 'month'),
+                       default='month',
+                       help="trend bucket size (default: month)")
+    chart.add_argument('--by',
+                       choices=Model.rollup_dimensions,
+                       default='category',
+                       help="one trend line per value of this column "
+                            "(default: category)")
+    chart.add_argument('--size',
+                       type=float,
+                       nargs=2,
+                       default=(8.0, 5.0),
+                       metavar=('WIDTH', 'HEIGHT'),
+                       help="figure size in inches (default: 8 5)")
+    chart.add_argument('--dpi',
+                       type=int,
+                       default=100,
+                       help="resolution of raster images (default: 100)")
+    return parser.parse_args(argv)
+
+
+def add_period_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--year',
+                        type=int,
+                        help="year (default: the current year)")
+    parser.add_argument('--month',
+                        type=int,
+                        choices=range(1, 13),
+                        metavar='{1..12}',
+                        help="month number")
+
+
+def add_format_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--format',
+                        choices=('text', 'csv', 'json'),
+                        default='text',
+                        help="output format (default: text)")
+
+
+def print_rows(columns: Tuple[str, ...], rows: List[Tuple],
+               output_format: str) -> None:
+    """Writes rows to standard output as an aligned table, CSV or one JSON
+    object per line."""
+    if output_format == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    elif output_format == 'json':
+        for row in rows:
+            print(json.dumps(dict(zip(columns, row))))
+    else:
+        cells = [columns] + [tuple(f'{value:.2f}' if isinstance(value, float)
+                                   else str(value) for value in row)
+                             for row in rows]
+        widths = [max(len(row[i]) for row in cells)
+                  for i in range(len(columns))]
+        for row in cells:
+            print('  '.join(cell.rjust(width)
+                            for cell, width in zip(row, widths)))
+
+
+def print_totals(controller: Controller, args: argparse.Namespace) -> int:
+    """Prints the total of the given month, or of every month of the
+    year."""
+    year = args.year or get_current_year()
+    months = [args.month] if args.month else range(1, 13)
+    rows = [(year, month, controller.model.get_month_total(month, year))
+            for month in months]
+    print_rows(('year', 'month', 'total'), rows, args.format)
+    return 0
+
+
+def print_breakdown(controller: Controller,
+                    args: argparse.Namespace) -> int:
+    """Prints the record count and total per category of a month
+    (the current one by default)."""
+    year = args.year or get_current_year()
+    month = args.month or get_current_month()
+    rows = [(category, count, round(total, 2))
+            for category, count, total
+            in controller.model.get_category_totals(month, year)]
+    print_rows(('category', 'records', 'total'), rows, args.format)
+    return 0
+
+
+def import_file(controller: Controller, args: argparse.Namespace) -> int:
+    """Imports a file and reports rejected lines on standard error;
+    fails if any line was rejected."""
+    stats = controller.import_records(args.path, args.chunk_size)
+    print(f"Imported {stats['inserted']} records "
+          f"in {stats['seconds']:.2f}s, {len(stats['rejected'])} rejected.")
+    for line_number, reason in stats['rejected']:
+        print(f"Line {line_number}: {reason}", file=sys.stderr)
+    return 1 if stats['rejected'] else 0
+
+
+def export_file(controller: Controller, args: argparse.Namespace) -> int:
+    year = args.year or (get_current_year() if args.month else None)
+    count = controller.export_records(args.path, args.month, year,
+                                      args.category, args.columns)
+    print(f"Exported {count} records to {args.path}")
+    return 0
+
+
+def render_chart(controller: Controller, args: argparse.Namespace) -> int:
+    """Renders the category chart of a month, or a trend chart when a
+    start date is given, with the Agg canvas."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=tuple(args.size), dpi=args.dpi)
+    FigureCanvasAgg(figure)
+    plot = figure.add_subplot(1, 1, 1)
+
+    if args.start:
+        end = args.end or (datetime.date.today()
+                           + datetime.timedelta(days=1)).isoformat()
+        if (datetime.date.fromisoformat(args.start)
+                >= datetime.date.fromisoformat(end)):
+            raise ValueError("the start date must precede the end date")
+        buckets, series = controller.get_trend_series(args.start, end,
+                                                      args.unit, args.by)
+        x_values = [datetime.date.fromisoformat(bucket).toordinal()
+                    for bucket in buckets]
+        width = int(args.size[0] * args.dpi)
+        for value, totals in sorted(series.items()):
+            points = downsample(list(zip(x_values, totals)), width)
+            plot.plot([datetime.date.fromordinal(x) for x, _ in points],
+                      [total for _, total in points],
+                      label=value or '(none)',
+                      linewidth=1)
+        if series:
+            plot.legend(fontsize='small', loc='upper left')
+        plot.set_title(f'Spend per {args.unit} by {args.by}, '
+                       f'{args.start} to {end}', fontsize=12)
+        figure.autofmt_xdate()
+    else:
+        from matplotlib import colormaps
+
+        year = args.year or get_current_year()
+        month = args.month or get_current_month()
+        data = controller.model.get_graph_data(month, year)
+        categories = [category for category, _ in data]
+        totals = [total for _, total in data]
+        colors = colormaps['tab20'](range(len(categories)))
+        bars = plot.bar(range(len(categories)), totals, color=colors)
+        plot.set_xticks(range(len(categories)))
+        plot.set_xticklabels(categories, ha='center', fontsize='small')
+        for bar, total in zip(bars, totals):
+            plot.text(bar.get_x() + bar.get_width()/2.0,
+                      bar.get_height(),
+                      f'${total:.2f}',
+                      va='bottom',
+                      ha='center',
+                      fontsize='small')
+        plot.set_title(f'Total Expenses by Category in '
+                       f'{calendar.month_name[month]} {year}', fontsize=12)
+
+    figure.savefig(args.path)
+    print(f"Chart written to {args.path}")
+    return 0
+
+
+COMMANDS = {'totals': print_totals,
+            'breakdown': print_breakdown,
+            'import': import_file,
+            'export': export_file,
+            'chart': render_chart}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_arguments(argv)
+    if args.verbose:
+        setup_logging(logging.DEBUG, {'root': 'DEBUG'})
+    else:
+        setup_logging(logging.WARNING)
+    setup_tracing(args.trace)
+    setup_profiling(args.profile_sql)
+    controller = None
+    try:
+        configure_database(args.db)
+        controller = Controller(Model())
+        return COMMANDS[args.command](controller, args)
+    except Exception as e:
+        logger.error(f"Command '{args.command}' failed: {e}")
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if controller is not None:
+            controller.shutdown()
+        tracer.write()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,201 @@
+import atexit
 import logging
 import os
+import queue
+import re
+import sqlite3
 
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
+from utils.profiling import ProfilingConnection, profiler
 
-def setup_logging() -> None:
-    """Initializes and configures the logging system for the application."""
-    log_directory = "logs"
-    os.makedirs(log_directory, exist_ok=True)
+BASE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+DATABASE_PATH_ENV = 'EXPENSE_MANAGER_DB'
+
+DEFAULT_DATABASE_PATH = os.path.join(BASE_DIRECTORY, 'database', 'database.db')
+
+# Connection PRAGMAs; each can be overridden through an environment variable
+# named after it, e.g. EXPENSE_MANAGER_CACHE_SIZE=-64000.
+DATABASE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,  # Negative values are KiB, positive are pages
+    'mmap_size': 268435456,  # Bytes; 0 disables memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # Milliseconds
+}
+
+LOG_DIRECTORY = 'logs'
+
+LOG_FORMAT = '[%(asctime)s][%(name)s][%(levelname)s][%(message)s]'
+
+LOG_MAX_BYTES = 5 * 2**20  # Size at which the log file is rotated
+
+LOG_BACKUP_COUNT = 5  # Rotated log files kept
+
+LOG_LEVELS_ENV = 'EXPENSE_MANAGER_LOG_LEVELS'
+
+# Logger levels, 'root' for the root logger; each can be overridden through
+# the environment variable above, e.g. 'mvc.model=DEBUG,sql.trace=DEBUG'.
+LOG_LEVELS = {
+    'root': 'INFO',
+    'sql.trace': 'WARNING',  # Every executed statement at DEBUG
+}
+
+_database_path = None
+_connection = None
+_log_listener = None
+
+
+def get_log_levels(overrides: Optional[dict] = None) -> dict:
+    """Returns the logger levels to apply, with the given overrides and
+    those of the environment variable, e.g. 'mvc.model=DEBUG'."""
+    levels = {**LOG_LEVELS, **(overrides or {})}
+    for item in os.environ.get(LOG_LEVELS_ENV, '').split(','):
+        if not item.strip():
+            continue
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+
+    for name, level in levels.items():
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid level for logger {name}: {level}")
+    return levels
+
+
+def setup_logging(console_level: int = logging.DEBUG,
+                  levels: Optional[dict] = None) -> None:
+    """Initializes and configures the logging system for the application.
+    Loggers only put records on a queue; a listener thread formats them
+    and writes them to the console and to a rotating log file, so logging
+    never waits for I/O. Per-logger levels come from `LOG_LEVELS` and the
+    environment, which take precedence over `levels`; the console only
+    shows records at or above `console_level`."""
+    global _log_listener
+    stop_logging()
+    os.makedirs(LOG_DIRECTORY, exist_ok=True)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(console_level)
+    file_handler = RotatingFileHandler(os.path.join(LOG_DIRECTORY, 'app.log'),
+                                       maxBytes=LOG_MAX_BYTES,
+                                       backupCount=LOG_BACKUP_COUNT,
+                                       encoding='utf-8')
+    for handler in (console_handler, file_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    levels = get_log_levels(levels)
     logging_config = {
         'version': 1,
-        'formatters': {
-            'standard': {
-                'format': '[%(asctime)s][%(name)s][%(levelname)s][%(message)s]'
-            },
-        },
+        'disable_existing_loggers': False,
         'handlers': {
-            'console': {
-                'class': 'logging.StreamHandler',
-                'formatter': 'standard',
-                'level': logging.DEBUG
-            },
-            'file': {
-                'class': 'logging.FileHandler',
-                'filename': os.path.join(log_directory, 'app.log'),
-                'formatter': 'standard',
-                'level': logging.DEBUG
+            'queue': {
+                '()': QueueHandler,
+                'queue': log_queue
             },
         },
-        'loggers': {
-            '': {  # root logger
-                'handlers': ['console', 'file'],
-                'level': logging.DEBUG,
-                'propagate': False
-            }
-        }
+        'root': {
+            'handlers': ['queue'],
+            'level': levels.pop('root')
+        },
+        'loggers': {name: {'level': level} for name, level in levels.items()}
     }
 
     dictConfig(logging_config)
+    _log_listener = QueueListener(log_queue,
+                                  console_handler,
+                                  file_handler,
+                                  respect_handler_level=True)
+    _log_listener.start()
+
+
+def stop_logging() -> None:
+    """Writes out the queued log records and stops the listener thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+
+atexit.register(stop_logging)
+
+
+def configure_database(path: Optional[str] = None, **pragmas) -> None:
+    """Sets the database path and PRAGMA overrides used by new connections.
+    Must be called before the shared connection is first requested."""
+    global _database_path
+    if path is not None:
+        _database_path = path
+    for name, value in pragmas.items():
+        if name not in DATABASE_PRAGMAS:
+            raise ValueError(f"Unknown database PRAGMA: {name}")
+        DATABASE_PRAGMAS[name] = value
+
+
+def get_database_path() -> str:
+    """Returns the configured database path: the one given to
+    `configure_database`, the environment variable, or the default."""
+    return (_database_path
+            or os.environ.get(DATABASE_PATH_ENV)
+            or DEFAULT_DATABASE_PATH)
+
+
+def get_database_pragmas() -> dict:
+    """Returns the PRAGMAs to apply, with environment overrides."""
+    pragmas = {}
+    for name, value in DATABASE_PRAGMAS.items():
+        value = os.environ.get(f"EXPENSE_MANAGER_{name.upper()}", value)
+        if not re.fullmatch(r'-?\w+', str(value)):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+        pragmas[name] = value
+    return pragmas
+
+
+def create_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    """Opens a new, tuned connection to the configured database, profiled
+    if SQL profiling is enabled. ':memory:' opens a shared-cache in-memory
+    database, so every connection of the process sees the same data."""
+    path = get_database_path()
+    factory = ProfilingConnection if profiler.enabled else sqlite3.Connection
+    if path == ':memory:':
+        conn = sqlite3.connect('file:expense_manager?mode=memory&cache=shared',
+                               uri=True,
+                               check_same_thread=check_same_thread,
+                               factory=factory)
+        # Readers must not block on the writer's table locks
+        conn.execute("PRAGMA read_uncommitted = 1;")
+    else:
+        conn = sqlite3.connect(path,
+                               check_same_thread=check_same_thread,
+                               factory=factory)
+
+    for name, value in get_database_pragmas().items():
+        conn.execute(f"PRAGMA {name} = {value};")
+    if profiler.enabled:
+        profiler.instrument(conn)
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Returns the connection shared by the whole process,
+    creating it on first use. It may be handed over to the database
+    worker's writer thread, so it is not bound to its creating thread."""
+    global _connection
+    if _connection is None:
+        _connection = create_connection(check_same_thread=False)
+    return _connection
+
+
+def close_connection() -> None:
+    """Closes the shared connection, if open."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
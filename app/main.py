@@ -1,26 +1,67 @@
+import argparse
 import logging
 
-from config import setup_logging
+from config import configure_database, setup_logging
 from mvc.model import Model
 from mvc.view import View
 from mvc.controller import Controller
+from utils.profiling import setup_profiling
+from utils.tracing import setup_tracing, span, tracer
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
+def parse_arguments() -> argparse.Namespace:
+    """Parses the command-line arguments of the application."""
+    parser = argparse.ArgumentParser(description="Expense Manager")
+    parser.add_argument('--db',
+                        help="path to the SQLite database, or ':memory:' "
+                             "(default: $EXPENSE_MANAGER_DB or "
+                             "database/database.db)")
+    parser.add_argument('--trace',
+                        metavar='PATH',
+                        help="record timing spans and write them to PATH "
+                             "as a Chrome trace (default: "
+                             "$EXPENSE_MANAGER_TRACE)")
+    parser.add_argument('--profile-sql',
+                        action='store_true',
+                        help="collect per-statement SQL statistics "
+                             "(default: $EXPENSE_MANAGER_PROFILE_SQL)")
+    parser.add_argument('--slow-query-ms',
+                        type=float,
+                        help="log statements slower than this with their "
+                             "query plan (default: 100)")
+    parser.add_argument('--commit-batch',
+                        type=int,
+                        default=1,
+                        metavar='N',
+                        help="commit writes in groups of N; pending writes "
+                             "are also committed after a second without "
+                             "edits (default: 1)")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_arguments()
+    setup_tracing(args.trace)
+    setup_profiling(args.profile_sql, args.slow_query_ms)
     try:
-        model = Model()
-        controller = Controller(model)
+        configure_database(args.db)
+        with span('main.create_model', 'startup'):
+            model = Model()
+        controller = Controller(model, commit_batch=args.commit_batch)
         view = View(controller)
 
         controller.set_view(view)
         view.create_view()
+        controller.shutdown()
     except Exception as e:
         logger.error(
             f"An error occurred during application initialization: {e}"
         )
+    finally:
+        tracer.write()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+import datetime
+import logging
+import sqlite3
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class Dictionary:
+    """Names of the values of a dictionary-encoded column, indexed by
+    their ID in its lookup table; code 0 stands for no value."""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.values = ['']
+
+    def read_names(self, conn: sqlite3.Connection) -> None:
+        """Reads the names added to the lookup table since last read."""
+        rows = conn.execute(f"""SELECT id, name FROM {self.table}
+                            WHERE id >= ?
+                            ORDER BY id""", (len(self.values),))
+        for code, name in rows:
+            self.values.extend([''] * (code - len(self.values)))
+            self.values.append(name)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ColumnStore:
+    """Columnar in-memory copy of the expense records for analytics.
+    Dates are held as datetime64[D] (NaT when missing or invalid), text
+    columns as their int32 lookup IDs, read from 'expense_records' without
+    decoding and named through a `Dictionary`, and money as int64 cents,
+    so sums are exact. Aggregates are answered with vectorized NumPy
+    operations. Rows added since the last load are appended in place,
+    and changed or deleted ones replaced or removed by ID."""
+    text_columns = {
+        'category': 'categories',
+        'supplier': 'suppliers',
+        'payment_method': 'payment_methods',
+        'responsible': 'responsibles'
+    }  # Dictionary-encoded columns and their lookup tables
+
+    select_query = """SELECT id,
+                             date,
+                             IFNULL(category_id, 0),
+                             IFNULL(supplier_id, 0),
+                             IFNULL(payment_method_id, 0),
+                             IFNULL(responsible_id, 0),
+                             quantity,
+                             CAST(ROUND(subtotal * 100) AS INTEGER)
+                      FROM expense_records"""
+
+    load_query = select_query + """
+                      WHERE id > ?
+                      ORDER BY id"""
+
+    refresh_query = select_query + """
+                      WHERE id IN ({})"""
+
+    totals_query = """SELECT IFNULL(SUM(record_count), 0),
+                             CAST(ROUND(IFNULL(SUM(subtotal_sum), 0) * 100)
+                                  AS INTEGER)
+                      FROM monthly_category_totals"""
+
+    batch_size = 50000  # Rows fetched and converted at a time
+
+    ids_per_query = 500  # Bound IDs of one refresh query
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.size = 0
+        self.last_id = 0
+        self.dictionaries = {name: Dictionary(table)
+                             for name, table in self.text_columns.items()}
+        self.columns = {'id': np.empty(0, dtype=np.int64),
+                        'date': np.empty(0, dtype='datetime64[D]'),
+                        'dated': np.empty(0, dtype=bool),
+                        'quantity': np.empty(0, dtype=np.int64),
+                        'cents': np.empty(0, dtype=np.int64)}
+        for name in self.text_columns:
+            self.columns[name] = np.empty(0, dtype=np.int32)
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the filled part of a column."""
+        return self.columns[name][:self.size]
+
+    def load(self, conn: sqlite3.Connection) -> int:
+        """Appends the rows with IDs above the last loaded one
+        and returns their number."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.load_query, (self.last_id,))
+            loaded = 0
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                self.append(rows)
+                loaded += len(rows)
+            self.read_names(conn)
+            self.logger.debug("Loaded %d rows, %d in total", loaded, self.size)
+            return loaded
+        finally:
+            cursor.close()
+
+    def read_names(self, conn: sqlite3.Connection) -> None:
+        """Reads the names of lookup IDs added since the last read."""
+        for dictionary in self.dictionaries.values():
+            dictionary.read_names(conn)
+
+    def is_current(self, conn: sqlite3.Connection) -> bool:
+        """Checks the loaded rows against the aggregate table."""
+        return self.matches(*conn.execute(self.totals_query).fetchone())
+
+    def matches(self, count: int, cents: int) -> bool:
+        """Checks the loaded rows against the record count and subtotal
+        sum of the 'monthly_category_totals' aggregate table, as read by
+        `totals_query`, which is far cheaper than counting the table. A
+        mismatch means rows were changed without updating the store, e.g.
+        by another process, and requires a full reload."""
+        dated = self.column('dated')
+        return (count == int(dated.sum())
+                and cents == int(self.column('cents')[dated].sum()))
+
+    def append(self, rows: List[Tuple]) -> None:
+        """Converts (id, date, category, supplier, payment_method,
+        responsible, quantity, cents) rows, with lookup IDs for the text
+        columns, to columns and appends them, growing the arrays
+        geometrically."""
+        ids, dates, categories, suppliers, methods, responsibles, \
+            quantities, cents = zip(*rows)
+        chunk = {'id': np.array(ids, dtype=np.int64),
+                 'date': self.parse_dates(dates),
+                 'dated': np.array([date is not None for date in dates]),
+                 'quantity': np.array([q or 0 for q in quantities],
+                                      dtype=np.int64),
+                 'cents': np.array([c or 0 for c in cents], dtype=np.int64)}
+        for name, values in zip(self.text_columns,
+                                (categories, suppliers, methods,
+                                 responsibles)):
+            chunk[name] = np.array(values, dtype=np.int32)
+
+        end = self.size + len(rows)
+        for name, values in chunk.items():
+            column = self.columns[name]
+            if end > len(column):
+                grown = np.empty(max(end, 2 * len(column)), dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.columns[name] = column = grown
+            column[self.size:end] = values
+        self.size = end
+        self.last_id = max(self.last_id, int(chunk['id'].max()))
+
+    def remove(self, ids: List[int]) -> int:
+        """Removes the rows with the given IDs, moving the last rows into
+        their place rather than shifting the columns, and returns their
+        number. Rows are thus not kept in ID order."""
+        removed = np.flatnonzero(
+            np.isin(self.column('id'), np.array(ids, dtype=np.int64))
+        )
+        count = len(removed)
+        if count:
+            size = self.size - count
+            holes = removed[removed < size]
+            moved = np.setdiff1d(np.arange(size, self.size), removed)
+            for column in self.columns.values():
+                column[holes] = column[moved]
+            self.size = size
+        return count
+
+    def refresh(self, conn: sqlite3.Connection, ids: List[int]) -> int:
+        """Replaces the rows with the given IDs by their current values,
+        dropping deleted records and adding restored ones, and returns
+        the number of rows read."""
+        self.remove(ids)
+        cursor = conn.cursor()
+        try:
+            read = 0
+            for start in range(0, len(ids), self.ids_per_query):
+                chunk = ids[start:start + self.ids_per_query]
+                cursor.execute(self.refresh_query.format(
+                    ', '.join('?' * len(chunk))
+                ), chunk)
+                rows = cursor.fetchall()
+                if rows:
+                    self.append(rows)
+                    read += len(rows)
+            self.read_names(conn)
+            return read
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def parse_dates(dates: tuple) -> np.ndarray:
+        """Converts ISO date strings to datetime64[D], with NaT for
+        missing or malformed dates."""
+        try:
+            return np.array([date or 'NaT' for date in dates],
+                            dtype='datetime64[D]')
+        except ValueError:
+            parsed = []
+            for date in dates:
+                try:
+                    parsed.append(np.datetime64(
+                        datetime.date.fromisoformat(date), 'D'
+                    ))
+                except (TypeError, ValueError):
+                    parsed.append(np.datetime64('NaT'))
+            return np.array(parsed, dtype='datetime64[D]')
+
+    def mask(self, start: Optional[str] = None,
+             end: Optional[str] = None) -> np.ndarray:
+        """Returns the rows dated within [start, end) as a boolean mask;
+        without bounds, every dated row."""
+        dates = self.column('date')
+        selected = ~np.isnat(dates)
+        if start is not None:
+            selected &= dates >= np.datetime64(start, 'D')
+        if end is not None:
+            selected &= dates < np.datetime64(end, 'D')
+        return selected
+
+    def total(self, start: Optional[str] = None,
+              end: Optional[str] = None) -> float:
+        """Returns the sum of subtotals dated within [start, end)."""
+        cents = self.column('cents')[self.mask(start, end)]
+        return int(cents.sum()) / 100
+
+    def group_by(self, column: str, start: Optional[str] = None,
+                 end: Optional[str] = None) -> List[Tuple[str, int, float]]:
+        """Returns (value, record count, subtotal sum) per value of a text
+        column for the rows dated within [start, end), ordered by value."""
+        selected = self.mask(start, end)
+        codes = self.column(column)[selected]
+        cents = self.column('cents')[selected]
+        size = len(self.dictionaries[column])
+        counts = np.bincount(codes, minlength=size)
+        sums = np.rint(np.bincount(codes, weights=cents, minlength=size))
+        values = self.dictionaries[column].values
+        return sorted((values[code], int(counts[code]),
+                       float(sums[code]) / 100)
+                      for code in np.flatnonzero(counts))
+
+    def time_buckets(self, unit: str = 'M', start: Optional[str] = None,
+                     end: Optional[str] = None
+                     ) -> List[Tuple[str, int, float]]:
+        """Returns (bucket, record count, subtotal sum) per day ('D'),
+        week ('W'), month ('M') or year ('Y'), in chronological order.
+        Buckets are counted with `bincount` over their offsets from the
+        first one rather than by sorting."""
+        selected = self.mask(start, end)
+        buckets = self.column('date')[selected].astype(f'datetime64[{unit}]')
+        if not len(buckets):
+            return []
+
+        offsets = buckets.view(np.int64)
+        first = offsets.min()
+        offsets = offsets - first
+        counts = np.bincount(offsets)
+        sums = np.rint(np.bincount(offsets,
+                                   weights=self.column('cents')[selected]))
+        keys = np.flatnonzero(counts)
+        labels = (keys + first).astype(f'datetime64[{unit}]')
+        return [(str(label), int(counts[key]), float(sums[key]) / 100)
+                for label, key in zip(labels, keys)]
+
+    def top_n(self, column: str, n: int = 10, start: Optional[str] = None,
+              end: Optional[str] = None) -> List[Tuple[str, int, float]]:
+        """Returns the `n` values of a text column with the highest subtotal
+        sums within [start, end), highest first."""
+        selected = self.mask(start, end)
+        codes = self.column(column)[selected]
+        size = len(self.dictionaries[column])
+        counts = np.bincount(codes, minlength=size)
+        cents = self.column('cents')[selected]
+        sums = np.rint(np.bincount(codes, weights=cents, minlength=size))
+        present = np.flatnonzero(counts)
+        if len(present) > n:
+            present = present[np.argpartition(-sums[present], n - 1)[:n]]
+        present = present[np.argsort(-sums[present], kind='stable')]
+        values = self.dictionaries[column].values
+        return [(values[code], int(counts[code]), float(sums[code]) / 100)
+                for code in present]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Returns the bytes allocated per column."""
+        return {name: column.nbytes for name, column in self.columns.items()}
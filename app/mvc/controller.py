@@ -2,32 +2,214 @@ import datetime
 import locale
 import logging
 import re
+import time
 
-from tkinter.messagebox import showinfo
+from typing import Optional
 
-from typing import List, Optional
+from utils.methods import get_current_month, get_current_year, iter_buckets
+from utils.tracing import traced
+from utils.transfer import read_records, write_records
 
-from utils.methods import get_current_month
+from .records import Expense
+from .totals import RunningTotals
+from .unit_of_work import UnitOfWork
+from .worker import DatabaseWorker
+
+
+def showinfo(title: str, message: str) -> None:
+    """Shows an information box. tkinter is imported on first use,
+    so the controller can also be driven without a display."""
+    from tkinter.messagebox import showinfo as show_message
+
+    show_message(title, message)
 
 
 class Controller:
     """Manages interactions between the model and view"""
+    search_delay = 250  # Milliseconds of typing inactivity before searching
+
+    search_result_limit = 500  # Maximum search results shown in the treeview
 
-    def __init__(self, model):
+    commit_delay = 1000  # Milliseconds of inactivity before a group commit
+
+    def __init__(self, model, commit_batch: int = 1):
         self.logger = logging.getLogger(__name__)
         self.model = model
         self.view = None
+        self.worker = DatabaseWorker(model)
+        self.search_after_id = None
+        self.search_future = None
+        self.search_generation = 0
+        self.month_words = {}
+        self.totals = RunningTotals()
+        self.totals_callbacks = []
+        self.unit_of_work = UnitOfWork(model, commit_batch)
+        self.commit_after_id = None
+        self.save_on_exit = True
 
     def set_view(self, view):
         self.view = view
 
+    def start_worker(self, root) -> None:
+        self.worker.start(root, on_busy=self.view.set_busy)
+        root.after(RunningTotals.reconcile_seconds * 1000,
+                   self.reconcile_periodically)
+
     def get_get_graph_data(self):
         current_month = get_current_month()
-        return self.model.get_graph_data(current_month)
+        return self.model.get_graph_data(current_month, get_current_year())
+
+    def get_category_totals(self) -> tuple:
+        year, month = get_current_year(), get_current_month()
+        return year, month, self.model.get_category_totals(month, year)
 
-    def get_query_db(self, month=None):
-        return self.model.query_db(month)
+    def request_graph_data(self, callback) -> None:
+        self.request_totals(lambda totals: callback(totals.graph_data()))
 
+    def request_total_accumulated(self, callback) -> None:
+        self.request_totals(lambda totals: callback(totals.month_total()))
+
+    def request_totals(self, callback) -> None:
+        """Passes the running totals to `callback`, reading them from the
+        database first if they are not seeded or a reconcile is due."""
+        if not self.totals.needs_reconcile():
+            callback(self.totals)
+            return
+
+        self.totals_callbacks.append(callback)
+        if len(self.totals_callbacks) == 1:
+            self.reconcile_totals()
+
+    def reconcile_totals(self) -> None:
+        """Reads the current month's totals in the background
+        and reseeds the running totals with them."""
+        revision = self.totals.revision
+        self.worker.submit_read(
+            self.get_category_totals,
+            callback=lambda result: self.finish_reconcile(revision, result),
+            errback=self.fail_reconcile
+        )
+
+    def finish_reconcile(self, revision: int, result: tuple) -> None:
+        """Seeds the running totals and answers the waiting requests,
+        reading again if a write was applied while the read ran."""
+        year, month, rows = result
+        if not self.totals.seed(year, month, rows, revision):
+            self.reconcile_totals()
+            return
+
+        callbacks, self.totals_callbacks = self.totals_callbacks, []
+        for callback in callbacks:
+            callback(self.totals)
+
+    def fail_reconcile(self, error: Exception) -> None:
+        self.totals_callbacks = []
+        self.report_error(error)
+
+    def reconcile_periodically(self) -> None:
+        """Refreshes the totals and graph whenever a reconcile is due,
+        catching writes from other processes and the change of month."""
+        if self.totals.needs_reconcile():
+            self.refresh_totals()
+        self.view.root.after(RunningTotals.reconcile_seconds * 1000,
+                             self.reconcile_periodically)
+
+    def refresh_totals(self) -> None:
+        """Shows the running totals in the totals entry and the graph."""
+        self.view.load_total_accumulated()
+        self.view.create_graph(self.view.graph_frame)
+
+    @staticmethod
+    def totals_key(row: Expense) -> tuple:
+        """Returns the (date, category, subtotal) of a full record row."""
+        return row.date, row.category, row.subtotal
+
+    def record_ids(self, items: tuple) -> list:
+        """Returns the database IDs of treeview items."""
+        return [int(self.view.tree.item(item, 'text')) for item in items]
+
+    def get_trend_series(self, start: str, end: str, unit: str,
+                         dimension: str) -> tuple:
+        """Returns the bucket start dates of the range and, per category or
+        responsible, its totals in those buckets, zero where it had none."""
+        buckets = list(iter_buckets(start, end, unit))
+        positions = {bucket: index for index, bucket in enumerate(buckets)}
+        series = {}
+        for bucket, value, total in self.model.get_trend(start, end, unit,
+                                                         dimension):
+            totals = series.setdefault(value, [0.0] * len(buckets))
+            totals[positions[bucket]] += total
+        return buckets, series
+
+    def request_trend(self, start: str, end: str, unit: str,
+                      dimension: str, callback) -> None:
+        self.worker.submit_read(self.get_trend_series,
+                                start, end, unit, dimension,
+                                callback=callback,
+                                errback=self.report_error)
+
+    def get_sql_stats(self) -> dict:
+        return self.model.stats()
+
+    def get_cache_stats(self) -> dict:
+        return self.model.cache_stats()
+
+    def report_error(self, error: Exception) -> None:
+        """Shows the error of a failed background request."""
+        self.view.update_status_bar(f"Error: {error}")
+
+    def get_query_db(self, month=None, year=None):
+        return self.model.query_db(month, year)
+
+    def get_query_page(self, after_id=None, before_id=None, limit=100):
+        return self.model.query_page(after_id, before_id, limit)
+
+    def get_sorted_page(self, sort_column: str, descending: bool = False,
+                        after_id: Optional[int] = None,
+                        before_id: Optional[int] = None,
+                        limit: int = 100) -> list:
+        """Returns a page of records in the sort order, after or before
+        the record with the given ID."""
+        after = (self.sort_position(after_id, sort_column)
+                 if after_id is not None else None)
+        before = (self.sort_position(before_id, sort_column)
+                  if before_id is not None else None)
+        return self.model.query_sorted_page(sort_column, descending, after,
+                                            before, limit)
+
+    def request_sorted_page(self, sort_column: str, descending: bool,
+                            callback, errback,
+                            after_id: Optional[int] = None,
+                            before_id: Optional[int] = None,
+                            limit: int = 100) -> None:
+        self.worker.submit_read(self.get_sorted_page, sort_column,
+                                descending, after_id, before_id, limit,
+                                callback=callback,
+                                errback=errback)
+
+    def get_sort_values(self, record_ids: list, sort_column: str) -> dict:
+        """Returns the sort column value of the records by ID. The values
+        are read back from the database, as the treeview only holds
+        their text."""
+        if sort_column == 'id':
+            return {record_id: record_id for record_id in record_ids}
+
+        rows = self.model.query_by_ids(record_ids, ('id', sort_column))
+        return {row.id: getattr(row, sort_column) for row in rows}
+
+    def sort_position(self, record_id: int, sort_column: str) -> tuple:
+        """Returns the (sort value, ID) keyset position of a record."""
+        values = self.get_sort_values([record_id], sort_column)
+        return values.get(record_id), record_id
+
+    def request_sort_values(self, record_ids: list, sort_column: str,
+                            callback, errback) -> None:
+        self.worker.submit_read(self.get_sort_values, record_ids,
+                                sort_column,
+                                callback=callback,
+                                errback=errback)
+
+    @traced(category='controller')
     def add(self) -> None:
         """Adds a new record to the database and updates the UI accordingly."""
         if not self.validate_inputs():
@@ -37,11 +219,23 @@ class Controller:
         if not values:
             return
 
+        self.worker.submit_write(
+            self.unit_of_work.add, values,
+            callback=lambda last_id: self.finish_add(last_id, values),
+            errback=self.report_error
+        )
+
+    @traced(category='controller')
+    def finish_add(self, last_id: int, values: dict) -> None:
+        """Updates the UI once the new record has been stored."""
         try:
-            last_id = self.model.add_to_db(values)
             if last_id == -1:  # Handle failure
                 raise Exception("Failed to add record to the database.")
 
+            self.totals.apply(None, (values['date'],
+                                     values['category'],
+                                     round(values['quantity']
+                                           * values['amount'], 2)))
             self.view.update_ui_after_add(last_id, values)
             self.confirm()
         except Exception as e:
@@ -95,21 +289,115 @@ class Controller:
 
         return values
 
+    @traced(category='controller')
     def delete(self) -> None:
-        """Deletes the selected record from the database and updates the UI."""
+        """Deletes the selected record from the database and updates the UI.
+        With several records selected, all of them are deleted at once."""
         try:
+            selection = self.view.tree.selection()
+            if len(selection) > 1:
+                self.delete_selected(selection)
+                return
+
             purchase_id = self.view.tree.focus()
             db_id = self.validate_selection_deletion(purchase_id)
             if db_id is None:
                 self.cancel()
                 return
 
-            self.model.delete_from_db(db_id)
+            self.worker.submit_write(
+                self.unit_of_work.delete, [db_id],
+                callback=lambda rows: self.finish_delete(purchase_id,
+                                                         db_id, rows),
+                errback=self.report_error
+            )
+        except Exception as e:
+            self.view.update_status_bar(f"Error deleting record: {e}")
+
+    @traced(category='controller')
+    def finish_delete(self, purchase_id: str, db_id: int,
+                      rows: list) -> None:
+        """Updates the UI once the record has been deleted."""
+        try:
+            if not rows:
+                raise Exception("Failed to delete the record.")
+
+            self.totals.apply(self.totals_key(rows[0]), None)
             self.view.update_ui_after_delete(purchase_id, db_id)
             self.confirm()
         except Exception as e:
             self.view.update_status_bar(f"Error deleting record: {e}")
 
+    def delete_selected(self, items: tuple) -> None:
+        """Deletes the records of the selected treeview items
+        with one set-based statement."""
+        self.worker.submit_write(
+            self.unit_of_work.delete, self.record_ids(items),
+            callback=lambda rows: self.finish_delete_selected(items, rows),
+            errback=self.report_error
+        )
+
+    @traced(category='controller')
+    def finish_delete_selected(self, items: tuple, rows: list) -> None:
+        """Updates the totals and the treeview once the records
+        have been deleted."""
+        try:
+            if len(rows) == len(items):
+                for row in rows:
+                    self.totals.apply(self.totals_key(row), None)
+            else:
+                self.totals.invalidate()
+
+            if rows:
+                self.view.update_ui_after_bulk_delete(items, len(rows))
+            else:
+                self.view.update_status_bar("No records were deleted.")
+            self.confirm()
+        except Exception as e:
+            self.view.update_status_bar(f"Error deleting records: {e}")
+
+    @traced(category='controller')
+    def bulk_edit(self, field: str, value: str) -> None:
+        """Sets one field of every selected record
+        with one set-based statement."""
+        items = self.view.tree.selection()
+        if not items:
+            self.view.update_status_bar("You must select the records to edit.")
+            return
+
+        self.worker.submit_write(
+            self.unit_of_work.update_many, self.record_ids(items), field,
+            value,
+            callback=lambda rows: self.finish_bulk_edit(items, field, value,
+                                                        rows),
+            errback=self.report_error
+        )
+
+    @traced(category='controller')
+    def finish_bulk_edit(self, items: tuple, field: str, value: str,
+                         rows: list) -> None:
+        """Updates the totals and the treeview once the records
+        have been modified."""
+        try:
+            if not rows:
+                self.view.update_status_bar("No records were modified.")
+                return
+
+            new_rows = []
+            for row in rows:
+                new_row = row._replace(**{field: value})
+                new_rows.append(new_row)
+                if len(rows) == len(items):
+                    self.totals.apply(self.totals_key(row),
+                                      self.totals_key(new_row))
+            if len(rows) != len(items):
+                self.totals.invalidate()
+
+            self.view.update_ui_after_bulk_edit(items, new_rows, len(rows))
+            self.confirm()
+        except Exception as e:
+            self.view.update_status_bar(f"Error modifying records: {e}")
+
     def validate_selection_deletion(self, purchase_id: str) -> Optional[int]:
         """Validates the selected record and
         returns its database ID, or None if invalid."""
@@ -126,6 +414,7 @@ class Controller:
             self.view.update_status_bar("The ID is not a valid number.")
             return None
 
+    @traced(category='controller')
     def modify(self) -> None:
         """Prepares the form for modifying the selected record."""
         try:
@@ -182,22 +471,75 @@ class Controller:
         )
         self.view.cancel_button.config(state='normal')
 
+    def on_search_changed(self, *args) -> None:
+        """Restarts the debounce timer on every change of the search entry;
+        the search runs once typing pauses for `search_delay` ms."""
+        if self.search_after_id is not None:
+            self.view.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.view.root.after(self.search_delay,
+                                                    self.search)
+
+    @traced(category='controller')
     def search(self) -> None:
         """Searches the database records
-        and updates the treeview with filtered results."""
+        and updates the treeview with filtered results.
+        Any search still pending is superseded."""
+        if self.search_after_id is not None:
+            self.view.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        if self.search_future is not None:
+            self.search_future.cancel()
+            self.search_future = None
+        self.search_generation += 1
+        generation = self.search_generation
+
         try:
             search_term = self.process_search_term()
-            records = self.model.query_db()
-            filtered_records = self.filter_records(records, search_term)
-            self.view.update_treeview(filtered_records)
-
             if not search_term:
-                status_message = "All records are shown."
+                self.view.load_data_into_treeview()
+                self.view.update_status_bar("All records are shown.")
             else:
-                status_message = f"Search results for: {search_term}"
+                self.search_future = self.worker.submit_read(
+                    self.query_search, search_term, generation,
+                    callback=lambda records: self.finish_search(generation,
+                                                                search_term,
+                                                                records),
+                    errback=self.report_error
+                )
+        except Exception as e:
+            self.view.update_status_bar(f"Error in search operation: {e}")
+
+    def query_search(self, search_term: str, generation: int) -> list:
+        """Returns the records matching the search term, best first,
+        at most one more than `search_result_limit`. The query is
+        interrupted if a newer search starts meanwhile."""
+        record_ids = self.model.search(
+            search_term,
+            limit=self.search_result_limit + 1,
+            cancelled=lambda: generation != self.search_generation
+        )
+        return self.model.query_by_ids(record_ids)
+
+    @traced(category='controller')
+    def finish_search(self, generation: int, search_term: str,
+                      records: list) -> None:
+        """Shows the search results once they have been fetched,
+        unless a newer search has been started since."""
+        if generation != self.search_generation:
+            return
 
-            self.view.update_status_bar(status_message)
-            self.view.load_total_accumulated()
+        self.search_future = None
+        try:
+            self.view.update_treeview(records[:self.search_result_limit])
+            if len(records) > self.search_result_limit:
+                self.view.update_status_bar(
+                    f"First {self.search_result_limit} results "
+                    f"for: {search_term}"
+                )
+            else:
+                self.view.update_status_bar(
+                    f"Search results for: {search_term}"
+                )
         except Exception as e:
             self.view.update_status_bar(f"Error in search operation: {e}")
 
@@ -206,13 +548,6 @@ class Controller:
         search_term = self.view.var_search.get()
         return "" if "*" in search_term else search_term
 
-    def filter_records(self, records, search_term: str) -> List:
-        """Filters the records based on the given search term."""
-        regex = re.compile(search_term, re.IGNORECASE)
-        return [
-            row for row in records if regex.search(' '.join(map(str, row)))
-        ]
-
     def validate_fields(self) -> bool:
         """Validates a set of fields,
         returning True if all fields are valid, False otherwise."""
@@ -254,15 +589,123 @@ class Controller:
                                         command=self.delete)
         self.view.cancel_button.config(state='normal')
 
+    @traced(category='controller')
     def confirm(self) -> None:
         """Executes the defined action (add, delete, modify),
         disables the buttons, and updates the graph."""
         self.view.confirm_button.config(state='disabled')
         self.view.cancel_button.config(state='disabled')
 
-        for widget in self.view.graph_frame.winfo_children():
-            widget.destroy()
-            self.view.create_graph(self.view.graph_frame)
+        self.refresh_totals()
+        self.schedule_commit()
+
+    def schedule_commit(self) -> None:
+        """Commits the pending writes once edits pause for
+        `commit_delay` ms, so group commits never wait indefinitely."""
+        if self.commit_after_id is not None:
+            self.view.root.after_cancel(self.commit_after_id)
+        self.commit_after_id = self.view.root.after(self.commit_delay,
+                                                    self.flush_writes)
+
+    def flush_writes(self) -> None:
+        self.commit_after_id = None
+        if self.unit_of_work.pending and not self.unit_of_work.batch_mode:
+            self.worker.submit_write(self.unit_of_work.flush,
+                                     errback=self.report_error)
+
+    @traced(category='controller')
+    def undo(self) -> None:
+        """Reverts the last add, modification or delete."""
+        self.worker.submit_write(
+            self.unit_of_work.undo,
+            callback=lambda result: self.finish_replay('undo', result),
+            errback=self.report_error
+        )
+
+    @traced(category='controller')
+    def redo(self) -> None:
+        """Reapplies the last undone operation."""
+        self.worker.submit_write(
+            self.unit_of_work.redo,
+            callback=lambda result: self.finish_replay('redo', result),
+            errback=self.report_error
+        )
+
+    def finish_replay(self, action: str, result: Optional[tuple]) -> None:
+        """Patches the totals and the treeview with the rows replaced and
+        written by an undo or redo."""
+        if self.unit_of_work.rolled_back:
+            self.recover_from_rollback()
+            return
+        if result is None:
+            self.view.update_status_bar(f"Nothing to {action}.")
+            return
+
+        description, applied = result
+        for row in applied['before']:
+            self.totals.apply(self.totals_key(row), None)
+        for row in applied['after']:
+            self.totals.apply(None, self.totals_key(row))
+        self.view.apply_row_changes(applied['before'], applied['after'])
+        self.view.update_status_bar(f"{action.capitalize()}: {description}")
+        self.confirm()
+
+    def recover_from_rollback(self) -> None:
+        """Reloads the UI after a failed write rolled back
+        the uncommitted changes."""
+        self.unit_of_work.rolled_back = False
+        self.totals.invalidate()
+        self.view.load_data_into_treeview()
+        self.refresh_totals()
+        self.view.update_status_bar(
+            "A write failed and the unsaved changes were rolled back."
+        )
+
+    def set_batch_mode(self, enabled: bool) -> None:
+        """Turns batch-edit mode on or off; in batch-edit mode changes
+        are only committed on save."""
+        self.worker.submit_write(
+            self.unit_of_work.set_batch_mode, enabled,
+            callback=lambda saved: self.view.update_status_bar(
+                "Batch edit mode: changes are kept until saved."
+                if enabled else f"Batch edit mode off, {saved} changes saved."
+            ),
+            errback=self.report_error
+        )
+
+    def save(self) -> None:
+        """Commits every pending change."""
+        self.worker.submit_write(
+            self.unit_of_work.save,
+            callback=lambda saved: self.view.update_status_bar(
+                f"{saved} changes saved."
+            ),
+            errback=self.report_error
+        )
+
+    def discard(self) -> None:
+        """Rolls back the pending changes and reloads the UI."""
+        self.worker.submit_write(
+            self.unit_of_work.discard,
+            callback=self.finish_discard,
+            errback=self.report_error
+        )
+
+    def finish_discard(self, discarded: int) -> None:
+        self.totals.invalidate()
+        self.view.load_data_into_treeview()
+        self.refresh_totals()
+        self.view.update_status_bar(f"{discarded} changes discarded.")
+
+    def has_unsaved_changes(self) -> bool:
+        return self.unit_of_work.batch_mode and self.unit_of_work.pending > 0
+
+    def shutdown(self) -> None:
+        """Commits pending writes, or discards them if the user chose so
+        on exit, and stops the worker."""
+        finalize = (self.unit_of_work.save if self.save_on_exit
+                    else self.unit_of_work.discard)
+        self.worker.shutdown(finalize)
 
     def cancel(self) -> None:
         """Disables the confirm button
@@ -272,6 +715,7 @@ class Controller:
         self.view.cancel_button.config(state='disabled')
         self.view.clear_form()
 
+    @traced(category='controller')
     def apply_modification(self, purchase_id: int, db_id: int) -> None:
         """Applies modifications to a purchase record."""
         new_value = self.validate_and_prepare_data()
@@ -279,10 +723,23 @@ class Controller:
             self.cancel()
             return
 
-        if self.update_database(db_id, new_value):
-            self.view.update_ui_after_modify(purchase_id, new_value, db_id)
-            self.view.clear_form()
-            self.confirm()
+        self.update_database(
+            db_id, new_value,
+            lambda row: self.finish_modification(purchase_id, new_value,
+                                                 db_id, row)
+        )
+
+    @traced(category='controller')
+    def finish_modification(
+        self, purchase_id: int, new_value: dict, db_id: int, row: tuple
+    ) -> None:
+        """Updates the UI once the modified record has been stored."""
+        subtotal = round(new_value['quantity'] * new_value['amount'], 2)
+        new_key = (new_value['date'], new_value['category'], subtotal)
+        self.totals.apply(self.totals_key(row), new_key)
+        self.view.update_ui_after_modify(purchase_id, new_value, db_id)
+        self.view.clear_form()
+        self.confirm()
 
     def validate_and_prepare_data(self) -> Optional[dict]:
         """Validates input fields and prepares data for database update."""
@@ -304,30 +761,189 @@ class Controller:
         }
         return new_value
 
-    def update_database(self, db_id: int, new_value: dict) -> bool:
-        """Updates the database record with new values."""
+    def update_database(self, db_id: int, new_value: dict,
+                        callback) -> None:
+        """Queues the update of the record with new values, calling
+        `callback` with its previous row once it is stored."""
+        self.worker.submit_write(
+            self.unit_of_work.modify, db_id, new_value,
+            callback=lambda row: (
+                callback(row) if row is not None
+                else self.view.update_status_bar("Error modifying record.")
+            ),
+            errback=lambda e: self.view.update_status_bar(
+                f"Error modifying record: {e}"
+            )
+        )
+
+    @traced(category='controller')
+    def import_records(self, path: str, chunk_size: int = 10000) -> dict:
+        """Imports a CSV or JSON-lines file chunk by chunk, one transaction
+        per chunk, and returns the import statistics. Each chunk is
+        committed even in batch-edit mode, so the import is refused while
+        unsaved batch edits would be committed with it."""
+        if self.unit_of_work.batch_mode and self.unit_of_work.pending:
+            raise ValueError("Save or discard the batch edits "
+                             "before importing.")
+
+        self.unit_of_work.save()
+        start = time.perf_counter()
+        inserted = 0
+        rejected = []
+        for chunk in read_records(path, chunk_size):
+            rows, chunk_rejected = self.model.validate_expense_batch(chunk)
+            count = self.model.add_many_to_db(rows)
+            self.unit_of_work.check_rollback()
+            self.model.commit_pending()
+            if count < len(rows):
+                invalid = {line_number for line_number, _ in chunk_rejected}
+                chunk_rejected.extend(
+                    (line_number, "Database error")
+                    for line_number, _ in chunk
+                    if line_number not in invalid
+                )
+            inserted += count
+            rejected.extend(chunk_rejected)
+
+        elapsed = time.perf_counter() - start
+        stats = {'inserted': inserted,
+                 'rejected': rejected,
+                 'seconds': elapsed,
+                 'rows_per_second': inserted / elapsed if elapsed else 0.0}
+        self.logger.info(
+            f"Imported {inserted} rows from {path} in {elapsed:.2f}s "
+            f"({stats['rows_per_second']:.0f} rows/s), "
+            f"{len(rejected)} rejected"
+        )
+        for line_number, reason in rejected:
+            self.logger.warning(f"Rejected line {line_number}: {reason}")
+        return stats
+
+    def import_file(self) -> None:
+        """Asks for a CSV or JSON-lines file, imports it
+        and refreshes the treeview, totals and graph."""
+        from tkinter.filedialog import askopenfilename
+
+        if self.has_unsaved_changes():
+            showinfo("Import", "Save or discard the batch edits "
+                               "before importing.")
+            return
+
+        path = askopenfilename(
+            title="Import expenses",
+            filetypes=[("CSV", "*.csv *.csv.gz *.csv.xz"),
+                       ("JSON lines", "*.jsonl *.jsonl.gz *.jsonl.xz"),
+                       ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        self.view.update_status_bar(f"Importing {path}...")
+        self.worker.submit_write(
+            self.import_records, path,
+            callback=self.finish_import,
+            errback=lambda e: self.view.update_status_bar(
+                f"Error importing file: {e}"
+            )
+        )
+
+    def finish_import(self, stats: dict) -> None:
+        """Refreshes the UI and reports rejected lines after an import."""
         try:
-            self.model.update_db(db_id, new_value)
-            return True
+            if self.unit_of_work.rolled_back:
+                self.recover_from_rollback()
+            else:
+                self.totals.invalidate()
+                self.view.load_data_into_treeview()
+            self.confirm()
+
+            message = (f"Imported {stats['inserted']} records, "
+                       f"{len(stats['rejected'])} rejected.")
+            self.view.update_status_bar(message)
+            if stats['rejected']:
+                lines = '\n'.join(
+                    f"Line {line_number}: {reason}"
+                    for line_number, reason in stats['rejected'][:20]
+                )
+                showinfo("Import", f"{message}\n\n{lines}")
         except Exception as e:
-            self.view.update_status_bar(f"Error modifying record: {e}")
-            return False
+            self.view.update_status_bar(f"Error importing file: {e}")
+
+    @traced(category='controller')
+    def export_records(self,
+                       path: str,
+                       month: Optional[int] = None,
+                       year: Optional[int] = None,
+                       category: Optional[str] = None,
+                       columns: Optional[tuple] = None) -> int:
+        """Streams the given columns (all by default) of the filtered
+        records to a CSV or JSON-lines file over a dedicated connection
+        and returns the number written."""
+        start = time.perf_counter()
+        columns = columns or self.model.export_columns
+        conn = self.model.open_connection()
+        try:
+            rows = self.model.iter_records(month, year, category, conn=conn,
+                                           columns=columns)
+            count = write_records(path, rows, columns)
+        finally:
+            conn.close()
+
+        self.logger.info(f"Exported {count} rows to {path} "
+                         f"in {time.perf_counter() - start:.2f}s")
+        return count
+
+    def export_file(self, month: Optional[int] = None) -> None:
+        """Asks for a destination file and exports the records of the given
+        month of the current year (all records by default) on a reader thread,
+        reporting the result in the status bar."""
+        from tkinter.filedialog import asksaveasfilename
+
+        path = asksaveasfilename(
+            title="Export expenses",
+            defaultextension='.csv',
+            filetypes=[("CSV", "*.csv"),
+                       ("CSV (gzip)", "*.csv.gz"),
+                       ("JSON lines", "*.jsonl"),
+                       ("JSON lines (xz)", "*.jsonl.xz")]
+        )
+        if not path:
+            return
+
+        year = get_current_year() if month is not None else None
+        self.view.update_status_bar(f"Exporting to {path}...")
+        self.worker.submit_read(
+            self.export_records, path, month, year,
+            callback=lambda count: self.view.update_status_bar(
+                f"Exported {count} records to {path}"
+            ),
+            errback=lambda e: self.view.update_status_bar(
+                f"Error exporting file: {e}"
+            )
+        )
 
     def get_current_month_word(self, locale_setting=None):
         """Returns the current month's name in the specified locale.
-        If no locale is specified, the system's default locale is used."""
+        If no locale is specified, the system's default locale is used.
+        Names are memoized per month and locale, so the locale is only
+        switched when either changes."""
+        current_month = datetime.datetime.now().month
+        key = (current_month, locale_setting)
+        if key in self.month_words:
+            return self.month_words[key]
+
         try:
             locale.setlocale(
                 locale.LC_TIME,
                 locale_setting if locale_setting else locale.getdefaultlocale()
             )
 
-            current_month = datetime.datetime.now().month
             current_month_str = datetime.datetime.strptime(
                 str(current_month), "%m"
                 ).strftime("%B")
 
-            return current_month_str.capitalize()
+            self.month_words[key] = current_month_str.capitalize()
+            return self.month_words[key]
         except locale.Error as e:
             self.logger.error(f"Locale error: {e}")
         except Exception as e:
@@ -338,12 +954,8 @@ class Controller:
         """Calculates and returns the total accumulated value
         for records in the current month."""
         try:
-            current_month = get_current_month()
-            records = self.model.query_db(month=current_month)
-
-            total_accumulated = sum(row[5] for row in records)
-
-            return total_accumulated
+            return self.model.get_month_total(get_current_month(),
+                                              get_current_year())
         except Exception as e:
             self.logger.error(f"Error in getting total accumulated: {e}")
             return 0.0
@@ -1,56 +1,738 @@
+import datetime
 import logging
+import re
 import sqlite3
+import threading
 
-from typing import Optional, List, Tuple
+from typing import Callable, Iterator, Optional, List, Tuple
+
+from config import (close_connection,
+                    create_connection,
+                    get_connection,
+                    get_database_path)
+from utils.cache import LRUCache
+from utils.methods import get_current_year, get_date_range
+from utils.profiling import profiler
+
+from .analytics import ColumnStore
+from .records import EXPENSE_COLUMNS, projection, row_factory
 
 
 class Model:
     """Handles database operations"""
+    search_columns = ('product_service',
+                      'supplier',
+                      'category',
+                      'responsible',
+                      'payment_method')  # Columns indexed for full-text search
+
+    bulk_edit_fields = ('category',
+                        'payment_method',
+                        'responsible',
+                        'supplier',
+                        'date',
+                        'due_date')  # Columns that can be set on many records
+
+    lookup_tables = {
+        'category': 'categories',
+        'supplier': 'suppliers',
+        'responsible': 'responsibles',
+        'payment_method': 'payment_methods'
+    }  # Lookup table of each dictionary-encoded column
+
+    rollup_dimensions = ('category',
+                         'responsible')  # Encoded columns with daily rollups
+
+    trend_buckets = {
+        'day': "day",
+        'week': "date(day, '-6 days', 'weekday 1')",
+        'month': "substr(day, 1, 8) || '01'"
+    }  # SQL expression mapping a rollup day to the start of its bucket
+
+    max_inline_ids = 500  # Larger ID sets are joined through a temp table
+
+    expense_fields = ('product',
+                      'quantity',
+                      'amount',
+                      'responsible',
+                      'category',
+                      'supplier',
+                      'payment_method',
+                      'date',
+                      'due_date')  # Required keys of an expense record
+
+    date_range_query = """SELECT {columns} FROM expenses
+                       WHERE date >= ? AND date < ?"""
+
+    graph_data_query = """SELECT IFNULL(name, ''), subtotal_sum
+                       FROM monthly_category_totals
+                       LEFT JOIN categories ON id = category_id
+                       WHERE year = ? AND month = ?"""
+
+    category_totals_query = """SELECT IFNULL(name, ''),
+                                   record_count,
+                                   subtotal_sum
+                            FROM monthly_category_totals
+                            LEFT JOIN categories ON id = category_id
+                            WHERE year = ? AND month = ?"""
+
+    export_columns = EXPENSE_COLUMNS  # Column order of 'expenses' rows
+
+    sort_indexed_columns = ('product_service',
+                            'quantity',
+                            'amount',
+                            'responsible',
+                            'subtotal',
+                            'category',
+                            'supplier',
+                            'payment_method',
+                            'due_date')  # Indexed for sorting; date already is
+
+    cache_size = 128  # Read query results kept in the LRU cache
+
+    max_cached_rows = 10000  # Larger results are not cached
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.conn = self.connect_to_database()
+        self.local = threading.local()
+        self.cache = LRUCache(self.cache_size)
+        self.write_generation = 0
+        self.generation_lock = threading.Lock()
+        self.commits_deferred = False
+        self.uncommitted_writes = 0
+        self.rollback_count = 0
+        self.column_store = None
+        self.analytics_lock = threading.RLock()
+        self.insert_query = self.build_insert_query(self.export_columns[1:])
+        self.shared_conn = self.connect_to_database()
+        self.fts_enabled = False
+        self.initialize_database()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The connection bound to the calling thread, if any,
+        otherwise the shared connection."""
+        return getattr(self.local, 'conn', None) or self.shared_conn
+
+    def bind_thread_connection(self, conn: sqlite3.Connection) -> None:
+        """Makes the calling thread use its own connection."""
+        self.local.conn = conn
 
     def connect_to_database(self) -> sqlite3.Connection:
-        """Establishes and returns a connection to the SQLite database."""
+        """Returns the process-wide connection to the SQLite database."""
         try:
-            conn = sqlite3.connect('database/database.db')
-            self.logger.info("Database connection established.")
+            conn = get_connection()
+            self.logger.info(
+                f"Database connection established: {get_database_path()}"
+            )
             return conn
         except sqlite3.Error as e:
             self.logger.error(f"Database connection error: {e}")
             raise
 
+    def open_connection(self) -> sqlite3.Connection:
+        """Opens a dedicated connection, e.g. for reading in another thread.
+        The caller is responsible for closing it."""
+        try:
+            return create_connection()
+        except sqlite3.Error as e:
+            self.logger.error(f"Database connection error: {e}")
+            raise
+
     def disconnect_from_database(self) -> None:
-        """Closes the database connection."""
+        """Closes the shared database connection."""
         try:
-            self.conn.close()
+            close_connection()
             self.logger.info("Database connection closed.")
         except sqlite3.Error as e:
             self.logger.error(f"Database disconnection error: {e}")
 
-    def create_table(self) -> None:
-        """Creates the 'expenses' table in the database
-        if it does not already exist."""
+    def stats(self) -> dict:
+        """Returns per-statement SQL statistics (count, total, mean and p95
+        latency in ms, rows returned) under 'statements', and the numbers
+        of statements executed and failed; empty unless profiling is
+        enabled."""
+        return profiler.stats()
+
+    def cache_stats(self) -> dict:
+        """Returns the result cache's hit, miss and eviction counters,
+        its size and the current write generation."""
+        return dict(self.cache.stats(), generation=self.write_generation)
+
+    def commit(self) -> None:
+        """Commits a write, or leaves it in the open transaction
+        while commits are deferred to a unit of work."""
+        if self.commits_deferred:
+            self.uncommitted_writes += 1
+        else:
+            self.conn.commit()
+        self.invalidate_cache()
+
+    def commit_pending(self) -> int:
+        """Commits the open transaction
+        and returns the number of writes it held."""
+        count = self.uncommitted_writes
+        self.conn.commit()
+        self.uncommitted_writes = 0
+        self.invalidate_cache()
+        return count
+
+    def rollback(self) -> None:
+        """Rolls back the open transaction,
+        including any writes whose commit was deferred."""
+        self.conn.rollback()
+        if self.uncommitted_writes:
+            self.logger.warning(f"Rolled back {self.uncommitted_writes} "
+                                f"uncommitted writes.")
+        self.uncommitted_writes = 0
+        self.rollback_count += 1
+        self.column_store = None
+        self.invalidate_cache()
+
+    def invalidate_cache(self) -> None:
+        """Starts a new write generation, making every cached result stale."""
+        with self.generation_lock:
+            self.write_generation += 1
+
+    def check_data_version(self) -> None:
+        """Invalidates the cache if the database was changed through another
+        connection (including other processes) since this thread last
+        looked, as reported by PRAGMA data_version."""
+        version = self.conn.execute("PRAGMA data_version;").fetchone()[0]
+        previous = getattr(self.local, 'data_version', None)
+        if previous is not None and previous != version:
+            self.invalidate_cache()
+        self.local.data_version = version
+
+    def get_analytics(self) -> ColumnStore:
+        """Returns the column store of the records, loading it on first use
+        or when it no longer matches the aggregate table, e.g. after writes
+        by another process. Callers hold `analytics_lock` while using it."""
+        with self.analytics_lock:
+            store = self.column_store
+            if (store is None or not store.matches(
+                    *self.fetch_cached(ColumnStore.totals_query)[0])):
+                store = ColumnStore()
+                store.load(self.conn)
+                self.column_store = store
+            return store
+
+    def update_analytics(self, record_ids: Optional[List[int]] = None
+                         ) -> None:
+        """Applies a write to the column store, if loaded, by appending the
+        new records or re-reading the given ones. Called within the write's
+        transaction, whose rollback drops the store."""
+        with self.analytics_lock:
+            if self.column_store is None:
+                return
+            if record_ids is None:
+                self.column_store.load(self.conn)
+            else:
+                self.column_store.refresh(self.conn, record_ids)
+
+    def fetch_cached(self, query: str, params=(),
+                     columns: Optional[Tuple[str, ...]] = None) -> List[Tuple]:
+        """Runs a read query, serving repeated calls with the same
+        parameters from the result cache until the data changes. Rows of
+        'expenses' columns are returned as named tuples of `columns`."""
+        self.check_data_version()
+        key = (query, tuple(params))
+        generation = self.write_generation
+        rows = self.cache.get(key, generation)
+        if rows is LRUCache.MISSING:
+            cursor = self.conn.cursor()
+            if columns is not None:
+                cursor.row_factory = row_factory(columns)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            if len(rows) <= self.max_cached_rows:
+                self.cache.put(key, generation, rows)
+        return list(rows)
+
+    def initialize_database(self) -> None:
+        """Creates the tables, indexes and triggers the application needs,
+        compacting the database once an earlier version was migrated."""
+        migrated = self.create_table()
+        self.create_indexes()
+        self.create_search_index()
+        self.create_monthly_totals()
+        self.create_daily_rollups()
+        if migrated:
+            self.compact_database()
+        self.verify_query_plans()
+
+    def create_table(self) -> bool:
+        """Creates the 'expense_records' table, the lookup tables of its
+        dictionary-encoded columns and the 'expenses' view decoding them,
+        migrating an 'expenses' table of an earlier version if found.
+        Returns whether one was migrated."""
+        decoded = ', '.join(
+            f"{self.lookup_tables[column]}.name AS {column}"
+            if column in self.lookup_tables
+            else f"expense_records.{column} AS {column}"
+            for column in self.export_columns
+        )
+        joins = ' '.join(
+            f"LEFT JOIN {table} ON {table}.id = expense_records.{column}_id"
+            for column, table in self.lookup_tables.items()
+        )
         try:
             cursor = self.conn.cursor()
-            query = """CREATE TABLE IF NOT EXISTS expenses (
+            cursor.execute("BEGIN;")
+            for table in self.lookup_tables.values():
+                cursor.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                               id INTEGER PRIMARY KEY,
+                               name TEXT NOT NULL UNIQUE
+                               );""")
+            query = """CREATE TABLE IF NOT EXISTS expense_records (
                        id INTEGER PRIMARY KEY AUTOINCREMENT,
                        product_service TEXT,
                        quantity INTEGER,
                        amount FLOAT,
-                       responsible TEXT,
+                       responsible_id INTEGER REFERENCES responsibles (id),
                        subtotal FLOAT,
-                       category TEXT,
-                       supplier TEXT,
-                       payment_method TEXT,
+                       category_id INTEGER REFERENCES categories (id),
+                       supplier_id INTEGER REFERENCES suppliers (id),
+                       payment_method_id INTEGER
+                           REFERENCES payment_methods (id),
                        date DATE,
                        due_date DATE
                        );"""
             cursor.execute(query)
+
+            cursor.execute("""SELECT 1 FROM sqlite_master
+                           WHERE type = 'table' AND name = 'expenses'""")
+            migrate = cursor.fetchone() is not None
+            if migrate:
+                self.migrate_expenses_table(cursor)
+
+            cursor.execute(f"""CREATE VIEW IF NOT EXISTS expenses AS
+                           SELECT {decoded}
+                           FROM expense_records {joins};""")
+            self.create_view_triggers(cursor)
+            self.conn.commit()
+            self.logger.info("Table 'expense_records' and view 'expenses' "
+                             "created or already exist.")
+            return migrate
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error: {e}")
+            self.conn.rollback()
+            return False
+
+    def create_view_triggers(self, cursor: sqlite3.Cursor) -> None:
+        """Creates the INSTEAD OF triggers writing changes made through
+        the 'expenses' view to 'expense_records' and the lookup tables,
+        so statements written for the table keep working. The model
+        itself writes to 'expense_records', since statements on a view
+        report no changed rows and no inserted row ID."""
+        add_lookup_values = ''.join(
+            f"""INSERT OR IGNORE INTO {table} (name)
+                SELECT new.{column} WHERE new.{column} IS NOT NULL;"""
+            for column, table in self.lookup_tables.items()
+        )
+        targets, values = zip(*(self.encoded_value(c, f"new.{c}")
+                                for c in self.export_columns))
+        assignments = ', '.join(f"{target} = {value}"
+                                for target, value in zip(targets, values))
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS expenses_insert
+                       INSTEAD OF INSERT ON expenses BEGIN
+                           {add_lookup_values}
+                           INSERT INTO expense_records ({', '.join(targets)})
+                           VALUES ({', '.join(values)});
+                       END;""")
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS expenses_update
+                       INSTEAD OF UPDATE ON expenses BEGIN
+                           {add_lookup_values}
+                           UPDATE expense_records SET {assignments}
+                           WHERE id = old.id;
+                       END;""")
+        cursor.execute("""CREATE TRIGGER IF NOT EXISTS expenses_delete
+                       INSTEAD OF DELETE ON expenses BEGIN
+                           DELETE FROM expense_records WHERE id = old.id;
+                       END;""")
+
+    def migrate_expenses_table(self, cursor: sqlite3.Cursor) -> None:
+        """Moves the rows of an 'expenses' table holding the encoded
+        columns as text into 'expense_records', keeping their IDs and the
+        AUTOINCREMENT sequence, then drops it with its indexes and
+        triggers. The aggregate tables are dropped too, to be rebuilt
+        keyed by lookup IDs."""
+        for column, table in self.lookup_tables.items():
+            cursor.execute(f"""INSERT OR IGNORE INTO {table} (name)
+                           SELECT DISTINCT {column} FROM expenses
+                           WHERE {column} IS NOT NULL
+                           ORDER BY 1;""")
+        encoded = ', '.join(
+            f"{self.lookup_tables[column]}.id"
+            if column in self.lookup_tables else f"expenses.{column}"
+            for column in self.export_columns
+        )
+        joins = ' '.join(
+            f"LEFT JOIN {table} ON {table}.name = expenses.{column}"
+            for column, table in self.lookup_tables.items()
+        )
+        cursor.execute("""UPDATE sqlite_sequence SET name = 'expense_records'
+                       WHERE name = 'expenses';""")
+        cursor.execute(f"""INSERT INTO expense_records
+                       SELECT {encoded} FROM expenses {joins};""")
+        migrated = cursor.rowcount
+        cursor.execute("DROP TABLE expenses;")
+        cursor.execute("DROP TABLE IF EXISTS monthly_category_totals;")
+        cursor.execute("DROP TABLE IF EXISTS daily_rollups;")
+        self.logger.info("Moved %d records to 'expense_records' "
+                         "with lookup tables.", migrated)
+
+    def compact_database(self) -> None:
+        """Rebuilds the database file with VACUUM, returning the pages
+        freed by a migration to the file system."""
+        size = self.database_size()
+        try:
+            self.conn.execute("VACUUM;")
+            self.logger.info(
+                f"Database compacted from {size / 2**20:.1f} MiB "
+                f"to {self.database_size() / 2**20:.1f} MiB."
+            )
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in compact_database: {e}")
+
+    def database_size(self) -> int:
+        """Returns the size of the database in bytes."""
+        page_count = self.conn.execute("PRAGMA page_count;").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size;").fetchone()[0]
+        return page_count * page_size
+
+    def build_insert_query(self, columns: Tuple[str, ...]) -> str:
+        """Returns the INSERT statement of 'expense_records' taking values
+        of the given 'expenses' columns, in their order, as parameters."""
+        targets, values = zip(*(self.encoded_value(c) for c in columns))
+        return (f"INSERT INTO expense_records ({', '.join(targets)}) "
+                f"VALUES ({', '.join(values)});")
+
+    def encoded_value(self, column: str, value: str = '?') -> Tuple[str, str]:
+        """Returns the 'expense_records' column storing an 'expenses'
+        column and the SQL expression storing a value, a bound parameter
+        by default, in it: the value's lookup ID for encoded columns."""
+        table = self.lookup_tables.get(column)
+        if table is None:
+            return column, value
+        return (f"{column}_id",
+                f"(SELECT id FROM {table} WHERE name = {value})")
+
+    def add_lookup_values(self, cursor: sqlite3.Cursor,
+                          columns: Tuple[str, ...], rows: List[Tuple]) -> None:
+        """Adds the values of the dictionary-encoded columns among `columns`
+        found in `rows` to their lookup tables, unless already there, so
+        the statements of `encoded_value` find them."""
+        for position, column in enumerate(columns):
+            table = self.lookup_tables.get(column)
+            if table is None:
+                continue
+            values = {row[position] for row in rows} - {None}
+            cursor.executemany(f"INSERT OR IGNORE INTO {table} (name) "
+                               f"VALUES (?);",
+                               ((value,) for value in values))
+
+    def create_indexes(self) -> None:
+        """Creates the indexes serving date-range filters, including
+        a covering index for per-category monthly sums, and one index per
+        sortable column. SQLite appends the row ID to every index entry,
+        so each also serves ORDER BY column, id. Encoded columns are
+        indexed by lookup ID, which also serves filters and sorts by name
+        through the unique index of the lookup table."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""CREATE INDEX IF NOT EXISTS
+                           idx_expense_records_date
+                           ON expense_records (date);""")
+            cursor.execute("""CREATE INDEX IF NOT EXISTS
+                           idx_expense_records_date_category_subtotal
+                           ON expense_records
+                           (date, category_id, subtotal);""")
+            for column in self.sort_indexed_columns:
+                cursor.execute(f"""CREATE INDEX IF NOT EXISTS
+                               idx_expense_records_sort_{column}
+                               ON expense_records
+                               ({self.encoded_value(column)[0]});""")
             self.conn.commit()
-            self.logger.info("Table 'expenses' created or already exists.")
         except sqlite3.DatabaseError as e:
             self.logger.error(f"Database error: {e}")
+            self.conn.rollback()
+
+    def explain_query_plan(self, query: str, params=()) -> List[str]:
+        """Returns the detail lines of SQLite's plan for the given query."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+    def verify_query_plans(self) -> bool:
+        """Checks that the date-range queries are served by an index search,
+        logging a warning for any full table or index scan."""
+        checks = [(self.date_range_query.format(columns='*'),
+                   get_date_range(get_current_year(), 1)),
+                  (self.graph_data_query, (get_current_year(), 1))]
+        checks.extend((f"""SELECT * FROM expenses
+                       WHERE {self.null_conditions(column)[1]}
+                       ORDER BY {column}, id
+                       LIMIT ?""", (100,))
+                      for column in self.sort_indexed_columns + ('date',))
+        verified = True
+        try:
+            for query, params in checks:
+                for detail in self.explain_query_plan(query, params):
+                    if (detail.startswith('SCAN')
+                            or detail.startswith('USE TEMP B-TREE')):
+                        self.logger.warning(
+                            f"Full table scan or sort in query plan: "
+                            f"{detail}"
+                        )
+                        verified = False
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in verify_query_plans: {e}")
+            return False
+        return verified
+
+    def null_conditions(self, column: str) -> Tuple[str, str]:
+        """Returns the conditions selecting the rows of 'expenses' where
+        the column is NULL and where it is not. For encoded columns they
+        test the lookup ID, and the range of names (all text, so at least
+        ''), which indexes serve rather than a scan of the view."""
+        if column not in self.lookup_tables:
+            return f"{column} IS NULL", f"{column} IS NOT NULL"
+        return (f"id IN (SELECT id FROM expense_records "
+                f"WHERE {column}_id IS NULL)",
+                f"{column} >= ''")
+
+    def create_search_index(self) -> None:
+        """Creates the FTS5 index over the text columns of 'expenses'
+        and the triggers that keep it in sync, populating it if new."""
+        def decoded(row):
+            return ', '.join(f"(SELECT name FROM {self.lookup_tables[c]} "
+                             f"WHERE id = {row}.{c}_id)"
+                             if c in self.lookup_tables else f"{row}.{c}"
+                             for c in self.search_columns)
+
+        columns = ', '.join(self.search_columns)
+        new_columns = decoded('new')
+        old_columns = decoded('old')
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""SELECT 1 FROM sqlite_master
+                           WHERE type = 'table' AND name = 'expenses_fts'""")
+            exists = cursor.fetchone() is not None
+
+            cursor.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts
+                           USING fts5({columns},
+                                      content='expenses',
+                                      content_rowid='id');""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS expenses_fts_ai
+                           AFTER INSERT ON expense_records BEGIN
+                               INSERT INTO expenses_fts(rowid, {columns})
+                               VALUES (new.id, {new_columns});
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS expenses_fts_ad
+                           AFTER DELETE ON expense_records BEGIN
+                               INSERT INTO expenses_fts(expenses_fts,
+                                                        rowid,
+                                                        {columns})
+                               VALUES ('delete', old.id, {old_columns});
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS expenses_fts_au
+                           AFTER UPDATE ON expense_records BEGIN
+                               INSERT INTO expenses_fts(expenses_fts,
+                                                        rowid,
+                                                        {columns})
+                               VALUES ('delete', old.id, {old_columns});
+                               INSERT INTO expenses_fts(rowid, {columns})
+                               VALUES (new.id, {new_columns});
+                           END;""")
+            if not exists:
+                cursor.execute("""INSERT INTO expenses_fts(expenses_fts)
+                               VALUES ('rebuild');""")
+                self.logger.info("Full-text search index built.")
+            self.conn.commit()
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"Full-text search unavailable: {e}")
+            self.conn.rollback()
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error: {e}")
+            self.conn.rollback()
+
+    def create_monthly_totals(self) -> None:
+        """Creates the 'monthly_category_totals' aggregate table, keyed by
+        category lookup ID (0 for none), and the triggers that keep it up
+        to date, populating it if new."""
+        new_key = """CAST(substr(new.date, 1, 4) AS INTEGER),
+                     CAST(substr(new.date, 6, 2) AS INTEGER),
+                     IFNULL(new.category_id, 0)"""
+        old_match = """year = CAST(substr(old.date, 1, 4) AS INTEGER)
+                       AND month = CAST(substr(old.date, 6, 2) AS INTEGER)
+                       AND category_id = IFNULL(old.category_id, 0)"""
+        add_new = f"""INSERT INTO monthly_category_totals
+                      VALUES ({new_key}, 1, IFNULL(new.subtotal, 0))
+                      ON CONFLICT (year, month, category_id) DO UPDATE SET
+                          record_count = record_count + 1,
+                          subtotal_sum = subtotal_sum
+                                         + excluded.subtotal_sum;"""
+        remove_old = f"""UPDATE monthly_category_totals SET
+                             record_count = record_count - 1,
+                             subtotal_sum = subtotal_sum
+                                            - IFNULL(old.subtotal, 0)
+                         WHERE {old_match};
+                         DELETE FROM monthly_category_totals
+                         WHERE {old_match} AND record_count <= 0;"""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""SELECT 1 FROM sqlite_master
+                           WHERE type = 'table'
+                           AND name = 'monthly_category_totals'""")
+            exists = cursor.fetchone() is not None
+
+            cursor.execute("""CREATE TABLE IF NOT EXISTS
+                           monthly_category_totals (
+                               year INTEGER NOT NULL,
+                               month INTEGER NOT NULL,
+                               category_id INTEGER NOT NULL,
+                               record_count INTEGER NOT NULL,
+                               subtotal_sum FLOAT NOT NULL,
+                               PRIMARY KEY (year, month, category_id)
+                           ) WITHOUT ROWID;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS
+                           monthly_category_totals_ai
+                           AFTER INSERT ON expense_records
+                           WHEN new.date IS NOT NULL BEGIN
+                               {add_new}
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS
+                           monthly_category_totals_ad
+                           AFTER DELETE ON expense_records
+                           WHEN old.date IS NOT NULL BEGIN
+                               {remove_old}
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS
+                           monthly_category_totals_au_old
+                           AFTER UPDATE OF date, category_id, subtotal
+                           ON expense_records
+                           WHEN old.date IS NOT NULL BEGIN
+                               {remove_old}
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS
+                           monthly_category_totals_au_new
+                           AFTER UPDATE OF date, category_id, subtotal
+                           ON expense_records
+                           WHEN new.date IS NOT NULL BEGIN
+                               {add_new}
+                           END;""")
+            if not exists:
+                self.rebuild_monthly_totals(cursor)
+            self.conn.commit()
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error: {e}")
+            self.conn.rollback()
+
+    def create_daily_rollups(self) -> None:
+        """Creates the 'daily_rollups' table, holding the record count and
+        subtotal sum per day and lookup ID (0 for none) of each rollup
+        dimension, and the triggers that keep it up to date, populating it
+        if new."""
+        def add_new(dimension):
+            return f"""INSERT INTO daily_rollups
+                       VALUES (new.date, '{dimension}',
+                               IFNULL(new.{dimension}_id, 0), 1,
+                               IFNULL(new.subtotal, 0))
+                       ON CONFLICT (day, dimension, value_id) DO UPDATE SET
+                           record_count = record_count + 1,
+                           subtotal_sum = subtotal_sum
+                                          + excluded.subtotal_sum;"""
+
+        def remove_old(dimension):
+            old_match = f"""day = old.date AND dimension = '{dimension}'
+                            AND value_id = IFNULL(old.{dimension}_id, 0)"""
+            return f"""UPDATE daily_rollups SET
+                           record_count = record_count - 1,
+                           subtotal_sum = subtotal_sum
+                                          - IFNULL(old.subtotal, 0)
+                       WHERE {old_match};
+                       DELETE FROM daily_rollups
+                       WHERE {old_match} AND record_count <= 0;"""
+
+        add_all = ''.join(add_new(d) for d in self.rollup_dimensions)
+        remove_all = ''.join(remove_old(d) for d in self.rollup_dimensions)
+        columns = ', '.join(['date', 'subtotal']
+                            + [f"{d}_id" for d in self.rollup_dimensions])
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""SELECT 1 FROM sqlite_master
+                           WHERE type = 'table'
+                           AND name = 'daily_rollups'""")
+            exists = cursor.fetchone() is not None
+
+            cursor.execute("""CREATE TABLE IF NOT EXISTS daily_rollups (
+                               day TEXT NOT NULL,
+                               dimension TEXT NOT NULL,
+                               value_id INTEGER NOT NULL,
+                               record_count INTEGER NOT NULL,
+                               subtotal_sum FLOAT NOT NULL,
+                               PRIMARY KEY (dimension, day, value_id)
+                           ) WITHOUT ROWID;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS daily_rollups_ai
+                           AFTER INSERT ON expense_records
+                           WHEN new.date IS NOT NULL BEGIN
+                               {add_all}
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS daily_rollups_ad
+                           AFTER DELETE ON expense_records
+                           WHEN old.date IS NOT NULL BEGIN
+                               {remove_all}
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS
+                           daily_rollups_au_old
+                           AFTER UPDATE OF {columns} ON expense_records
+                           WHEN old.date IS NOT NULL BEGIN
+                               {remove_all}
+                           END;""")
+            cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS
+                           daily_rollups_au_new
+                           AFTER UPDATE OF {columns} ON expense_records
+                           WHEN new.date IS NOT NULL BEGIN
+                               {add_all}
+                           END;""")
+            if not exists:
+                self.rebuild_daily_rollups(cursor)
+            self.conn.commit()
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error: {e}")
+            self.conn.rollback()
+
+    def rebuild_daily_rollups(self, cursor: sqlite3.Cursor) -> None:
+        """Recomputes 'daily_rollups' from the 'expense_records' table."""
+        cursor.execute("DELETE FROM daily_rollups;")
+        for dimension in self.rollup_dimensions:
+            cursor.execute(f"""INSERT INTO daily_rollups
+                           SELECT date,
+                                  '{dimension}',
+                                  IFNULL({dimension}_id, 0),
+                                  COUNT(*),
+                                  IFNULL(SUM(subtotal), 0)
+                           FROM expense_records
+                           WHERE date IS NOT NULL
+                           GROUP BY 1, 3;""")
+        self.logger.info("Daily rollups rebuilt.")
+
+    def rebuild_monthly_totals(self, cursor: sqlite3.Cursor) -> None:
+        """Recomputes 'monthly_category_totals'
+        from the 'expense_records' table."""
+        cursor.execute("DELETE FROM monthly_category_totals;")
+        cursor.execute("""INSERT INTO monthly_category_totals
+                       SELECT CAST(substr(date, 1, 4) AS INTEGER),
+                              CAST(substr(date, 6, 2) AS INTEGER),
+                              IFNULL(category_id, 0),
+                              COUNT(*),
+                              IFNULL(SUM(subtotal), 0)
+                       FROM expense_records
+                       WHERE date IS NOT NULL
+                       GROUP BY 1, 2, 3;""")
+        self.logger.info("Monthly category totals rebuilt.")
 
     def add_to_db(self, values: dict) -> int:
         """Inserts a new expense record into the database
@@ -60,19 +742,6 @@ class Model:
                 return -1
 
             cursor = self.conn.cursor()
-            query = """INSERT INTO expenses (
-                    product_service,
-                    quantity,
-                    amount,
-                    responsible,
-                    subtotal,
-                    category,
-                    supplier,
-                    payment_method,
-                    date,
-                    due_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);"""
-
             subtotal = round(values['quantity'] * values['amount'], 2)
             data = (values['product'],
                     values['quantity'],
@@ -85,8 +754,10 @@ class Model:
                     values['date'],
                     values['due_date'])
 
-            cursor.execute(query, data)
-            self.conn.commit()
+            self.add_lookup_values(cursor, self.export_columns[1:], [data])
+            cursor.execute(self.insert_query, data)
+            self.update_analytics()
+            self.commit()
             last_id = cursor.lastrowid
             return last_id
 
@@ -95,22 +766,13 @@ class Model:
             return -1
         except sqlite3.DatabaseError as e:
             self.logger.error(f"Database error: {e}")
-            self.conn.rollback()
+            self.rollback()
             return -1
 
     def validate_expense_data(self, values: dict) -> bool:
         """Validates the provided expense data
         against required fields and types."""
-        required_fields = ['product',
-                           'quantity',
-                           'amount',
-                           'responsible',
-                           'category',
-                           'supplier',
-                           'payment_method',
-                           'date',
-                           'due_date']
-        for field in required_fields:
+        for field in self.expense_fields:
             if field not in values or values[field] is None:
                 self.logger.error(f"Missing required field: {field}")
                 raise ValueError(f"Missing required field: {field}")
@@ -124,6 +786,90 @@ class Model:
 
         return True
 
+    def add_many_to_db(self, rows: List[Tuple]) -> int:
+        """Inserts validated rows (as returned by `validate_expense_batch`)
+        in a single transaction and returns the number inserted."""
+        if not rows:
+            return 0
+
+        try:
+            cursor = self.conn.cursor()
+            self.add_lookup_values(cursor, self.export_columns[1:], rows)
+            cursor.executemany(self.insert_query, rows)
+            self.update_analytics()
+            self.commit()
+            return len(rows)
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in add_many_to_db: {e}")
+            self.rollback()
+            return 0
+
+    def restore_records(self, rows: List[Tuple]) -> int:
+        """Inserts complete rows, IDs included, such as rows removed by
+        a delete that is being undone, and returns the number inserted."""
+        if not rows:
+            return 0
+
+        query = self.build_insert_query(self.export_columns)
+        try:
+            cursor = self.conn.cursor()
+            self.add_lookup_values(cursor, self.export_columns, rows)
+            cursor.executemany(query, rows)
+            self.update_analytics([row[0] for row in rows])
+            self.commit()
+            return len(rows)
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in restore_records: {e}")
+            self.rollback()
+            return 0
+
+    def validate_expense_batch(
+        self, records: List[Tuple[int, Optional[dict]]]
+    ) -> Tuple[List[Tuple], List[Tuple[int, str]]]:
+        """Validates and converts (line number, values) pairs, returning
+        the rows ready for `add_many_to_db`, with their subtotals, and the
+        rejected line numbers with the reason. An empty due date is stored
+        as 'N/A', as in the entry form."""
+        rows = []
+        rejected = []
+        for line_number, values in records:
+            if not isinstance(values, dict):
+                rejected.append((line_number, "Malformed record"))
+                continue
+
+            values.setdefault('product', values.get('product_service'))
+            values['due_date'] = values.get('due_date') or 'N/A'
+            missing = [field for field in self.expense_fields
+                       if values.get(field) in (None, '')]
+            if missing:
+                rejected.append(
+                    (line_number, f"Missing required field: {missing[0]}")
+                )
+                continue
+
+            try:
+                quantity = values['quantity']
+                if isinstance(quantity, float) and not quantity.is_integer():
+                    raise ValueError(f"non-integer quantity: {quantity}")
+                quantity = int(quantity)
+                amount = float(values['amount'])
+                date = datetime.date.fromisoformat(values['date'])
+            except (TypeError, ValueError) as e:
+                rejected.append((line_number, f"Invalid value: {e}"))
+                continue
+
+            rows.append((values['product'],
+                         quantity,
+                         amount,
+                         values['responsible'],
+                         round(quantity * amount, 2),
+                         values['category'],
+                         values['supplier'],
+                         values['payment_method'],
+                         date.isoformat(),
+                         values['due_date']))
+        return rows, rejected
+
     def delete_from_db(self, record_id: int) -> bool:
         """Deletes a record from the 'expenses' table
         based on the given record ID."""
@@ -133,19 +879,23 @@ class Model:
 
             cursor = self.conn.cursor()
 
-            select_query = "SELECT * FROM expenses WHERE id = ?;"
-            cursor.execute(select_query, (record_id,))
-            record = cursor.fetchone()
+            if self.logger.isEnabledFor(logging.DEBUG):
+                # The record is only read when it is going to be logged
+                select_query = "SELECT * FROM expenses WHERE id = ?;"
+                cursor.execute(select_query, (record_id,))
+                record = cursor.fetchone()
+                if record is not None:
+                    self.logger.debug("Deleting record with ID %s: %s",
+                                      record_id, record)
 
-            if record is None:
-                self.logger.warning(f"No record found with ID: {record_id}")
+            delete_query = "DELETE FROM expense_records WHERE id = ?;"
+            cursor.execute(delete_query, (record_id,))
+            if cursor.rowcount == 0:
+                self.logger.warning("No record found with ID: %s", record_id)
                 return False
 
-            self.logger.debug(f"Deleting record with ID {record_id}: {record}")
-
-            delete_query = "DELETE FROM expenses WHERE id = ?;"
-            cursor.execute(delete_query, (record_id,))
-            self.conn.commit()
+            self.update_analytics([record_id])
+            self.commit()
 
             return True
 
@@ -154,34 +904,40 @@ class Model:
             return False
         except sqlite3.DatabaseError as e:
             self.logger.error(f"Database error: {e}")
-            self.conn.rollback()
+            self.rollback()
             return False
 
-    def update_db(self, record_id: int, values: dict) -> None:
+    def update_db(self, record_id: int, values: dict) -> bool:
         """Updates an existing expense record
         in the database with the provided values."""
         try:
             if not self.validate_update_data(record_id, values):
-                return
+                return False
 
             cursor = self.conn.cursor()
 
             values['subtotal'] = round(
                 values['quantity'] * values['amount'], 2
             )
-            set_clause = ', '.join([f"{key} = ?" for key in values])
-            query = f"UPDATE expenses SET {set_clause} WHERE id = ?;"
+            columns = tuple(values)
+            set_clause = ', '.join('{} = {}'.format(*self.encoded_value(key))
+                                   for key in columns)
+            query = f"UPDATE expense_records SET {set_clause} WHERE id = ?;"
             data = tuple(values.values()) + (record_id,)
+            self.add_lookup_values(cursor, columns, [data])
 
             cursor.execute(query, data)
-            self.conn.commit()
+            self.update_analytics([record_id])
+            self.commit()
+            return True
 
         except ValueError as e:
             self.logger.error(f"Input validation error: {e}")
-            self.conn.rollback()
+            return False
         except sqlite3.DatabaseError as e:
             self.logger.error(f"Database error: {e}")
-            self.conn.rollback()
+            self.rollback()
+            return False
 
     def validate_update_data(self, record_id: int, values: dict) -> bool:
         """Validates the record ID and
@@ -206,47 +962,422 @@ class Model:
 
         return True
 
-    def query_db(self, month: Optional[int] = None) -> List[Tuple]:
-        """Queries and returns records from the 'expenses' table,
-        optionally filtering by the specified month."""
+    def select_ids(self, cursor: sqlite3.Cursor,
+                   record_ids: List[int]) -> Tuple[str, list]:
+        """Returns an `id IN (...)` condition selecting the given IDs.
+        Sets larger than `max_inline_ids` are loaded into a temp table
+        within the caller's transaction rather than bound as parameters."""
+        if len(record_ids) <= self.max_inline_ids:
+            placeholders = ', '.join('?' * len(record_ids))
+            return f"id IN ({placeholders})", list(record_ids)
+
+        cursor.execute("""CREATE TEMP TABLE IF NOT EXISTS selected_ids (
+                       id INTEGER PRIMARY KEY);""")
+        cursor.execute("DELETE FROM temp.selected_ids;")
+        cursor.executemany("INSERT OR IGNORE INTO temp.selected_ids "
+                           "VALUES (?);",
+                           ((record_id,) for record_id in record_ids))
+        return "id IN (SELECT id FROM temp.selected_ids)", []
+
+    def validate_record_ids(self, record_ids: List[int]) -> None:
+        """Raises ValueError unless every ID is a positive integer."""
+        if not record_ids:
+            raise ValueError("No records selected.")
+        for record_id in record_ids:
+            if not isinstance(record_id, int) or record_id <= 0:
+                raise ValueError(f"Invalid record ID: {record_id!r}")
+
+    def delete_many_from_db(self, record_ids: List[int]) -> int:
+        """Deletes the records with the given IDs with one statement in
+        one transaction and returns the number of records deleted."""
         try:
+            self.validate_record_ids(record_ids)
+
             cursor = self.conn.cursor()
-            base_query = "SELECT * FROM expenses"
+            condition, params = self.select_ids(cursor, record_ids)
+            cursor.execute(f"DELETE FROM expense_records WHERE {condition};",
+                           params)
+            deleted = cursor.rowcount
+            self.update_analytics(record_ids)
+            self.commit()
+            self.logger.info("Deleted %d records.", deleted)
+            return deleted
+
+        except ValueError as e:
+            self.logger.error(f"Input validation error: {e}")
+            return 0
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error: {e}")
+            self.rollback()
+            return 0
+
+    def update_many_db(self, record_ids: List[int], field: str,
+                       value: str) -> int:
+        """Sets one field of the records with the given IDs with one
+        statement in one transaction and returns the number of records
+        updated. Only the `bulk_edit_fields` can be set this way."""
+        try:
+            self.validate_record_ids(record_ids)
+            if field not in self.bulk_edit_fields:
+                raise ValueError(f"Field cannot be edited in bulk: {field}")
+            if field == 'date':
+                value = datetime.date.fromisoformat(value).isoformat()
+
+            cursor = self.conn.cursor()
+            condition, params = self.select_ids(cursor, record_ids)
+            self.add_lookup_values(cursor, (field,), [(value,)])
+            cursor.execute(
+                "UPDATE expense_records SET {} = {} WHERE {};".format(
+                    *self.encoded_value(field), condition
+                ),
+                [value] + params
+            )
+            updated = cursor.rowcount
+            self.update_analytics(record_ids)
+            self.commit()
+            self.logger.info("Set %s of %d records.", field, updated)
+            return updated
+
+        except (TypeError, ValueError) as e:
+            self.logger.error(f"Input validation error: {e}")
+            return 0
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error: {e}")
+            self.rollback()
+            return 0
+
+    def query_db(self,
+                 month: Optional[int] = None,
+                 year: Optional[int] = None,
+                 columns: Optional[Tuple[str, ...]] = None) -> List[Tuple]:
+        """Queries and returns records from the 'expenses' table,
+        optionally filtering by the specified month and year.
+        A month without a year refers to the current year.
+        Only the given columns are fetched, all of them by default."""
+        columns = projection(columns)
+        try:
+            base_query = f"SELECT {', '.join(columns)} FROM expenses"
             params = []
 
-            if month is not None:
-                if 1 <= month <= 12:
-                    base_query += " WHERE strftime('%m', date) = ?"
-                    params.append(f"{month:02d}")
-                else:
+            if month is not None or year is not None:
+                if month is not None and not 1 <= month <= 12:
                     self.logger.error("Invalid month number.")
                     return []
+                if year is not None and not 1 <= year <= 9998:
+                    self.logger.error("Invalid year number.")
+                    return []
 
-            cursor.execute(base_query, params)
-            rows = cursor.fetchall()
-            return rows
+                base_query = self.date_range_query.format(
+                    columns=', '.join(columns)
+                )
+                params.extend(get_date_range(year or get_current_year(),
+                                             month))
+
+            return self.fetch_cached(base_query, params, columns)
         except sqlite3.DatabaseError as e:
             self.logger.error(f"Database error: {e}")
             return []
 
-    def get_graph_data(self, get_current_month: int) -> List[Tuple]:
+    def build_filter(self,
+                     month: Optional[int] = None,
+                     year: Optional[int] = None,
+                     category: Optional[str] = None) -> Tuple[str, list]:
+        """Returns the WHERE clause and parameters for the given month, year
+        and category filters. A month without a year refers to the current
+        year."""
+        if month is not None and not 1 <= month <= 12:
+            raise ValueError("Invalid month number.")
+        if year is not None and not 1 <= year <= 9998:
+            raise ValueError("Invalid year number.")
+
+        conditions = []
+        params = []
+        if month is not None or year is not None:
+            conditions.append("date >= ? AND date < ?")
+            params.extend(get_date_range(year or get_current_year(), month))
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+
+        if not conditions:
+            return "", params
+        return f" WHERE {' AND '.join(conditions)}", params
+
+    def iter_records(self,
+                     month: Optional[int] = None,
+                     year: Optional[int] = None,
+                     category: Optional[str] = None,
+                     batch_size: int = 1000,
+                     conn: Optional[sqlite3.Connection] = None,
+                     columns: Optional[Tuple[str, ...]] = None
+                     ) -> Iterator[Tuple]:
+        """Yields the given columns (all by default) of the filtered records
+        ordered by ID, fetching them in batches so the result set is never
+        held in memory. A separate connection can be given to read from
+        another thread."""
+        columns = projection(columns)
+        where_clause, params = self.build_filter(month, year, category)
+        cursor = (conn or self.conn).cursor()
+        cursor.row_factory = row_factory(columns)
+        try:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM expenses"
+                           f"{where_clause} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def query_page(self,
+                   after_id: Optional[int] = None,
+                   before_id: Optional[int] = None,
+                   limit: int = 100,
+                   columns: Optional[Tuple[str, ...]] = None) -> List[Tuple]:
+        """Returns the given columns (all by default) of one
+        keyset-paginated page of records ordered by ID, either after
+        `after_id` or, walking backwards, before `before_id`."""
+        columns = projection(columns)
+        try:
+            if not isinstance(limit, int) or limit <= 0:
+                self.logger.error(f"Invalid page size: {limit}")
+                return []
+
+            cursor = self.conn.cursor()
+            cursor.row_factory = row_factory(columns)
+            if before_id is not None:
+                query = f"""SELECT {', '.join(columns)} FROM expenses
+                        WHERE id < ?
+                        ORDER BY id DESC
+                        LIMIT ?"""
+                cursor.execute(query, (before_id, limit))
+                return cursor.fetchall()[::-1]
+
+            query = f"""SELECT {', '.join(columns)} FROM expenses
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?"""
+            cursor.execute(query, (after_id if after_id is not None else 0,
+                                   limit))
+            return cursor.fetchall()
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in query_page: {e}")
+            return []
+
+    def query_sorted_page(self,
+                          sort_column: str = 'id',
+                          descending: bool = False,
+                          after: Optional[Tuple] = None,
+                          before: Optional[Tuple] = None,
+                          limit: int = 100,
+                          columns: Optional[Tuple[str, ...]] = None
+                          ) -> List[Tuple]:
+        """Returns one keyset-paginated page of records ordered by
+        `sort_column` and then ID, ascending or descending, either after
+        the (sort value, ID) key `after` or, walking backwards, before
+        `before`; the first page without either. NULL values sort first.
+
+        The page is read with up to three index range searches: the
+        rows sharing the key's value beyond its ID, the rows with values
+        beyond it, and the NULL rows, so no page ever needs a sort."""
+        columns = projection(columns)
+        if sort_column not in self.export_columns:
+            raise ValueError(f"Invalid sort column: {sort_column}")
+        if not isinstance(limit, int) or limit <= 0:
+            self.logger.error(f"Invalid page size: {limit}")
+            return []
+
+        backwards = before is not None
+        key = before if backwards else after
+        ascending = descending == backwards  # Direction of the index walk
+        operator, direction = ('>', 'ASC') if ascending else ('<', 'DESC')
+        by_id = f"id {direction}"
+        by_value = f"{sort_column} {direction}, id {direction}"
+        is_null, is_not_null = self.null_conditions(sort_column)
+        null_rows = (is_null, (), by_id)
+        value_rows = (is_not_null, (), by_value)
+        if key is None:
+            parts = ([null_rows, value_rows] if ascending
+                     else [value_rows, null_rows])
+        elif key[0] is None:
+            parts = [(f"{is_null} AND id {operator} ?", (key[1],), by_id)]
+            if ascending:
+                parts.append(value_rows)
+        else:
+            parts = [(f"{sort_column} = ? AND id {operator} ?", tuple(key),
+                      by_id),
+                     (f"{sort_column} {operator} ?", (key[0],), by_value)]
+            if not ascending:
+                parts.append(null_rows)
+
+        try:
+            cursor = self.conn.cursor()
+            cursor.row_factory = row_factory(columns)
+            rows = []
+            for condition, params, order in parts:
+                cursor.execute(f"""SELECT {', '.join(columns)} FROM expenses
+                               WHERE {condition}
+                               ORDER BY {order}
+                               LIMIT ?""", params + (limit - len(rows),))
+                rows.extend(cursor.fetchall())
+                if len(rows) >= limit:
+                    break
+            return rows[::-1] if backwards else rows
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in query_sorted_page: {e}")
+            return []
+
+    def get_graph_data(self,
+                       get_current_month: int,
+                       year: Optional[int] = None) -> List[Tuple]:
         """Retrieves and returns data for graph generation
-        based on categories and their subtotals for the current month."""
+        based on categories and their subtotals for the given month
+        of the given year (the current year by default), ordered by
+        category, as read from the column store."""
         try:
             if (not isinstance(get_current_month, int) or
                     not 1 <= get_current_month <= 12):
                 self.logger.error(f"Invalid month number: {get_current_month}")
                 return []
 
+            return [(category, total) for category, count, total
+                    in self.get_category_totals(get_current_month, year)]
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in get_graph_data: {e}")
+            return []
+
+    def get_category_totals(self, month: int, year: Optional[int] = None
+                            ) -> List[Tuple]:
+        """Returns (category, record count, subtotal sum) rows for the
+        given month of the given year (the current year by default),
+        ordered by category, as read from the column store."""
+        try:
+            if not isinstance(month, int) or not 1 <= month <= 12:
+                self.logger.error(f"Invalid month number: {month}")
+                return []
+
+            start, end = get_date_range(year or get_current_year(), month)
+            with self.analytics_lock:
+                return self.get_analytics().group_by('category', start, end)
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in get_category_totals: {e}")
+            return []
+
+    def get_trend(self, start: str, end: str, unit: str = 'month',
+                  dimension: str = 'category') -> List[Tuple]:
+        """Returns (bucket start, value, subtotal sum) rows per day, week
+        (starting on Monday) or month within the half-open date range
+        [start, end), per category or responsible, read from the daily
+        rollups, grouped by lookup ID and ordered by bucket."""
+        try:
+            if unit not in self.trend_buckets:
+                raise ValueError(f"Invalid trend unit: {unit}")
+            if dimension not in self.rollup_dimensions:
+                raise ValueError(f"Invalid trend dimension: {dimension}")
+
+            bucket = self.trend_buckets[unit]
+            query = f"""SELECT bucket, IFNULL(name, '') AS value, total
+                     FROM (SELECT {bucket} AS bucket,
+                                  value_id,
+                                  SUM(subtotal_sum) AS total
+                           FROM daily_rollups
+                           WHERE dimension = ? AND day >= ? AND day < ?
+                           GROUP BY bucket, value_id)
+                     LEFT JOIN {self.lookup_tables[dimension]}
+                     ON id = value_id
+                     ORDER BY bucket, value"""
+            return self.fetch_cached(query, (dimension, start, end))
+        except ValueError as e:
+            self.logger.error(f"Input validation error: {e}")
+            return []
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in get_trend: {e}")
+            return []
+
+    def get_month_total(self, month: int, year: Optional[int] = None
+                        ) -> float:
+        """Returns the sum of subtotals for the given month
+        of the given year (the current year by default),
+        as read from the column store."""
+        try:
+            if not isinstance(month, int) or not 1 <= month <= 12:
+                self.logger.error(f"Invalid month number: {month}")
+                return 0.0
+
+            start, end = get_date_range(year or get_current_year(), month)
+            with self.analytics_lock:
+                return self.get_analytics().total(start, end)
+        except sqlite3.DatabaseError as e:
+            self.logger.error(f"Database error in get_month_total: {e}")
+            return 0.0
+
+    def search(self, search_term: str, limit: Optional[int] = None,
+               cancelled: Optional[Callable[[], bool]] = None) -> List[int]:
+        """Returns the IDs of records matching every word of the search term,
+        best matches first, using the full-text index when available.
+        The query is abandoned as soon as `cancelled` returns True."""
+        words = re.findall(r'\w+', search_term)
+        if not words:
+            return []
+
+        if cancelled is not None:
+            self.conn.set_progress_handler(cancelled, 10000)
+        try:
             cursor = self.conn.cursor()
-            query = """SELECT category, SUM(subtotal)
-                    FROM expenses
-                    WHERE strftime('%m', date) = ?
-                    GROUP BY category"""
+            if self.fts_enabled:
+                match = ' '.join(f'"{word}"*' for word in words)
+                query = """SELECT rowid FROM expenses_fts
+                        WHERE expenses_fts MATCH ?
+                        ORDER BY rank
+                        LIMIT ?"""
+                cursor.execute(query, (match, -1 if limit is None else limit))
+            else:
+                document = " || ' ' || ".join(
+                    f"IFNULL({c}, '')" for c in self.search_columns
+                )
+                conditions = ' AND '.join(
+                    f"({document}) LIKE ?" for _ in words
+                )
+                query = f"""SELECT id FROM expenses
+                        WHERE {conditions}
+                        ORDER BY id
+                        LIMIT ?"""
+                cursor.execute(query, [f"%{word}%" for word in words]
+                               + [-1 if limit is None else limit])
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.DatabaseError as e:
+            if cancelled is not None and cancelled():
+                self.logger.debug("Search cancelled: %s", search_term)
+            else:
+                self.logger.error(f"Database error in search: {e}")
+            return []
+        finally:
+            if cancelled is not None:
+                self.conn.set_progress_handler(None, 0)
 
-            cursor.execute(query, (f"{get_current_month:02d}",))
-            data = cursor.fetchall()
-            return data
+    def query_by_ids(self, record_ids: List[int],
+                     columns: Optional[Tuple[str, ...]] = None
+                     ) -> List[Tuple]:
+        """Returns the given columns (all by default) of the records with
+        the given IDs, in the same order."""
+        columns = projection(columns)
+        make_row = row_factory(columns)
+        try:
+            cursor = self.conn.cursor()
+            rows_by_id = {}
+            chunk_size = 500  # Stay below SQLite's bound parameter limit
+            for start in range(0, len(record_ids), chunk_size):
+                chunk = record_ids[start:start + chunk_size]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(
+                    f"SELECT id, {', '.join(columns)} FROM expenses "
+                    f"WHERE id IN ({placeholders})",
+                    chunk
+                )
+                rows_by_id.update((row[0], make_row(cursor, row[1:]))
+                                  for row in cursor.fetchall())
+            return [rows_by_id[i] for i in record_ids if i in rows_by_id]
         except sqlite3.DatabaseError as e:
-            self.logger.error(f"Database error in get_graph_data: {e}")
+            self.logger.error(f"Database error in query_by_ids: {e}")
             return []
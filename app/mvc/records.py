@@ -0,0 +1,51 @@
+from collections import namedtuple
+from functools import lru_cache
+from typing import Callable, Optional, Sequence, Tuple
+
+EXPENSE_COLUMNS = ('id',
+                   'product_service',
+                   'quantity',
+                   'amount',
+                   'responsible',
+                   'subtotal',
+                   'category',
+                   'supplier',
+                   'payment_method',
+                   'date',
+                   'due_date')  # Column order of 'expenses' rows
+
+
+@lru_cache(maxsize=None)
+def row_type(columns: Tuple[str, ...] = EXPENSE_COLUMNS) -> type:
+    """Returns the named tuple type of rows holding the given columns of
+    'expenses', one type per projection. Named tuples have no per-row
+    dictionary, so a row costs no more than a plain tuple, and remain
+    tuples for code indexing or slicing them."""
+    unknown = [column for column in columns if column not in EXPENSE_COLUMNS]
+    if unknown or not columns or len(set(columns)) != len(columns):
+        raise ValueError(f"Invalid columns: {', '.join(columns)}")
+    name = 'Expense' if columns == EXPENSE_COLUMNS else 'ExpenseProjection'
+    return namedtuple(name, columns)
+
+
+Expense = row_type()  # A full 'expenses' row
+
+
+def projection(columns: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """Returns the validated column tuple of a projection, all columns
+    by default."""
+    columns = EXPENSE_COLUMNS if columns is None else tuple(columns)
+    row_type(columns)
+    return columns
+
+
+@lru_cache(maxsize=None)
+def row_factory(columns: Tuple[str, ...] = EXPENSE_COLUMNS) -> Callable:
+    """Returns an sqlite3 row factory building rows of the projection."""
+    cls = row_type(columns)
+    new = tuple.__new__
+
+    def factory(cursor, row):
+        return new(cls, row)
+
+    return factory
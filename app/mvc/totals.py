@@ -0,0 +1,104 @@
+import logging
+import time
+
+from typing import List, Optional, Tuple
+
+from utils.methods import get_current_month, get_current_year
+
+
+class RunningTotals:
+    """In-memory totals of the current month, overall and per category.
+    Seeded from the aggregate table, then kept up to date by applying the
+    change made by each write as a delta, and reconciled against the
+    database every `reconcile_every` edits or `reconcile_seconds`."""
+    reconcile_every = 50  # Edits applied before the next reconcile is due
+
+    reconcile_seconds = 300  # Seconds before the next reconcile is due
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.year = None
+        self.month = None
+        self.categories = {}  # Category -> [record count, subtotal sum]
+        self.total = 0.0
+        self.seeded = False
+        self.seeded_at = 0.0
+        self.edits = 0
+        self.revision = 0
+
+    def seed(self, year: int, month: int, rows: List[Tuple],
+             revision: int) -> bool:
+        """Replaces the state with (category, record count, subtotal sum)
+        rows read from the database. Returns False, keeping the current
+        state, if a delta was applied since `revision` was taken."""
+        if revision != self.revision:
+            return False
+
+        categories = {category: [count, subtotal]
+                      for category, count, subtotal in rows}
+        total = sum(subtotal for _, subtotal in categories.values())
+        if (self.seeded and (year, month) == (self.year, self.month)
+                and abs(total - self.total) >= 0.005):
+            self.logger.warning(f"Running total drifted by "
+                                f"{self.total - total:.2f}, reconciled")
+
+        self.year = year
+        self.month = month
+        self.categories = categories
+        self.total = total
+        self.seeded = True
+        self.seeded_at = time.monotonic()
+        self.edits = 0
+        return True
+
+    def invalidate(self) -> None:
+        """Forces a reconcile, e.g. after a bulk import."""
+        self.seeded = False
+        self.revision += 1
+
+    def needs_reconcile(self) -> bool:
+        """Returns True if the state must be (re)read from the database."""
+        return (not self.seeded
+                or (self.year, self.month) != (get_current_year(),
+                                               get_current_month())
+                or self.edits >= self.reconcile_every
+                or time.monotonic() - self.seeded_at >= self.reconcile_seconds)
+
+    def apply(self, old: Optional[Tuple], new: Optional[Tuple]) -> None:
+        """Applies one write, given the (date, category, subtotal) of the
+        record before and after it; None for an insert's old or a delete's
+        new record."""
+        self.revision += 1
+        if not self.seeded:
+            return
+
+        self.edits += 1
+        if old is not None:
+            self.add(*old, sign=-1)
+        if new is not None:
+            self.add(*new, sign=1)
+
+    def add(self, date: Optional[str], category: Optional[str],
+            subtotal: Optional[float], sign: int) -> None:
+        """Adds or removes one record, if it belongs to the tracked month.
+        Like the aggregate table's triggers, records without a date are
+        skipped and a missing subtotal counts as zero."""
+        if date is None or date[:7] != f"{self.year:04d}-{self.month:02d}":
+            return
+
+        subtotal = subtotal or 0.0
+        entry = self.categories.setdefault(category or '', [0, 0.0])
+        entry[0] += sign
+        entry[1] += sign * subtotal
+        self.total += sign * subtotal
+        if entry[0] <= 0:
+            del self.categories[category or '']
+
+    def graph_data(self) -> List[Tuple]:
+        """Returns (category, total) rows like `Model.get_graph_data`."""
+        return [(category, round(subtotal, 2))
+                for category, (_, subtotal) in sorted(self.categories.items())]
+
+    def month_total(self) -> float:
+        """Returns the total of the tracked month."""
+        return round(self.total, 2)
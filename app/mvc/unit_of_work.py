@@ -0,0 +1,261 @@
+import logging
+
+from typing import List, Optional, Tuple
+
+from .records import Expense
+
+
+class Change:
+    """One undoable operation. Each direction holds the model calls that
+    perform it and the rows it replaces (`before`) and writes (`after`),
+    so the UI and totals can be patched without rereading the table."""
+
+    def __init__(self, description: str, forward: dict, backward: dict):
+        self.description = description
+        self.forward = forward  # {'calls': [...], 'before': [...], ...}
+        self.backward = backward
+
+
+def step(calls: list, before: list, after: list) -> dict:
+    """Returns one direction of a change."""
+    return {'calls': calls, 'before': before, 'after': after}
+
+
+class UnitOfWork:
+    """Groups model writes into transactions and keeps an undo log.
+    Writes are committed together every `batch_size` operations (group
+    commit) or, in batch-edit mode, only on `save`; otherwise each is
+    committed by the model as before. Every operation is logged with its
+    inverse, so adds, modifications and deletes can be undone and redone.
+    All methods must run on the writer thread."""
+    undo_limit = 100  # Operations kept in the undo log
+
+    def __init__(self, model, batch_size: int = 1):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.batch_size = batch_size
+        self.batch_mode = False
+        self.defer_commits()
+        self.undo_stack = []
+        self.redo_stack = []
+        self.pending = 0  # Operations applied but not yet committed
+        self.rollback_count = model.rollback_count
+        self.rolled_back = False
+
+    @staticmethod
+    def row_values(row: Expense) -> dict:
+        """Returns the `Model.update_db` values of a full row."""
+        values = row._asdict()
+        del values['id'], values['subtotal']
+        return values
+
+    def add(self, values: dict) -> int:
+        """Adds a record and returns its ID, or -1 on failure."""
+        last_id = self.model.add_to_db(values)
+        if self.check_rollback() or last_id == -1:
+            return -1
+
+        row = Expense(last_id,
+                      values['product'],
+                      values['quantity'],
+                      values['amount'],
+                      values['responsible'],
+                      round(values['quantity'] * values['amount'], 2),
+                      values['category'],
+                      values['supplier'],
+                      values['payment_method'],
+                      values['date'],
+                      values['due_date'])
+        self.record(Change(
+            f"add record {last_id}",
+            step([('restore_records', ([row],))], [], [row]),
+            step([('delete_many_from_db', ([last_id],))], [row], [])
+        ))
+        return last_id
+
+    def delete(self, record_ids: List[int]) -> List[Expense]:
+        """Deletes the records with the given IDs and returns their rows
+        as they were, or an empty list on failure."""
+        rows = self.model.query_by_ids(list(record_ids))
+        if not rows:
+            return []
+
+        ids = [row.id for row in rows]
+        deleted = self.model.delete_many_from_db(ids)
+        if self.check_rollback() or not deleted:
+            return []
+
+        description = (f"delete record {ids[0]}" if len(ids) == 1
+                       else f"delete {len(ids)} records")
+        self.record(Change(
+            description,
+            step([('delete_many_from_db', (ids,))], rows, []),
+            step([('restore_records', (rows,))], [], rows)
+        ))
+        return rows
+
+    def modify(self, record_id: int, values: dict) -> Optional[Expense]:
+        """Replaces the values of a record and returns its row as it was,
+        or None on failure."""
+        rows = self.model.query_by_ids([record_id])
+        if not rows:
+            return None
+
+        row = rows[0]
+        updated = self.model.update_db(record_id, dict(values))
+        if self.check_rollback() or not updated:
+            return None
+
+        new_row = Expense(record_id,
+                          values['product_service'],
+                          values['quantity'],
+                          values['amount'],
+                          values['responsible'],
+                          round(values['quantity'] * values['amount'], 2),
+                          values['category'],
+                          values['supplier'],
+                          values['payment_method'],
+                          values['date'],
+                          values['due_date'])
+        self.record(Change(
+            f"modify record {record_id}",
+            step([('update_db', (record_id, dict(values)))], [row], [new_row]),
+            step([('update_db', (record_id, self.row_values(row)))],
+                 [new_row], [row])
+        ))
+        return row
+
+    def update_many(self, record_ids: List[int], field: str,
+                    value: str) -> List[Expense]:
+        """Sets one field of the records with the given IDs and returns
+        their rows as they were, or an empty list on failure."""
+        rows = self.model.query_by_ids(list(record_ids))
+        if not rows:
+            return []
+
+        ids = [row.id for row in rows]
+        updated = self.model.update_many_db(ids, field, value)
+        if self.check_rollback() or not updated:
+            return []
+
+        new_rows = [row._replace(**{field: value}) for row in rows]
+        ids_by_old_value = {}
+        for row in rows:
+            ids_by_old_value.setdefault(getattr(row, field),
+                                        []).append(row.id)
+        self.record(Change(
+            f"set {field} of {len(ids)} records",
+            step([('update_many_db', (ids, field, value))], rows, new_rows),
+            step([('update_many_db', (old_ids, field, old_value))
+                  for old_value, old_ids in ids_by_old_value.items()],
+                 new_rows, rows)
+        ))
+        return rows
+
+    def undo(self) -> Optional[Tuple[str, dict]]:
+        """Reverts the last operation, returning its description and the
+        applied direction, or None if there is nothing to undo."""
+        return self.replay(self.undo_stack, self.redo_stack, 'backward')
+
+    def redo(self) -> Optional[Tuple[str, dict]]:
+        """Reapplies the last undone operation, returning its description
+        and the applied direction, or None if there is nothing to redo."""
+        return self.replay(self.redo_stack, self.undo_stack, 'forward')
+
+    def replay(self, source: list, target: list,
+               direction: str) -> Optional[Tuple[str, dict]]:
+        """Runs one direction of the change on top of `source` and moves
+        the change to `target`. The calls stop at the first one that
+        fails, leaving both logs as they were; if it rolled back pending
+        operations, the logs are cleared and None is returned."""
+        if not source:
+            return None
+
+        change = source[-1]
+        applied = getattr(change, direction)
+        for method, args in applied['calls']:
+            result = getattr(self.model, method)(*args)
+            if self.check_rollback() and self.rolled_back:
+                return None
+            if not result or result == -1:
+                action = 'undo' if direction == 'backward' else 'redo'
+                raise Exception(f"Failed to {action} {change.description}.")
+
+        source.pop()
+        target.append(change)
+        self.pending += 1
+        self.commit_if_due()
+        return change.description, applied
+
+    def record(self, change: Change) -> None:
+        """Logs a new operation, which clears the redo log."""
+        self.undo_stack.append(change)
+        del self.undo_stack[:-self.undo_limit]
+        self.redo_stack.clear()
+        self.pending += 1
+        self.commit_if_due()
+
+    def commit_if_due(self) -> None:
+        """Commits once `batch_size` operations are pending,
+        unless in batch-edit mode."""
+        if not self.batch_mode and self.pending >= self.batch_size:
+            self.commit()
+
+    def flush(self) -> int:
+        """Commits pending operations unless in batch-edit mode, as after
+        the group commit delay or each chunk of an import."""
+        if self.batch_mode:
+            return 0
+        return self.commit()
+
+    def save(self) -> int:
+        """Commits every pending operation and returns their number."""
+        return self.commit()
+
+    def commit(self) -> int:
+        pending = self.pending
+        self.model.commit_pending()
+        self.pending = 0
+        return pending
+
+    def discard(self) -> int:
+        """Rolls back the pending operations and returns their number.
+        The undo and redo logs are cleared, as they may refer to
+        discarded operations."""
+        pending = self.pending
+        self.model.rollback()
+        self.rollback_count = self.model.rollback_count
+        self.reset()
+        return pending
+
+    def set_batch_mode(self, enabled: bool) -> int:
+        """Turns batch-edit mode on or off; turning it off commits the
+        pending operations, whose number is returned."""
+        self.batch_mode = enabled
+        saved = 0 if enabled else self.commit()
+        self.defer_commits()
+        return saved
+
+    def defer_commits(self) -> None:
+        """Makes the model leave its writes in the open transaction only
+        while they are grouped (`batch_size` > 1) or in batch-edit mode."""
+        self.model.commits_deferred = self.batch_mode or self.batch_size > 1
+
+    def check_rollback(self) -> bool:
+        """Returns True if a failed write rolled back the open transaction,
+        losing the pending operations; the logs are then cleared."""
+        if self.model.rollback_count == self.rollback_count:
+            return False
+
+        self.rollback_count = self.model.rollback_count
+        if self.pending:
+            self.logger.error(f"{self.pending} pending operations were "
+                              f"rolled back by a failed write.")
+            self.rolled_back = True
+            self.reset()
+        return True
+
+    def reset(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.pending = 0
@@ -1,12 +1,10 @@
+import bisect
+import datetime
 import logging
-import matplotlib.pyplot as plt
+import os
+import time
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-
-from PIL import Image as PilImage, ImageTk
-
-from tkinter import Tk
+from tkinter import Tk, Toplevel
 from tkinter import (BooleanVar,
                      Button,
                      Checkbutton,
@@ -14,7 +12,8 @@ from tkinter import (BooleanVar,
                      Frame,
                      IntVar,
                      Label,
-                     LabelFrame)
+                     LabelFrame,
+                     Menu)
 from tkinter import (N,
                      E,
                      S,
@@ -25,10 +24,14 @@ from tkinter import (N,
 from tkinter import (Scrollbar,
                      StringVar)
 from tkinter import ttk
+from tkinter.messagebox import askyesnocancel
 
 from tkcalendar import DateEntry
 
-from .model import Model
+from config import BASE_DIRECTORY
+from utils.downsampling import downsample
+from utils.methods import get_current_month
+from utils.tracing import span, traced
 
 
 class View:
@@ -39,10 +42,34 @@ class View:
 
     responsible_options = []  # Customizable 'Responsible' dropdown list
 
+    page_size = 100  # Rows fetched from the database per keyset page
+
+    window_pages = 3  # Pages held in the treeview at any time
+
+    scroll_margin = 0.1  # Scrollbar fraction that triggers a page fetch
+
+    sort_columns = {'#0': 'id',
+                    'col1': 'product_service',
+                    'col2': 'quantity',
+                    'col3': 'amount',
+                    'col4': 'responsible',
+                    'col5': 'subtotal',
+                    'col6': 'category',
+                    'col7': 'supplier',
+                    'col8': 'payment_method',
+                    'col9': 'date',
+                    'col10': 'due_date'}  # Treeview column -> sort column
+
+    sort_arrows = (' \u25b2', ' \u25bc')  # Ascending, descending
+
+    fast_start = True  # Show the window first, then fill in data progressively
+
+    logo_path = os.path.join(BASE_DIRECTORY, 'app', 'rsc',
+                             'tkinter_app_logo.png')
+
     def __init__(self, controller):
         self.logger = logging.getLogger(__name__)
 
-        self.model = Model()
         self.controller = controller
 
         self.root = None
@@ -69,20 +96,43 @@ class View:
         self.e_due_date = None
         self.var_check_due_date = None
         self.cb_payment_method = None
+        self.busy_indicator = None
+        self.graph_figure = None
+        self.graph_plot = None
+        self.graph_canvas = None
+        self.graph_bars = {}
+        self.graph_refresh_pending = False
+        self.graph_refresh_stale = False
+        self.graph_requested_at = None
+        self.graph_redraw_latency = None
+        self.startup_started_at = None
+        self.time_to_first_paint = None
         self.header_frame = None
         self.status_frame = None
         self.version_frame = None
         self.data_entry_frame = None
         self.confirmation_frame = None
         self.treeview_frame = None
-
-    def load_total_accumulated(self) -> float:
-        """Loads and returns the total accumulated value for the current month,
-        updating a Tkinter variable with this value."""
-        total_accumulated = self.controller.get_total_accumulated()
+        self.tree_scroll_vertical = None
+        self.paginated = False
+        self.window_at_start = True
+        self.window_at_end = True
+        self.sort_column = 'id'
+        self.sort_descending = False
+        self.heading_texts = {}
+        self.tree_generation = 0
+        self.page_request_pending = False
+
+    def load_total_accumulated(self) -> None:
+        """Requests the running total for the current month,
+        updating a Tkinter variable with this value once it is known."""
+        self.controller.request_total_accumulated(self.show_total_accumulated)
+
+    def show_total_accumulated(self, total_accumulated: float) -> None:
+        """Displays the total accumulated value for the current month."""
         self.var_total.set(f"$ {total_accumulated:.2f}")
-        return total_accumulated
 
+    @traced(category='view')
     def update_total_accumulated_label(self) -> None:
         """Updates the label to display the total for the current month."""
         current_month_str = self.controller.get_current_month_word()
@@ -101,6 +151,15 @@ class View:
         self.cb_category.set('')
         self.cb_payment_method.set('')
 
+    def set_busy(self, busy: bool) -> None:
+        """Shows or hides the busy indicator in the status bar."""
+        if busy:
+            self.busy_indicator.grid()
+            self.busy_indicator.start(10)
+        else:
+            self.busy_indicator.stop()
+            self.busy_indicator.grid_remove()
+
     def update_status_bar(self, message: str) -> None:
         """Updates the text of the status bar with the provided message."""
         self.status.config(text=message)
@@ -116,21 +175,21 @@ class View:
         """Updates the UI components
         to reflect the addition of a new record."""
         subtotal_accumulated = round(values['quantity'] * values['amount'], 2)
-        self.tree.insert('',
-                         'end',
-                         text=str(last_id),
-                         values=(values['product'],
-                                 values['quantity'],
-                                 values['amount'],
-                                 values['responsible'],
-                                 f"{subtotal_accumulated:.2f}",
-                                 values['category'],
-                                 values['supplier'],
-                                 values['payment_method'],
-                                 values['date'],
-                                 values['due_date']))
-
-        self.load_total_accumulated()
+        if self.sorted_by_id() and (not self.paginated or self.window_at_end):
+            self.tree.insert('',
+                             'end',
+                             text=str(last_id),
+                             values=(values['product'],
+                                     values['quantity'],
+                                     values['amount'],
+                                     values['responsible'],
+                                     f"{subtotal_accumulated:.2f}",
+                                     values['category'],
+                                     values['supplier'],
+                                     values['payment_method'],
+                                     values['date'],
+                                     values['due_date']))
+
         self.update_status_bar("Record added with ID: " + str(last_id))
         self.clear_form()
 
@@ -138,9 +197,105 @@ class View:
         """Updates the UI after a record deletion,
         removing it from the treeview and updating the status bar."""
         self.tree.delete(purchase_id)
-        self.load_total_accumulated()
         self.update_status_bar("Record deleted with ID: " + str(db_id))
 
+    def update_ui_after_bulk_delete(self, items: tuple, count: int) -> None:
+        """Removes the deleted records from the treeview in one call."""
+        self.tree.delete(*items)
+        self.update_status_bar(f"{count} records deleted")
+
+    def update_ui_after_bulk_edit(self, items: tuple, rows: list,
+                                  count: int) -> None:
+        """Shows the edited values of the selected records, matching
+        items to full rows by record ID."""
+        items_by_id = {self.tree.item(item, 'text'): item for item in items}
+        for row in rows:
+            item = items_by_id.get(str(row[0]))
+            if item is not None:
+                self.tree.item(item, values=row[1:])
+        self.update_status_bar(f"{count} records modified")
+
+    def apply_row_changes(self, before: list, after: list) -> None:
+        """Patches the treeview after an undo or redo: rows only in
+        `before` are removed, and rows in `after` are placed where they
+        belong in the active sort order if they fall within the loaded
+        window. Search results are searched again instead, as the rows
+        may no longer match."""
+        if not self.paginated:
+            self.controller.search()
+            return
+
+        items = {self.tree.item(item, 'text'): item
+                 for item in self.tree.get_children()}
+        after_ids = {str(row[0]) for row in after}
+        for row in before:
+            if str(row[0]) not in after_ids and str(row[0]) in items:
+                self.tree.delete(items.pop(str(row[0])))
+        if not after:
+            return
+
+        record_ids = [int(record_id) for record_id in items]
+        if self.sort_column == 'id':
+            self.place_rows(after, {record_id: record_id
+                                    for record_id in record_ids})
+            return
+
+        self.controller.request_sort_values(
+            record_ids, self.sort_column,
+            callback=self.tree_request(
+                lambda values: self.place_rows(after, values)
+            ),
+            errback=lambda e: self.logger.error(
+                f"Error placing changed rows: {e}"
+            )
+        )
+
+    def place_rows(self, rows: list, values: dict) -> None:
+        """Inserts full rows, replacing any shown items of the same
+        records, at their (sort value, ID) position among the treeview
+        rows whose sort values are given by ID. Rows beyond either end of
+        a loaded window that does not reach the end of the table are
+        left out, as they are placed when their page is loaded."""
+        row_ids = {str(row[0]) for row in rows}
+        self.tree.delete(*[item for item in self.tree.get_children()
+                           if self.tree.item(item, 'text') in row_ids])
+
+        shown = []
+        for item in self.tree.get_children():
+            record_id = int(self.tree.item(item, 'text'))
+            if record_id in values:
+                shown.append((self.sort_position(values[record_id],
+                                                 record_id), item))
+        keys = [key for key, _ in shown]
+        for row in rows:
+            key = self.sort_position(getattr(row, self.sort_column), row[0])
+            if self.sort_descending:
+                position = len(keys) - bisect.bisect(keys[::-1], key)
+            else:
+                position = bisect.bisect(keys, key)
+            if ((position == 0 and keys and not self.window_at_start)
+                    or (position == len(keys) and not self.window_at_end)):
+                continue  # Outside the loaded window
+
+            if position < len(shown):
+                index = self.tree.index(shown[position][1])
+            else:
+                index = self.tree.index(shown[-1][1]) + 1 if shown else 0
+            values_shown = (tuple(row[1:5]) + (f"{float(row[5]):.2f}",)
+                            + tuple(row[6:]))
+            item = self.tree.insert('',
+                                    index,
+                                    text=str(row[0]),
+                                    values=values_shown)
+            shown.insert(position, (key, item))
+            keys.insert(position, key)
+
+    @staticmethod
+    def sort_position(value, record_id: int) -> tuple:
+        """Returns an ascending sort key of a row: empty values first,
+        then by value and ID, as pages are read."""
+        return value is not None, value, record_id
+
     def update_ui_after_modify(
         self, purchase_id: int, new_value: dict, db_id: int
     ) -> None:
@@ -164,37 +319,249 @@ class View:
             ))
 
         self.update_status_bar("Record modified with ID: " + str(db_id))
-        self.load_total_accumulated()
 
+    @traced(category='view')
     def update_treeview(self, filtered_records):
         """Updates the treeview with the filtered records."""
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-
-        for row in filtered_records:
+        self.tree_generation += 1
+        self.page_request_pending = False
+        self.paginated = False
+        self.tree.delete(*self.tree.get_children())
+        self.insert_rows(filtered_records)
+
+    def insert_rows(self, records: list, index='end') -> int:
+        """Inserts records into the treeview from `index` on, skipping any
+        already shown (e.g. added while their page was being read), and
+        returns the number inserted."""
+        shown = {self.tree.item(item, 'text')
+                 for item in self.tree.get_children()}
+        count = 0
+        for row in records:
+            if str(row[0]) in shown:
+                continue
             self.tree.insert('',
-                             'end',
+                             index if index == 'end' else index + count,
                              text=str(row[0]),
                              values=row[1:])
-
+            count += 1
+        return count
+
+    def tree_request(self, handler):
+        """Wraps the handler of a background read of treeview rows,
+        dropping its result if the treeview was reloaded or re-sorted
+        since the read was requested."""
+        generation = self.tree_generation
+        return lambda result: (handler(result)
+                               if generation == self.tree_generation
+                               else None)
+
+    @traced(category='view')
     def load_data_into_treeview(self) -> None:
-        """Loads data from the database
-        and populates it into a treeview widget."""
+        """Requests the first pages of records for the treeview;
+        further pages are fetched as the scrollbar moves."""
+        self.tree_generation += 1
+        self.page_request_pending = True
+        limit = self.page_size * (self.window_pages - 1)
+        self.controller.request_sorted_page(
+            self.sort_column, self.sort_descending,
+            callback=self.tree_request(
+                lambda records: self.show_first_pages(records, limit)
+            ),
+            errback=self.tree_request(self.page_request_failed),
+            limit=limit
+        )
+
+    @traced(category='view')
+    def show_first_pages(self, records: list, limit: int) -> None:
+        """Replaces the treeview rows with the first pages of records."""
+        self.page_request_pending = False
+        self.tree.delete(*self.tree.get_children())
+        self.insert_rows(records)
+        self.tree.yview_moveto(0)
+
+        self.paginated = True
+        self.window_at_start = True
+        self.window_at_end = len(records) < limit
+
+    def page_request_failed(self, error: Exception) -> None:
+        self.page_request_pending = False
+        self.logger.error(f"Error loading data into treeview: {error}")
+
+    def on_tree_scroll(self, first: str, last: str) -> None:
+        """Updates the scrollbar and requests the adjacent page
+        when the visible rows approach either edge of the window."""
+        self.tree_scroll_vertical.set(first, last)
+        if not self.paginated or self.page_request_pending:
+            return
+
         try:
-            records = self.controller.get_query_db()
-            for row in records:
-                self.tree.insert('',
-                                 'end',
-                                 text=str(row[0]),
-                                 values=row[1:])
+            if (float(last) >= 1 - self.scroll_margin
+                    and not self.window_at_end):
+                self.load_next_page()
+            elif (float(first) <= self.scroll_margin
+                    and not self.window_at_start):
+                self.load_previous_page()
         except Exception as e:
-            self.logger.error(f"Error loading data into treeview: {e}")
-
+            self.logger.error(f"Error paging treeview: {e}")
+
+    def load_next_page(self) -> None:
+        """Requests the page after the last row in the treeview."""
+        children = self.tree.get_children()
+        after_id = (int(self.tree.item(children[-1], 'text'))
+                    if children else None)
+        self.page_request_pending = True
+        self.controller.request_sorted_page(
+            self.sort_column, self.sort_descending,
+            callback=self.tree_request(self.append_page),
+            errback=self.tree_request(self.page_request_failed),
+            after_id=after_id,
+            limit=self.page_size
+        )
+
+    @traced(category='view')
+    def append_page(self, records: list) -> None:
+        """Appends a page after the last row in the treeview
+        and drops rows from the top beyond the window size."""
+        self.page_request_pending = False
+        if len(records) < self.page_size:
+            self.window_at_end = True
+        if not records:
+            return
+
+        children = self.tree.get_children()
+        top_index = self.get_top_visible_index(children)
+        self.insert_rows(records)
+
+        children = self.tree.get_children()
+        excess = len(children) - self.page_size * self.window_pages
+        if excess > 0:
+            self.tree.delete(*children[:excess])
+            self.window_at_start = False
+            self.restore_top_visible_index(top_index - excess)
+
+    def load_previous_page(self) -> None:
+        """Requests the page before the first row in the treeview."""
+        children = self.tree.get_children()
+        if not children:
+            return
+
+        self.page_request_pending = True
+        self.controller.request_sorted_page(
+            self.sort_column, self.sort_descending,
+            callback=self.tree_request(self.prepend_page),
+            errback=self.tree_request(self.page_request_failed),
+            before_id=int(self.tree.item(children[0], 'text')),
+            limit=self.page_size
+        )
+
+    @traced(category='view')
+    def prepend_page(self, records: list) -> None:
+        """Prepends a page before the first row in the treeview
+        and drops rows from the bottom beyond the window size."""
+        self.page_request_pending = False
+        if len(records) < self.page_size:
+            self.window_at_start = True
+        if not records:
+            return
+
+        children = self.tree.get_children()
+        top_index = self.get_top_visible_index(children)
+        inserted = self.insert_rows(records, 0)
+
+        children = self.tree.get_children()
+        excess = len(children) - self.page_size * self.window_pages
+        if excess > 0:
+            self.tree.delete(*children[-excess:])
+            self.window_at_end = False
+        self.restore_top_visible_index(top_index + inserted)
+
+    def sorted_by_id(self) -> bool:
+        return self.sort_column == 'id' and not self.sort_descending
+
+    @traced(category='view')
+    def sort_by(self, tree_column: str) -> None:
+        """Sorts the treeview by a column, reversing the order when it is
+        already sorted by it. Paginated records are reloaded in the new
+        order from the database; search results are sorted in place once
+        their values are read back."""
+        column = self.sort_columns[tree_column]
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+
+        for other, text in self.heading_texts.items():
+            arrow = (self.sort_arrows[self.sort_descending]
+                     if other == tree_column else '')
+            self.tree.heading(other, text=text + arrow)
+
+        if self.paginated:
+            self.load_data_into_treeview()
+            return
+
+        self.tree_generation += 1
+        ids = {item: int(self.tree.item(item, 'text'))
+               for item in self.tree.get_children()}
+        self.controller.request_sort_values(
+            list(ids.values()), column,
+            callback=self.tree_request(
+                lambda values: self.sort_items(ids, values)
+            ),
+            errback=lambda e: self.logger.error(f"Error sorting treeview: {e}")
+        )
+
+    def sort_items(self, ids: dict, values: dict) -> None:
+        """Moves the treeview items into (sort value, ID) order,
+        empty values first."""
+        keys = {item: self.sort_position(values.get(record_id), record_id)
+                for item, record_id in ids.items() if self.tree.exists(item)}
+        ordered = sorted(keys, key=keys.get, reverse=self.sort_descending)
+        for index, item in enumerate(ordered):
+            self.tree.move(item, '', index)
+
+    def get_top_visible_index(self, children: tuple) -> int:
+        """Returns the index of the first visible row in the treeview."""
+        first, _ = self.tree.yview()
+        return round(first * len(children))
+
+    def restore_top_visible_index(self, index: int) -> None:
+        """Scrolls the treeview so the row at `index` is the first visible,
+        keeping the view steady after rows are added or removed."""
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(index, 0) / total)
+
+    @traced(category='view')
     def create_graph(self, graph_frame: Frame) -> None:
-        """Generates and displays a bar graph of monthly expenses
-        by category in the specified Tkinter frame."""
+        """Requests fresh graph data and redraws the bar graph in the
+        specified Tkinter frame. Requests made while one is in flight are
+        coalesced into a single follow-up refresh."""
+        if self.graph_refresh_pending:
+            self.graph_refresh_stale = True
+            return
+
+        self.graph_refresh_pending = True
+        self.graph_refresh_stale = False
+        self.graph_requested_at = time.perf_counter()
+        self.controller.request_graph_data(
+            lambda data: self.finish_graph_refresh(graph_frame, data)
+        )
+
+    def finish_graph_refresh(self, graph_frame: Frame, data: list) -> None:
+        """Draws the received data, then refreshes again if the data
+        changed while it was being fetched."""
+        self.graph_refresh_pending = False
+        self.draw_graph(graph_frame, data)
+        if self.graph_refresh_stale:
+            self.create_graph(graph_frame)
+
+    @traced(category='view')
+    def draw_graph(self, graph_frame: Frame, data: list) -> None:
+        """Displays a bar graph of monthly expenses by category in the
+        specified Tkinter frame, creating the figure on first use and
+        updating its bars and labels in place afterwards."""
         try:
-            data = self.controller.get_get_graph_data()
             current_month_word = self.controller.get_current_month_word()
 
             categories = [row[0][:4] for row in data]
@@ -205,38 +572,89 @@ class View:
                     categories.append(category_option[:4])
                     totals.append(0)
 
-            fig = Figure(figsize=(6, 4), dpi=75)
-            plot = fig.add_subplot(1, 1, 1)
-
-            colors = plt.colormaps['tab20'](range(len(categories)))
-            bar_colors = [colors[i] for i in range(len(categories))]
-
-            bars = plot.bar(categories, totals, color=bar_colors)
-
-            plot.set_xticks(range(len(categories)))
-            plot.set_xticklabels(categories, ha='center', fontsize='small')
-
-            for bar, total in zip(bars, totals):
-                yval = bar.get_height()
-                plot.text(bar.get_x() + bar.get_width()/2.0,
-                          yval,
-                          f'${total:.2f}',
-                          va='bottom',
-                          ha='center',
-                          fontsize='small')
-
-            plot.set_yticks([])
-            plot.set_title(
-                f'Total Expenses by Category in {current_month_word}',
-                fontsize=12
+            if self.graph_canvas is None:
+                self.create_graph_canvas(graph_frame)
+
+            totals_by_category = dict(zip(categories, totals))
+            if set(categories) == set(self.graph_bars):
+                for category, (bar, label) in self.graph_bars.items():
+                    total = totals_by_category[category]
+                    bar.set_height(total)
+                    label.set_y(total)
+                    label.set_text(f'${total:.2f}')
+            else:
+                self.create_graph_bars(categories, totals)
+
+            self.graph_plot.relim()
+            self.graph_plot.autoscale_view()
+            self.graph_plot.set_yticks([])
+            self.graph_plot.title.set_text(
+                f'Total Expenses by Category in {current_month_word}'
             )
-
-            canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill='both', expand=True)
+            self.graph_canvas.draw_idle()
         except Exception as e:
             self.logger.error(f"Error creating graph: {e}")
 
+    def create_graph_canvas(self, graph_frame: Frame) -> None:
+        """Creates the figure and its Tk canvas, replacing the placeholder.
+        Matplotlib is imported here, on first use."""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        for widget in graph_frame.winfo_children():
+            widget.destroy()
+
+        self.graph_figure = Figure(figsize=(6, 4), dpi=75)
+        self.graph_plot = self.graph_figure.add_subplot(1, 1, 1)
+        self.graph_plot.set_title('', fontsize=12)
+
+        self.graph_canvas = FigureCanvasTkAgg(self.graph_figure,
+                                              master=graph_frame)
+        self.graph_canvas.mpl_connect('draw_event', self.on_graph_drawn)
+        self.graph_canvas.get_tk_widget().pack(fill='both', expand=True)
+
+    def create_graph_bars(self, categories: list, totals: list) -> None:
+        """(Re)creates the bars and their labels, for the first draw
+        or when the set of categories changes."""
+        from matplotlib import colormaps
+
+        plot = self.graph_plot
+        for bar, label in self.graph_bars.values():
+            bar.remove()
+            label.remove()
+
+        colors = colormaps['tab20'](range(len(categories)))
+        bar_colors = [colors[i] for i in range(len(categories))]
+
+        bars = plot.bar(range(len(categories)), totals, color=bar_colors)
+
+        plot.set_xticks(range(len(categories)))
+        plot.set_xticklabels(categories, ha='center', fontsize='small')
+
+        self.graph_bars = {}
+        for category, bar, total in zip(categories, bars, totals):
+            label = plot.text(bar.get_x() + bar.get_width()/2.0,
+                              bar.get_height(),
+                              f'${total:.2f}',
+                              va='bottom',
+                              ha='center',
+                              fontsize='small')
+            self.graph_bars[category] = (bar, label)
+
+    def on_graph_drawn(self, event) -> None:
+        """Records the latency between the graph refresh request
+        and the completed redraw."""
+        if self.graph_requested_at is None:
+            return
+
+        self.graph_redraw_latency = (
+            time.perf_counter() - self.graph_requested_at
+        )
+        self.graph_requested_at = None
+        self.logger.debug("Graph redrawn in %.1f ms",
+                          self.graph_redraw_latency * 1000)
+
+    @traced(category='view')
     def initialize_page(self) -> None:
         """Initializes the main application window and
         configures its grid layout."""
@@ -253,27 +671,378 @@ class View:
                                     weight=1)  # Expand the TreeView
 
         self.root.title('Expense Manager')
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
         self.root.geometry('1600x900')  # Standard window size for 14' notebook
 
     def create_view(self) -> None:
         """Sets up the entire view of the application
-        by initializing components and layout."""
-        self.initialize_page()
-        self.initialize_variables()
-        self.create_frames()
-        self.create_header()
-        self.create_status_label()
-        self.create_version_label()
-        self.create_form()
-        self.create_buttons()
-        self.create_treeview()
-        self.graph_placeholder.destroy()
-        self.create_graph(self.graph_frame)
-        self.update_total_accumulated_label()
-        self.load_total_accumulated()
-        self.load_data_into_treeview()
+        by initializing components and layout. In fast-start mode the
+        window skeleton is shown first and the data-bound parts are filled
+        in one step at a time from the main loop."""
+        self.startup_started_at = time.perf_counter()
+        with span('View.build_skeleton', 'startup'):
+            self.initialize_page()
+            self.initialize_variables()
+            self.create_menu()
+            self.create_frames()
+            self.create_header()
+            self.create_status_label()
+            self.controller.start_worker(self.root)
+            self.create_version_label()
+            self.create_form()
+            self.create_buttons()
+            self.create_treeview()
+            self.update_total_accumulated_label()
+        self.root.bind('<Expose>', self.on_first_paint, add='+')
+
+        load_steps = [self.load_data_into_treeview,
+                      self.load_total_accumulated,
+                      self.load_header_image,
+                      lambda: self.create_graph(self.graph_frame)]
+        if self.fast_start:
+            self.root.after(0, self.run_load_steps, load_steps)
+        else:
+            for step in load_steps:
+                step()
         self.root.mainloop()
 
+    def on_close(self) -> None:
+        """Asks whether to save unsaved batch edits before closing."""
+        if self.controller.has_unsaved_changes():
+            answer = askyesnocancel('Unsaved changes',
+                                    'Save the changes before closing?')
+            if answer is None:
+                return
+            self.controller.save_on_exit = answer
+        self.root.destroy()
+
+    def run_load_steps(self, load_steps: list) -> None:
+        """Runs the first deferred loading step and schedules the rest,
+        letting Tk process events and repaint in between."""
+        if not load_steps:
+            return
+
+        step, *remaining = load_steps
+        try:
+            step()
+        except Exception as e:
+            self.logger.error(f"Error during deferred loading: {e}")
+        self.root.after(0, self.run_load_steps, remaining)
+
+    def on_first_paint(self, event) -> None:
+        """Logs the time from the start of `create_view`
+        to the first paint of the main window."""
+        if event.widget is not self.root or self.time_to_first_paint:
+            return
+
+        self.time_to_first_paint = (
+            time.perf_counter() - self.startup_started_at
+        )
+        self.logger.info(
+            f"Time to first paint: {self.time_to_first_paint * 1000:.0f} ms"
+        )
+
+    @traced(category='view')
+    def create_menu(self) -> None:
+        """Creates the application's menu bar."""
+        menu_bar = Menu(self.root)
+        file_menu = Menu(menu_bar, tearoff=0)
+        file_menu.add_command(label='Import...',
+                              command=self.controller.import_file)
+        file_menu.add_command(label='Export...',
+                              command=self.controller.export_file)
+        file_menu.add_command(
+            label='Export current month...',
+            command=lambda: self.controller.export_file(get_current_month())
+        )
+        menu_bar.add_cascade(label='File',
+                             menu=file_menu)
+
+        edit_menu = Menu(menu_bar, tearoff=0)
+        edit_menu.add_command(label='Undo',
+                              accelerator='Ctrl+Z',
+                              command=self.controller.undo)
+        edit_menu.add_command(label='Redo',
+                              accelerator='Ctrl+Y',
+                              command=self.controller.redo)
+        edit_menu.add_separator()
+        edit_menu.add_checkbutton(
+            label='Batch edit mode',
+            variable=self.var_batch_mode,
+            command=lambda: self.controller.set_batch_mode(
+                self.var_batch_mode.get()
+            )
+        )
+        edit_menu.add_command(label='Save',
+                              accelerator='Ctrl+S',
+                              command=self.controller.save)
+        edit_menu.add_command(label='Discard changes',
+                              command=self.controller.discard)
+        edit_menu.add_separator()
+        edit_menu.add_command(label='Delete selected',
+                              command=self.controller.prepare_delete)
+        edit_menu.add_command(label='Edit selected...',
+                              command=self.show_bulk_edit)
+        menu_bar.add_cascade(label='Edit',
+                             menu=edit_menu)
+        self.root.bind('<Control-z>', lambda event: self.controller.undo())
+        self.root.bind('<Control-y>', lambda event: self.controller.redo())
+        self.root.bind('<Control-s>', lambda event: self.controller.save())
+
+        view_menu = Menu(menu_bar, tearoff=0)
+        view_menu.add_command(label='Trends...',
+                              command=self.show_trends)
+        menu_bar.add_cascade(label='View',
+                             menu=view_menu)
+
+        debug_menu = Menu(menu_bar, tearoff=0)
+        debug_menu.add_command(label='SQL statistics...',
+                               command=self.show_sql_stats)
+        menu_bar.add_cascade(label='Debug',
+                             menu=debug_menu)
+        self.root.config(menu=menu_bar)
+
+    def show_sql_stats(self) -> None:
+        """Opens a window listing per-statement SQL statistics."""
+        window = Toplevel(self.root)
+        window.title('SQL statistics')
+        window.geometry('1000x400')
+        window.grid_rowconfigure(0, weight=1)
+        window.grid_columnconfigure(0, weight=1)
+
+        columns = ('count', 'total_ms', 'mean_ms', 'p95_ms', 'rows')
+        stats_tree = ttk.Treeview(window, columns=columns)
+        stats_tree.grid(row=0,
+                        column=0,
+                        sticky='nsew')
+        stats_tree.heading('#0',
+                           text='Statement')
+        stats_tree.column('#0',
+                          width=550)
+        for column, text in zip(columns, ('Count', 'Total ms', 'Mean ms',
+                                          'p95 ms', 'Rows')):
+            stats_tree.heading(column,
+                               text=text)
+            stats_tree.column(column,
+                              width=80,
+                              anchor=E)
+
+        stats_scroll = Scrollbar(window,
+                                 orient="vertical",
+                                 command=stats_tree.yview)
+        stats_scroll.grid(row=0,
+                          column=1,
+                          sticky='ns')
+        stats_tree.configure(yscrollcommand=stats_scroll.set)
+
+        def refresh():
+            stats_tree.delete(*stats_tree.get_children())
+            stats = self.controller.get_sql_stats()
+            if not stats['statements']:
+                stats_tree.insert('',
+                                  'end',
+                                  text='No statistics: start with '
+                                       '--profile-sql to collect them.')
+            for entry in stats['statements']:
+                stats_tree.insert('',
+                                  'end',
+                                  text=entry['statement'],
+                                  values=(entry['count'],
+                                          f"{entry['total_ms']:.2f}",
+                                          f"{entry['mean_ms']:.2f}",
+                                          f"{entry['p95_ms']:.2f}",
+                                          entry['rows']))
+            cache = self.controller.get_cache_stats()
+            cache_label.config(
+                text=f"Statements executed: {stats['executed']} "
+                     f"(including triggers), {stats['failed']} failed. "
+                     f"Result cache: {cache['hits']} hits, "
+                     f"{cache['misses']} misses, "
+                     f"{cache['evictions']} evictions, "
+                     f"{cache['size']}/{cache['maxsize']} entries, "
+                     f"generation {cache['generation']}"
+            )
+
+        cache_label = Label(window,
+                            anchor=W)
+        cache_label.grid(row=1,
+                         column=0,
+                         sticky='ew',
+                         padx=5)
+
+        refresh_button = Button(window,
+                                text='Refresh',
+                                command=refresh,
+                                bg='grey',
+                                fg='white',
+                                width=15)
+        refresh_button.grid(row=2,
+                            column=0,
+                            pady=5)
+        refresh()
+
+    def show_bulk_edit(self) -> None:
+        """Opens a dialog setting one field of every selected record."""
+        if not self.tree.selection():
+            self.update_status_bar("You must select the records to edit.")
+            return
+
+        window = Toplevel(self.root)
+        window.title('Edit selected records')
+        window.resizable(False, False)
+
+        field_labels = {'Category': ('category', self.category_options),
+                        'Payment Method': ('payment_method',
+                                           self.payment_method_options),
+                        'Responsible': ('responsible',
+                                        self.responsible_options),
+                        'Supplier': ('supplier', []),
+                        'Date': ('date', []),
+                        'Due Date': ('due_date', [])}
+
+        Label(window,
+              text=f"{len(self.tree.selection())} records selected").grid(
+                  row=0,
+                  column=0,
+                  columnspan=2,
+                  sticky=W,
+                  padx=5,
+                  pady=5)
+        cb_field = ttk.Combobox(window,
+                                values=list(field_labels),
+                                state='readonly')
+        cb_field.grid(row=1,
+                      column=0,
+                      padx=5,
+                      pady=5)
+        cb_value = ttk.Combobox(window)
+        cb_value.grid(row=1,
+                      column=1,
+                      padx=5,
+                      pady=5)
+
+        def on_field_selected(event):
+            cb_value.config(values=field_labels[cb_field.get()][1])
+            cb_value.set('')
+
+        def apply():
+            if not cb_field.get() or not cb_value.get():
+                return
+            field = field_labels[cb_field.get()][0]
+            self.controller.bulk_edit(field, cb_value.get())
+            window.destroy()
+
+        cb_field.bind('<<ComboboxSelected>>', on_field_selected)
+        apply_button = Button(window,
+                              text='Apply',
+                              command=apply,
+                              bg='green',
+                              fg='white',
+                              width=15)
+        apply_button.grid(row=2,
+                          column=0,
+                          columnspan=2,
+                          pady=5)
+
+    def show_trends(self) -> None:
+        """Opens a window charting daily, weekly or monthly spend over a
+        date range, per category or responsible person."""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        window = Toplevel(self.root)
+        window.title('Trends')
+        window.geometry('900x500')
+        window.grid_rowconfigure(1, weight=1)
+        window.grid_columnconfigure(0, weight=1)
+
+        controls = Frame(window)
+        controls.grid(row=0,
+                      column=0,
+                      sticky='ew',
+                      padx=5,
+                      pady=5)
+        today = datetime.date.today()
+        var_start = StringVar(value=today.replace(year=today.year - 1,
+                                                  day=1).isoformat())
+        var_end = StringVar(value=(today + datetime.timedelta(days=1))
+                            .isoformat())
+        for column, (text, widget) in enumerate((
+                ('From:', Entry(controls, textvariable=var_start, width=12)),
+                ('To:', Entry(controls, textvariable=var_end, width=12)),
+                ('By:', ttk.Combobox(controls,
+                                     values=('day', 'week', 'month'),
+                                     state='readonly',
+                                     width=8)),
+                ('Per:', ttk.Combobox(controls,
+                                      values=('category', 'responsible'),
+                                      state='readonly',
+                                      width=12)))):
+            Label(controls, text=text).grid(row=0,
+                                            column=2 * column,
+                                            padx=2)
+            widget.grid(row=0,
+                        column=2 * column + 1,
+                        padx=2)
+            if isinstance(widget, ttk.Combobox):
+                widget.current(2 if column == 2 else 0)
+            if column == 2:
+                cb_unit = widget
+            elif column == 3:
+                cb_dimension = widget
+
+        figure = Figure(figsize=(9, 4), dpi=75)
+        plot = figure.add_subplot(1, 1, 1)
+        canvas = FigureCanvasTkAgg(figure, master=window)
+        canvas.get_tk_widget().grid(row=1,
+                                    column=0,
+                                    sticky='nsew')
+
+        def refresh():
+            start, end = var_start.get(), var_end.get()
+            try:
+                if (datetime.date.fromisoformat(start)
+                        >= datetime.date.fromisoformat(end)):
+                    raise ValueError("the start must precede the end")
+            except ValueError as e:
+                self.update_status_bar(f"Invalid date range: {e}")
+                return
+            self.controller.request_trend(
+                start, end, cb_unit.get(), cb_dimension.get(),
+                lambda result: self.draw_trend(canvas, plot, *result)
+            )
+
+        Button(controls,
+               text='Show',
+               command=refresh,
+               bg='grey',
+               fg='white',
+               width=10).grid(row=0,
+                              column=8,
+                              padx=5)
+        refresh()
+
+    @traced(category='view')
+    def draw_trend(self, canvas, plot, buckets: list, series: dict) -> None:
+        """Draws one line per series, downsampled to at most one point per
+        pixel of the canvas width."""
+        width = max(canvas.get_tk_widget().winfo_width(), 100)
+        x_values = [datetime.date.fromisoformat(bucket).toordinal()
+                    for bucket in buckets]
+        plot.clear()
+        for value, totals in sorted(series.items()):
+            points = downsample(list(zip(x_values, totals)), width)
+            plot.plot([datetime.date.fromordinal(x) for x, _ in points],
+                      [total for _, total in points],
+                      label=value or '(none)',
+                      linewidth=1)
+        if series:
+            plot.legend(fontsize='small', loc='upper left')
+        plot.set_title('Spend over time', fontsize=12)
+        canvas.figure.autofmt_xdate()
+        canvas.draw_idle()
+
+    @traced(category='view')
     def create_frames(self) -> None:
         """Initializes and configures the main frames
         of the application's GUI."""
@@ -349,6 +1118,7 @@ class View:
         self.treeview_frame.grid_rowconfigure(0, weight=1)
         self.treeview_frame.grid_columnconfigure(0, weight=1)
 
+    @traced(category='view')
     def initialize_variables(self) -> None:
         """Initializes the control variables for various GUI elements."""
         self.var_id = IntVar()
@@ -365,6 +1135,7 @@ class View:
         self.var_due_date = StringVar()
         self.var_check_due_date = BooleanVar()
         self.var_search = StringVar()
+        self.var_batch_mode = BooleanVar()
 
         self.fields_to_validate = [
             self.var_product,
@@ -378,10 +1149,26 @@ class View:
             self.var_due_date
         ]
 
+    @traced(category='view')
     def create_header(self) -> None:
-        """Creates and places the header image and
-        title in the application's header frame."""
-        original_image = PilImage.open("app/rsc/tkinter_app_logo.png")
+        """Creates and places the title in the application's header frame;
+        the header image is loaded later by `load_header_image`."""
+        title = Label(self.header_frame,
+                      text='EXPENSE MANAGER',
+                      font=('Arial',
+                            20,
+                            'bold'))
+        title.grid(row=0,
+                   column=1,
+                   padx=0,
+                   sticky=W)
+
+    @traced(category='view')
+    def load_header_image(self) -> None:
+        """Loads the header image, importing PIL on first use."""
+        from PIL import Image as PilImage, ImageTk
+
+        original_image = PilImage.open(self.logo_path)
         resized_image = original_image.resize((50, 50))
         photo = ImageTk.PhotoImage(resized_image)
 
@@ -393,16 +1180,7 @@ class View:
                  pady=5,
                  sticky=W)
 
-        title = Label(self.header_frame,
-                      text='EXPENSE MANAGER',
-                      font=('Arial',
-                            20,
-                            'bold'))
-        title.grid(row=0,
-                   column=1,
-                   padx=0,
-                   sticky=W)
-
+    @traced(category='view')
     def create_status_label(self) -> None:
         """Creates and places the status label
         in the status frame of the application."""
@@ -418,6 +1196,16 @@ class View:
                          padx=0,
                          pady=0)
 
+        self.busy_indicator = ttk.Progressbar(self.status_frame,
+                                              mode='indeterminate',
+                                              length=60)
+        self.busy_indicator.grid(row=0,
+                                 column=4,
+                                 sticky=E,
+                                 padx=5)
+        self.busy_indicator.grid_remove()
+
+    @traced(category='view')
     def create_version_label(self) -> None:
         """Creates and places the version label
         in the version frame of the application."""
@@ -432,6 +1220,7 @@ class View:
                      column=1,
                      sticky='ew')
 
+    @traced(category='view')
     def create_form(self) -> None:
         """Creates and arranges the form elements
         in the data entry frame of the application."""
@@ -579,6 +1368,9 @@ class View:
                            sticky='nsew',
                            padx=10,
                            pady=5)
+        self.e_search.bind('<Return>',
+                           lambda event: self.controller.search())
+        self.var_search.trace_add('write', self.controller.on_search_changed)
 
         self.l_total = Label(self.root,
                              text='Total ',
@@ -603,6 +1395,7 @@ class View:
                           padx=10,
                           pady=5)
 
+    @traced(category='view')
     def create_buttons(self) -> None:
         """Creates and arranges various buttons and
         checkbuttons in the application."""
@@ -688,22 +1481,24 @@ class View:
                                     pady=0,
                                     sticky='e')
 
+    @traced(category='view')
     def create_treeview(self) -> None:
         """Initializes and configures the treeview and
         its scrollbar in the treeview frame."""
-        self.tree = ttk.Treeview(self.treeview_frame)
+        self.tree = ttk.Treeview(self.treeview_frame,
+                                 selectmode='extended')
         self.tree.grid(row=0,
                        column=0,
                        sticky='nsew')
 
-        tree_scroll_vertical = Scrollbar(self.treeview_frame,
-                                         orient="vertical",
-                                         command=self.tree.yview)
-        tree_scroll_vertical.grid(row=0,
-                                  column=1,
-                                  sticky='ns')
+        self.tree_scroll_vertical = Scrollbar(self.treeview_frame,
+                                              orient="vertical",
+                                              command=self.tree.yview)
+        self.tree_scroll_vertical.grid(row=0,
+                                       column=1,
+                                       sticky='ns')
 
-        self.tree.configure(yscrollcommand=tree_scroll_vertical.set)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
 
         style = ttk.Style(self.treeview_frame)
         style.theme_use("default")
@@ -789,3 +1584,10 @@ class View:
                           text='Date')
         self.tree.heading('col10',
                           text='Due Date')
+
+        for column in self.sort_columns:
+            self.heading_texts[column] = self.tree.heading(column, 'text')
+            self.tree.heading(column,
+                              command=lambda c=column: self.sort_by(c))
+        self.tree.heading('#0', text=self.heading_texts['#0']
+                          + self.sort_arrows[0])
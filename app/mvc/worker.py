@@ -0,0 +1,149 @@
+import logging
+import queue
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from utils.tracing import span
+
+
+class DatabaseWorker:
+    """Runs model calls off the Tk main thread. Writes go through a single
+    writer thread so they are serialized, reads run concurrently on a small
+    pool with one connection per thread, and results are handed back to the
+    main thread through `root.after`."""
+    poll_interval = 20  # Milliseconds between checks for finished requests
+
+    def __init__(self, model, readers: int = 2):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.readers = readers
+        self.root = None
+        self.on_busy = None
+        self.read_executor = None
+        self.write_executor = None
+        self.completed = queue.Queue()
+        self.pending = 0
+
+    def start(self, root, on_busy: Optional[Callable] = None) -> None:
+        """Starts the worker threads; results are delivered in the thread
+        owning `root`, which also gets a connection of its own."""
+        self.root = root
+        self.on_busy = on_busy
+        self.model.bind_thread_connection(self.model.open_connection())
+        self.write_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='db-writer'
+        )
+        self.read_executor = ThreadPoolExecutor(
+            max_workers=self.readers,
+            thread_name_prefix='db-reader',
+            initializer=self.bind_reader_connection
+        )
+
+    def bind_reader_connection(self) -> None:
+        """Gives each reader thread its own database connection."""
+        self.model.bind_thread_connection(self.model.open_connection())
+
+    def shutdown(self, finalize: Optional[Callable] = None) -> None:
+        """Waits for queued requests to finish, runs `finalize` after
+        them on the writer thread, and stops the threads."""
+        if finalize is not None:
+            if self.write_executor is None:
+                self.run(finalize, ())
+            else:
+                self.write_executor.submit(self.run, finalize, ()).result()
+        for executor in (self.write_executor, self.read_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self.write_executor = None
+        self.read_executor = None
+
+    def submit_read(self, func: Callable, *args,
+                    callback: Optional[Callable] = None,
+                    errback: Optional[Callable] = None) -> Future:
+        """Runs a read-only call concurrently with other reads. While the
+        model defers its commits, the readers' connections cannot see the
+        pending writes, so the call runs after them on the writer thread."""
+        executor = (self.write_executor if self.reads_need_writer()
+                    else self.read_executor)
+        return self.submit(executor, func, args, callback, errback)
+
+    def reads_need_writer(self) -> bool:
+        return bool(self.model.commits_deferred
+                    or self.model.uncommitted_writes)
+
+    def submit_write(self, func: Callable, *args,
+                     callback: Optional[Callable] = None,
+                     errback: Optional[Callable] = None) -> Future:
+        """Runs a call that writes to the database after every
+        previously submitted write."""
+        return self.submit(self.write_executor, func, args, callback, errback)
+
+    def submit(self, executor: Optional[ThreadPoolExecutor], func: Callable,
+               args: tuple, callback: Optional[Callable],
+               errback: Optional[Callable]) -> Future:
+        """Queues the call and arranges for `callback(result)` or
+        `errback(exception)` to run on the main thread. Without a started
+        worker the call runs inline, as in headless use."""
+        if executor is None:
+            future = Future()
+            try:
+                future.set_result(self.run(func, args))
+            except Exception as e:
+                future.set_exception(e)
+            self.deliver(future, callback, errback)
+            return future
+
+        future = executor.submit(self.run, func, args)
+        self.pending += 1
+        if self.pending == 1:
+            self.set_busy(True)
+            self.root.after(self.poll_interval, self.poll)
+        future.add_done_callback(
+            lambda done: self.completed.put((done, callback, errback))
+        )
+        return future
+
+    def run(self, func: Callable, args: tuple):
+        """Executes a request, timed as a span when tracing is enabled."""
+        with span(getattr(func, '__qualname__', repr(func)), 'db'):
+            return func(*args)
+
+    def poll(self) -> None:
+        """Delivers finished requests and keeps polling while any remain."""
+        while True:
+            try:
+                future, callback, errback = self.completed.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            self.deliver(future, callback, errback)
+
+        if self.pending:
+            self.root.after(self.poll_interval, self.poll)
+        else:
+            self.set_busy(False)
+
+    def deliver(self, future: Future, callback: Optional[Callable],
+                errback: Optional[Callable]) -> None:
+        """Passes the outcome of a finished request to its handlers;
+        cancelled requests are dropped."""
+        if future.cancelled():
+            return
+
+        try:
+            error = future.exception()
+            if error is not None:
+                self.logger.error(f"Database request failed: {error}")
+                if errback is not None:
+                    errback(error)
+            elif callback is not None:
+                callback(future.result())
+        except Exception as e:
+            self.logger.error(f"Error handling database result: {e}")
+
+    def set_busy(self, busy: bool) -> None:
+        """Notifies the view that requests are (or are no longer) pending."""
+        if self.on_busy is not None:
+            self.on_busy(busy)
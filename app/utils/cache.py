@@ -0,0 +1,54 @@
+import threading
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache whose entries
+    are tagged with the generation they were computed at; an entry from
+    an older generation counts as a miss."""
+    MISSING = object()
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, generation: int) -> Any:
+        """Returns the cached value, or `LRUCache.MISSING`."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return self.MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        """Stores a value, evicting the least recently used entries
+        beyond `maxsize`."""
+        with self.lock:
+            self.entries[key] = (generation, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit, miss and eviction counters and current size."""
+        with self.lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self.entries),
+                    'maxsize': self.maxsize}
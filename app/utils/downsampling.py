@@ -0,0 +1,40 @@
+from typing import List, Sequence, Tuple
+
+
+def downsample(points: Sequence[Tuple[float, float]],
+               threshold: int) -> List[Tuple[float, float]]:
+    """Reduces a series of (x, y) points sorted by x to at most `threshold`
+    points with the Largest-Triangle-Three-Buckets algorithm, which keeps
+    the first and last points and, per bucket, the point forming the
+    largest triangle with its neighbours, preserving peaks and troughs."""
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_points = points[next_start:next_end] or points[-1:]
+        average_x = sum(x for x, _ in next_points) / len(next_points)
+        average_y = sum(y for _, y in next_points) / len(next_points)
+
+        previous_x, previous_y = points[previous]
+        largest_area = -1.0
+        selected = start
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((previous_x - average_x) * (y - previous_y)
+                       - (previous_x - x) * (average_y - previous_y))
+            if area > largest_area:
+                largest_area = area
+                selected = index
+        sampled.append(points[selected])
+        previous = selected
+
+    sampled.append(points[-1])
+    return sampled
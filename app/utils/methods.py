@@ -1,6 +1,48 @@
 import datetime
 
+from typing import Iterator, Optional, Tuple
+
 
 def get_current_month() -> int:
     """Returns the current month as an integer."""
     return datetime.datetime.now().month
+
+
+def get_current_year() -> int:
+    """Returns the current year as an integer."""
+    return datetime.datetime.now().year
+
+
+def get_date_range(year: int, month: Optional[int] = None) -> Tuple[str, str]:
+    """Returns the half-open ISO date range [start, end) covering the given
+    month of the year, or the whole year if no month is given."""
+    if month is None:
+        start = datetime.date(year, 1, 1)
+        end = datetime.date(year + 1, 1, 1)
+    else:
+        start = datetime.date(year, month, 1)
+        end = (datetime.date(year + 1, 1, 1) if month == 12
+               else datetime.date(year, month + 1, 1))
+    return start.isoformat(), end.isoformat()
+
+
+def iter_buckets(start: str, end: str, unit: str = 'month') -> Iterator[str]:
+    """Yields the ISO start dates of the days, weeks (starting on Monday)
+    or months overlapping the half-open date range [start, end)."""
+    current = datetime.date.fromisoformat(start)
+    last = datetime.date.fromisoformat(end)
+    if unit == 'week':
+        current -= datetime.timedelta(days=current.weekday())
+    elif unit == 'month':
+        current = current.replace(day=1)
+
+    while current < last:
+        yield current.isoformat()
+        if unit == 'day':
+            current += datetime.timedelta(days=1)
+        elif unit == 'week':
+            current += datetime.timedelta(days=7)
+        else:
+            current = (current.replace(year=current.year + 1, month=1)
+                       if current.month == 12
+                       else current.replace(month=current.month + 1))
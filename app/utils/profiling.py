@@ -0,0 +1,242 @@
+import itertools
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Optional
+
+PROFILE_SQL_ENV = 'EXPENSE_MANAGER_PROFILE_SQL'
+
+SLOW_QUERY_MS_ENV = 'EXPENSE_MANAGER_SLOW_QUERY_MS'
+
+logger = logging.getLogger(__name__)
+
+slow_query_logger = logging.getLogger('sql.slow')
+
+statement_logger = logging.getLogger('sql.trace')
+
+
+class QueryProfiler:
+    """Aggregates per-statement counts, latencies and returned rows for
+    profiled connections, and logs statements slower than a threshold
+    together with their query plan."""
+    max_samples = 1000  # Latency samples kept per statement for the p95
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_ms = 100.0
+        self.lock = threading.Lock()
+        self.statements = {}
+        self.traced_statements = 0  # Every statement run, triggers included
+        self.failed_statements = 0
+
+    def enable(self, slow_query_ms: Optional[float] = None) -> None:
+        """Turns on profiling for connections created from now on."""
+        self.enabled = True
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+
+    def reset(self) -> None:
+        """Discards the collected statistics."""
+        with self.lock:
+            self.statements = {}
+            self.traced_statements = 0
+            self.failed_statements = 0
+
+    def instrument(self, conn: sqlite3.Connection) -> None:
+        """Installs the trace callback counting every executed statement,
+        including those run by triggers."""
+        conn.set_trace_callback(self.trace)
+
+    def trace(self, statement: str) -> None:
+        with self.lock:
+            self.traced_statements += 1
+        if statement_logger.isEnabledFor(logging.DEBUG):
+            statement_logger.debug(statement)
+
+    def record_failure(self) -> None:
+        """Counts a statement whose execution raised; it is left out of the
+        per-statement timings."""
+        with self.lock:
+            self.failed_statements += 1
+
+    def record(self, conn: sqlite3.Connection, sql: str, params,
+               seconds: float, rows: int) -> None:
+        """Adds one completed run of a statement to the statistics."""
+        key = ' '.join(sql.split())
+        with self.lock:
+            entry = self.statements.setdefault(
+                key, {'count': 0, 'total': 0.0, 'rows': 0, 'samples': []}
+            )
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['rows'] += rows
+            samples = entry['samples']
+            samples.append(seconds)
+            if len(samples) > self.max_samples:
+                del samples[:len(samples) - self.max_samples]
+
+        if seconds * 1000 >= self.slow_query_ms:
+            slow_query_logger.warning(
+                f"Slow query ({seconds * 1000:.1f} ms, {rows} rows): {key}\n"
+                f"{self.explain(conn, sql, params)}"
+            )
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params) -> str:
+        """Returns the query plan of a statement, or why it has none."""
+        if sql.lstrip().split(None, 1)[0].upper() not in (
+                'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'):
+            return "  (no query plan)"
+        try:
+            plan = sqlite3.Connection.execute(
+                conn, f"EXPLAIN QUERY PLAN {sql}", params or ()
+            ).fetchall()
+            return '\n'.join(f"  {row[-1]}" for row in plan)
+        except sqlite3.Error as e:
+            return f"  (query plan unavailable: {e})"
+
+    def stats(self) -> dict:
+        """Returns the statistics per statement, slowest total first, with
+        the number of statements actually executed (including those run
+        by triggers, as reported by the trace callback) and failed."""
+        with self.lock:
+            entries = [(key, dict(entry, samples=list(entry['samples'])))
+                       for key, entry in self.statements.items()]
+            executed = self.traced_statements
+            failed = self.failed_statements
+
+        stats = []
+        for key, entry in entries:
+            samples = sorted(entry['samples'])
+            p95 = samples[max(math.ceil(len(samples) * 0.95) - 1, 0)]
+            stats.append({'statement': key,
+                          'count': entry['count'],
+                          'total_ms': entry['total'] * 1000,
+                          'mean_ms': entry['total'] * 1000 / entry['count'],
+                          'p95_ms': p95 * 1000,
+                          'rows': entry['rows']})
+        stats.sort(key=lambda item: -item['total_ms'])
+        return {'statements': stats,
+                'executed': executed,
+                'failed': failed}
+
+
+profiler = QueryProfiler()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor timing each statement from execute until its results
+    have been fetched."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.run = None
+
+    def execute(self, sql, parameters=()):
+        self.finish_run()
+        start = time.perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        except Exception:
+            profiler.record_failure()
+            raise
+        self.run = [sql, parameters, time.perf_counter() - start, 0]
+        if self.description is None:
+            self.finish_run()
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish_run()
+        seq_of_parameters, first = self.first_parameters(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            result = super().executemany(sql, seq_of_parameters)
+        except Exception:
+            profiler.record_failure()
+            raise
+        self.run = [sql, first, time.perf_counter() - start, 0]
+        self.finish_run()
+        return result
+
+    @staticmethod
+    def first_parameters(seq_of_parameters) -> tuple:
+        """Returns the parameter sets of an `executemany` call and the
+        first of them, which the query plan is explained with. Of an
+        iterator, the first set is taken and chained back in front."""
+        if isinstance(seq_of_parameters, (list, tuple)):
+            return (seq_of_parameters,
+                    seq_of_parameters[0] if seq_of_parameters else ())
+
+        iterator = iter(seq_of_parameters)
+        first = next(iterator, None)
+        if first is None:
+            return (), ()
+        return itertools.chain([first], iterator), first
+
+    def fetchone(self):
+        row = self.timed_fetch(super().fetchone)
+        self.finish_run()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self.timed_fetch(super().fetchmany, size)
+        if len(rows) < size:
+            self.finish_run()
+        return rows
+
+    def fetchall(self):
+        rows = self.timed_fetch(super().fetchall)
+        self.finish_run()
+        return rows
+
+    def close(self):
+        self.finish_run()
+        super().close()
+
+    def timed_fetch(self, fetch, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        if self.run is not None:
+            self.run[2] += time.perf_counter() - start
+            if isinstance(result, list):
+                self.run[3] += len(result)
+            elif result is not None:
+                self.run[3] += 1
+        return result
+
+    def finish_run(self):
+        if self.run is not None:
+            sql, parameters, seconds, rows = self.run
+            self.run = None
+            profiler.record(self.connection, sql, parameters, seconds, rows)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind the `execute`
+    shortcuts, are profiling cursors."""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def setup_profiling(enabled: bool = False,
+                    slow_query_ms: Optional[float] = None) -> None:
+    """Enables SQL profiling if requested or set through the environment
+    (EXPENSE_MANAGER_PROFILE_SQL=1, EXPENSE_MANAGER_SLOW_QUERY_MS=<ms>)."""
+    enabled = enabled or os.environ.get(PROFILE_SQL_ENV, '') not in ('', '0')
+    if slow_query_ms is None and os.environ.get(SLOW_QUERY_MS_ENV):
+        slow_query_ms = float(os.environ[SLOW_QUERY_MS_ENV])
+    if enabled:
+        profiler.enable(slow_query_ms)
+        logger.info(f"SQL profiling enabled, slow query threshold "
+                    f"{profiler.slow_query_ms:.0f} ms")
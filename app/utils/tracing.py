@@ -0,0 +1,109 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+TRACE_PATH_ENV = 'EXPENSE_MANAGER_TRACE'
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """Collects timed spans and exports them as a Chrome trace
+    (chrome://tracing, Perfetto) plus a summary table in the log."""
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.events = []
+        self.origin = time.perf_counter()
+
+    def enable(self, path: str) -> None:
+        """Starts recording spans, to be written to `path`."""
+        self.enabled = True
+        self.path = path
+        self.events = []
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, category: str = 'app'):
+        """Times the enclosed block as a complete ('X') trace event."""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append({'name': name,
+                                'cat': category,
+                                'ph': 'X',
+                                'ts': (start - self.origin) * 1e6,
+                                'dur': (end - start) * 1e6,
+                                'pid': os.getpid(),
+                                'tid': threading.get_ident()})
+
+    def write(self) -> None:
+        """Writes the recorded spans to the trace file
+        and logs a per-span summary."""
+        if not self.enabled or not self.path:
+            return
+
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': list(self.events),
+                       'displayTimeUnit': 'ms'}, file)
+        logger.info(f"Trace with {len(self.events)} spans written "
+                    f"to {self.path}\n{self.summary()}")
+
+    def summary(self) -> str:
+        """Returns a table of count, total, mean and max time per span."""
+        durations = {}
+        for event in list(self.events):
+            durations.setdefault(event['name'], []).append(event['dur'] / 1e3)
+
+        lines = [f"{'span':<40} {'count':>7} {'total ms':>10} "
+                 f"{'mean ms':>9} {'max ms':>9}"]
+        for name, values in sorted(durations.items(),
+                                   key=lambda item: -sum(item[1])):
+            lines.append(f"{name:<40} {len(values):>7} {sum(values):>10.2f} "
+                         f"{sum(values) / len(values):>9.2f} "
+                         f"{max(values):>9.2f}")
+        return '\n'.join(lines)
+
+
+tracer = Tracer()
+
+
+def setup_tracing(path: Optional[str] = None) -> None:
+    """Enables tracing if a trace path is given
+    or set through the environment."""
+    path = path or os.environ.get(TRACE_PATH_ENV)
+    if path:
+        tracer.enable(path)
+
+
+def span(name: str, category: str = 'app'):
+    """Times the enclosed block if tracing is enabled."""
+    return tracer.span(name, category)
+
+
+def traced(name: Optional[str] = None, category: str = 'app') -> Callable:
+    """Decorator timing every call of the function as a span."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
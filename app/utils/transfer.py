@@ -0,0 +1,80 @@
+import csv
+import gzip
+import json
+import lzma
+
+from typing import IO, Iterator, List, Optional, Tuple
+
+
+def open_text_file(path: str, mode: str = 'r') -> IO[str]:
+    """Opens a text file for reading or writing, transparently
+    compressing or decompressing '.gz' and '.xz' files."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    if path.endswith('.xz'):
+        return lzma.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def is_csv_file(path: str) -> bool:
+    """Returns True if the path names a (possibly compressed) CSV file,
+    False for JSON-lines."""
+    for suffix in ('.gz', '.xz'):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    return path.lower().endswith('.csv')
+
+
+def read_records(
+    path: str, chunk_size: int = 10000
+) -> Iterator[List[Tuple[int, Optional[dict]]]]:
+    """Streams a CSV or JSON-lines file in chunks of (line number, record)
+    pairs. Lines that cannot be parsed are yielded with a None record."""
+    with open_text_file(path) as file:
+        chunk = []
+        if is_csv_file(path):
+            reader = csv.DictReader(file)
+            for values in reader:
+                chunk.append((reader.line_num, values))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    chunk.append((line_number, json.loads(line)))
+                except json.JSONDecodeError:
+                    chunk.append((line_number, None))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+
+def write_records(path: str,
+                  rows: Iterator[Tuple],
+                  columns: Tuple[str, ...]) -> int:
+    """Streams rows to a CSV or JSON-lines file, compressed according to its
+    suffix, and returns the number of rows written."""
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    with open_text_file(path, 'w') as file:
+        if is_csv_file(path):
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(counted(rows))
+        else:
+            file.writelines(
+                json.dumps(dict(zip(columns, row))) + '\n'
+                for row in counted(rows)
+            )
+    return count
@@ -0,0 +1,12 @@
+"""Reproducible benchmarks of the model and controller paths.
+
+Run from the repository root, e.g. `python -m benchmarks --sizes 10k,100k`.
+"""
+import os
+import sys
+
+APP_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'app')
+
+if APP_DIRECTORY not in sys.path:
+    sys.path.insert(0, APP_DIRECTORY)
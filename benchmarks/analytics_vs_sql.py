@@ -0,0 +1,108 @@
+"""Compares the NumPy column store with the SQL paths on synthetic data.
+
+Usage: python -m benchmarks.analytics_vs_sql [--rows 1000000] [--db PATH]
+"""
+import argparse
+import statistics
+import time
+
+from config import configure_database
+from mvc.analytics import ColumnStore
+from mvc.model import Model
+
+from .data import generate_rows, populate
+
+
+def measure(func, repeat: int) -> float:
+    """Returns the median wall time of `func` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--db', default=':memory:')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    configure_database(args.db)
+    model = Model()
+    existing = model.conn.execute("SELECT COUNT(*) FROM expenses").fetchone()
+    if existing[0] < args.rows:
+        start = time.perf_counter()
+        populate(model, args.rows - existing[0])
+        print(f"Inserted {args.rows - existing[0]} rows "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    conn = model.conn
+    start = time.perf_counter()
+    store = ColumnStore()
+    store.load(conn)
+    print(f"Loaded {store.size} rows into the column store "
+          f"in {time.perf_counter() - start:.2f}s, "
+          f"{sum(store.memory_usage().values()) / 2**20:.1f} MiB")
+
+    month = ('2023-06-01', '2023-07-01')
+    cases = [
+        ('month total',
+         lambda: conn.execute("""SELECT SUM(subtotal_sum)
+                              FROM monthly_category_totals
+                              WHERE year = 2023 AND month = 6""").fetchall(),
+         lambda: conn.execute("""SELECT SUM(subtotal) FROM expenses
+                              WHERE date >= ? AND date < ?""",
+                              month).fetchall(),
+         lambda: store.total(*month)),
+        ('month by category',
+         lambda: conn.execute(model.category_totals_query,
+                              (2023, 6)).fetchall(),
+         lambda: conn.execute("""SELECT category, COUNT(*), SUM(subtotal)
+                              FROM expenses WHERE date >= ? AND date < ?
+                              GROUP BY category""", month).fetchall(),
+         lambda: store.group_by('category', *month)),
+        ('all time by category',
+         None,
+         lambda: conn.execute("""SELECT category, COUNT(*), SUM(subtotal)
+                              FROM expenses WHERE date IS NOT NULL
+                              GROUP BY category""").fetchall(),
+         lambda: store.group_by('category')),
+        ('monthly buckets',
+         None,
+         lambda: conn.execute("""SELECT substr(date, 1, 7), COUNT(*),
+                                     SUM(subtotal)
+                              FROM expenses WHERE date IS NOT NULL
+                              GROUP BY 1""").fetchall(),
+         lambda: store.time_buckets('M')),
+        ('top 10 suppliers',
+         None,
+         lambda: conn.execute("""SELECT supplier, COUNT(*), SUM(subtotal)
+                              FROM expenses WHERE date IS NOT NULL
+                              GROUP BY supplier ORDER BY 3 DESC
+                              LIMIT 10""").fetchall(),
+         lambda: store.top_n('supplier', 10)),
+    ]
+
+    print(f"{'query':<22} {'aggregate ms':>13} {'SQL scan ms':>12} "
+          f"{'NumPy ms':>9} {'speedup':>8}")
+    for name, aggregate, scan, columnar in cases:
+        aggregate_ms = measure(aggregate, args.repeat) if aggregate else None
+        scan_ms = measure(scan, args.repeat)
+        columnar_ms = measure(columnar, args.repeat)
+        aggregate_text = (f"{aggregate_ms:>13.2f}" if aggregate_ms is not None
+                          else f"{'-':>13}")
+        print(f"{name:<22} {aggregate_text} {scan_ms:>12.2f} "
+              f"{columnar_ms:>9.2f} {scan_ms / columnar_ms:>7.1f}x")
+
+    model.add_many_to_db(list(generate_rows(1000, seed=1)))
+    start = time.perf_counter()
+    store.load(conn)
+    print(f"Appended 1000 new rows in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Seeded synthetic expenses with skewed, realistic distributions."""
+import datetime
+import itertools
+import random
+
+from typing import Iterator, List, Sequence, Tuple
+
+# Category: (products, median amount)
+CATEGORIES = {
+    'Food': (('Groceries', 'Coffee beans', 'Bread', 'Fruit', 'Restaurant',
+              'Lunch menu'), 25.0),
+    'Transport': (('Fuel', 'Bus ticket', 'Taxi ride', 'Parking',
+                   'Train ticket'), 20.0),
+    'Services': (('Electricity bill', 'Water bill', 'Internet plan',
+                  'Mobile plan', 'Streaming subscription'), 45.0),
+    'Housing': (('Rent', 'Repairs', 'Cleaning supplies', 'Furniture'), 300.0),
+    'Health': (('Pharmacy', 'Doctor visit', 'Dental care', 'Gym fee'), 60.0),
+    'Leisure': (('Cinema tickets', 'Concert', 'Books', 'Video game'), 35.0),
+    'Clothing': (('Shoes', 'Jacket', 'Shirts', 'Jeans'), 70.0),
+    'Education': (('Course fee', 'Textbooks', 'School supplies'), 90.0),
+    'Taxes': (('Income tax', 'Property tax', 'Vehicle tax'), 400.0),
+    'Other': (('Gift', 'Donation', 'Miscellaneous'), 30.0),
+}
+
+RESPONSIBLES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Elena')
+
+PAYMENT_METHODS = ('Debit card', 'Credit card', 'Cash', 'Transfer')
+
+SUPPLIER_COUNT = 500
+
+END_YEAR = 2024  # Fixed, so the data does not depend on the day of the run
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    """Returns cumulative weights of a Zipf distribution over `count`
+    ranks, for `random.choices`."""
+    return list(itertools.accumulate(1 / rank ** exponent
+                                     for rank in range(1, count + 1)))
+
+
+def generate_rows(count: int, seed: int = 0, years: int = 5,
+                  block_size: int = 10000) -> Iterator[Tuple]:
+    """Yields `count` validated expense rows, as accepted by
+    `Model.add_many_to_db`, dated over the `years` years up to
+    `END_YEAR`. Categories, suppliers, responsibles and payment methods
+    follow Zipf-like distributions, amounts are log-normal around a
+    per-category median and quantities favour 1. The same seed always
+    yields the same rows, and smaller counts yield a prefix of larger
+    ones."""
+    generator = random.Random(seed)
+    categories = list(CATEGORIES)
+    category_weights = zipf_weights(len(categories), 1.0)
+    suppliers = [f"Supplier {rank:03d}" for rank in range(1, SUPPLIER_COUNT
+                                                          + 1)]
+    supplier_weights = zipf_weights(SUPPLIER_COUNT, 1.1)
+    responsible_weights = zipf_weights(len(RESPONSIBLES), 0.8)
+    payment_weights = (45, 75, 90, 100)
+    quantities = (1, 2, 3, 4, 5)
+    quantity_weights = (50, 75, 87, 95, 100)
+    first_day = datetime.date(END_YEAR - years + 1, 1, 1)
+    days = (datetime.date(END_YEAR + 1, 1, 1) - first_day).days
+
+    while count > 0:
+        # Whole blocks are drawn even for the last one, so the first rows
+        # are the same whatever the count
+        columns = itertools.islice(zip(
+            generator.choices(categories, cum_weights=category_weights,
+                              k=block_size),
+            generator.choices(suppliers, cum_weights=supplier_weights,
+                              k=block_size),
+            generator.choices(RESPONSIBLES, cum_weights=responsible_weights,
+                              k=block_size),
+            generator.choices(PAYMENT_METHODS, cum_weights=payment_weights,
+                              k=block_size),
+            generator.choices(quantities, cum_weights=quantity_weights,
+                              k=block_size),
+        ), min(count, block_size))
+        count -= block_size
+        for category, supplier, responsible, method, quantity in columns:
+            products, median = CATEGORIES[category]
+            amount = round(median * generator.lognormvariate(0, 0.6), 2)
+            date = first_day + datetime.timedelta(
+                days=generator.randrange(days)
+            )
+            due_date = ('N/A' if generator.random() < 0.8 else
+                        (date + datetime.timedelta(days=30)).isoformat())
+            yield (generator.choice(products),
+                   quantity,
+                   amount,
+                   responsible,
+                   round(quantity * amount, 2),
+                   category,
+                   supplier,
+                   method,
+                   date.isoformat(),
+                   due_date)
+
+
+def populate(model, count: int, seed: int = 0,
+             chunk_size: int = 50000) -> int:
+    """Inserts `count` generated rows in chunks of one transaction each
+    and returns the number inserted."""
+    inserted = 0
+    rows = generate_rows(count, seed)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return inserted
+        inserted += model.add_many_to_db(chunk)
+
+
+def parse_size(text: str) -> int:
+    """Parses a row count such as '10k', '1M' or '2500'."""
+    multipliers = {'k': 10 ** 3, 'm': 10 ** 6}
+    text = text.strip().lower()
+    if text[-1:] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def parse_sizes(text: str) -> Sequence[int]:
+    return [parse_size(size) for size in text.split(',') if size.strip()]
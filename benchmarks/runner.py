@@ -0,0 +1,368 @@
+"""Times the model, controller and view paths on synthetic databases of
+several sizes and writes the results as JSON, so runs can be compared.
+
+Usage: python -m benchmarks [--sizes 10k,100k,1M,10M] [--repeat 5]
+                            [--db-dir DIR] [--output results.json]
+                            [--compare previous.json]
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from typing import Callable, List, Optional, Sequence
+
+from config import configure_database, setup_logging
+from mvc.controller import Controller
+from mvc.model import Model
+from mvc.unit_of_work import UnitOfWork
+
+from .data import END_YEAR, generate_rows, parse_sizes, populate
+
+MONTH = 6  # Month of END_YEAR used by the month-filtered cases
+
+SEARCH_TERM = 'coffee'
+
+
+def measure(func: Callable, repeat: int,
+            setup: Optional[Callable] = None) -> dict:
+    """Times `func` `repeat` times, running `setup` untimed before each
+    call, and returns the median, minimum and maximum in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': round(statistics.median(samples), 3),
+            'min_ms': round(min(samples), 3),
+            'max_ms': round(max(samples), 3),
+            'repeat': repeat}
+
+
+def read_cases(model: Model, size: int) -> List[tuple]:
+    """Returns (name, function, setup) for the model's read paths. Cases
+    marked 'cold' run with an empty result cache."""
+    def consume(rows):
+        for _ in rows:
+            pass
+
+    def drop_analytics():
+        model.column_store = None
+
+    cold = model.invalidate_cache
+    return [
+        ('model.query_db[month] cold',
+         lambda: model.query_db(MONTH, END_YEAR), cold),
+        ('model.query_db[month] cached',
+         lambda: model.query_db(MONTH, END_YEAR), None),
+        ('model.query_page[first]', lambda: model.query_page(limit=100), None),
+        ('model.query_page[middle]',
+         lambda: model.query_page(after_id=size // 2, limit=100), None),
+        ('model.query_sorted_page[amount desc, first]',
+         lambda: model.query_sorted_page('amount', True, limit=100), None),
+        ('model.query_sorted_page[category, middle]',
+         lambda: model.query_sorted_page('category', after=('Food', size // 2),
+                                         limit=100), None),
+        ('model.iter_records[month]',
+         lambda: consume(model.iter_records(MONTH, END_YEAR)), None),
+        ('model.search', lambda: model.search(SEARCH_TERM, limit=501), None),
+        ('model.get_analytics[load]', model.get_analytics, drop_analytics),
+        ('model.get_graph_data cold',
+         lambda: model.get_graph_data(MONTH, END_YEAR), cold),
+        ('model.get_month_total cold',
+         lambda: model.get_month_total(MONTH, END_YEAR), cold),
+        ('model.get_trend[week, year] cold',
+         lambda: model.get_trend(f'{END_YEAR}-01-01', f'{END_YEAR + 1}-01-01',
+                                 'week'), cold),
+    ]
+
+
+def write_cases(model: Model, size: int) -> tuple:
+    """Returns (name, function, setup) for the model's write paths and
+    a function undoing their writes, so the database can be reused."""
+    new_rows = generate_rows(10 ** 6, seed=1)
+    fields = ('product', 'quantity', 'amount', 'responsible', 'subtotal',
+              'category', 'supplier', 'payment_method', 'date', 'due_date')
+    record_id = size // 2 or 1
+    original = model.query_by_ids([record_id])[0]
+    batch = []  # Rows generated by the setup, outside the timed call
+
+    def next_record():
+        batch[:] = [dict(zip(fields, next(new_rows)))]
+
+    def next_rows():
+        batch[:] = [next(new_rows) for _ in range(1000)]
+
+    def update_one():
+        values = UnitOfWork.row_values(original)
+        values['amount'] = round(values['amount'] + 0.01, 2)
+        model.update_db(record_id, values)
+
+    def restore():
+        ids = [row[0] for row in model.conn.execute(
+            "SELECT id FROM expenses WHERE id > ?", (size,)
+        )]
+        model.delete_many_from_db(ids)
+        model.update_db(record_id, UnitOfWork.row_values(original))
+
+    return [
+        ('model.add_to_db', lambda: model.add_to_db(batch[0]), next_record),
+        ('model.add_many_to_db[1000]', lambda: model.add_many_to_db(batch),
+         next_rows),
+        ('model.update_db', update_one, None),
+    ], restore
+
+
+def memory_results(model: Model, size: int) -> List[dict]:
+    """Measures with tracemalloc the memory held per row by the records of
+    a year loaded as plain tuples, as full `Expense` rows and as rows of
+    the columns the totals use."""
+    loads = [
+        ('tuple[all]',
+         lambda: model.conn.execute(
+             "SELECT * FROM expenses WHERE date >= ? AND date < ?",
+             (f'{END_YEAR}-01-01', f'{END_YEAR + 1}-01-01')
+         ).fetchall()),
+        ('Expense[all]', lambda: model.query_db(year=END_YEAR)),
+        ('Expense[date, category, subtotal]',
+         lambda: model.query_db(year=END_YEAR,
+                                columns=('date', 'category', 'subtotal'))),
+    ]
+    results = []
+    for name, load in loads:
+        model.invalidate_cache()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            rows = load()
+            held = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        result = {'rows': size,
+                  'case': f'memory.query_db[year] {name}',
+                  'loaded_rows': len(rows),
+                  'bytes_per_row': round(held / max(len(rows), 1), 1)}
+        print_progress(f"{size} rows: {result['case']:<45} "
+                       f"{result['bytes_per_row']:>10.1f} B/row")
+        results.append(result)
+        del rows
+    return results
+
+
+def controller_cases(controller: Controller) -> List[tuple]:
+    """Returns (name, function, setup) for the controller paths that
+    do not need a view."""
+    return [
+        ('controller.query_search',
+         lambda: controller.query_search(SEARCH_TERM,
+                                         controller.search_generation),
+         None),
+        ('controller.get_trend_series[day, year] cold',
+         lambda: controller.get_trend_series(f'{END_YEAR}-01-01',
+                                             f'{END_YEAR + 1}-01-01',
+                                             'day', 'category'),
+         controller.model.invalidate_cache),
+    ]
+
+
+def treeview_case(model: Model) -> tuple:
+    """Returns the case filling the treeview with 500 search results and
+    the window to destroy afterwards, or None and the reason it cannot
+    run, such as a missing display."""
+    try:
+        from tkinter import Tk, ttk
+        from mvc.view import View
+
+        root = Tk()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+    root.withdraw()
+    view = View.__new__(View)  # Only the treeview is needed
+    view.tree = ttk.Treeview(root, columns=Model.export_columns[1:])
+    rows = model.query_by_ids(model.search(SEARCH_TERM, limit=500))
+
+    def update():
+        view.update_treeview(rows)
+        root.update_idletasks()
+
+    return ('view.update_treeview[500]', update, None), root
+
+
+def open_database(size: int, db_dir: Optional[str], seed: int) -> tuple:
+    """Configures the database of one size and returns the model and the
+    seconds spent populating it. A file left in `db_dir` by an earlier
+    run with the same size is reused."""
+    path = ':memory:'
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+        path = os.path.join(db_dir, f'benchmark-{size}-{seed}.db')
+    configure_database(path)
+    model = Model()
+    existing = model.conn.execute("SELECT COUNT(*) FROM expenses").fetchone()
+    if existing[0] == size:
+        return model, None
+    if existing[0]:
+        model.disconnect_from_database()
+        os.remove(path)
+        return open_database(size, db_dir, seed)
+
+    start = time.perf_counter()
+    populate(model, size, seed)
+    return model, time.perf_counter() - start
+
+
+def run_size(size: int, args: argparse.Namespace) -> List[dict]:
+    """Populates a database of `size` rows and times every case on it."""
+    model, populate_seconds = open_database(size, args.db_dir, args.seed)
+    results = []
+    if populate_seconds is not None:
+        results.append({'rows': size,
+                        'case': 'populate',
+                        'seconds': round(populate_seconds, 3),
+                        'rows_per_second': round(size / populate_seconds)})
+        print_progress(f"{size} rows: populated in {populate_seconds:.1f}s")
+    results.append({'rows': size,
+                    'case': 'database size',
+                    'bytes': model.database_size()})
+    print_progress(f"{size} rows: {'database size':<45} "
+                   f"{results[-1]['bytes'] / 2**20:>10.1f} MiB")
+
+    cases = read_cases(model, size)
+    case, root = treeview_case(model)
+    if case is None:
+        results.append({'rows': size,
+                        'case': 'view.update_treeview[500]',
+                        'skipped': root})
+        root = None
+    else:
+        cases.append(case)
+    try:
+        for name, func, setup in cases:
+            results.append(timed(size, name, func, setup, args.repeat))
+
+        results.extend(memory_results(model, size))
+
+        cases, restore = write_cases(model, size)
+        for name, func, setup in cases:
+            results.append(timed(size, name, func, setup, args.repeat))
+        restore()
+
+        controller = Controller(model)
+        for name, func, setup in controller_cases(controller):
+            results.append(timed(size, name, func, setup, args.repeat))
+        controller.shutdown()
+    finally:
+        if root is not None:
+            root.destroy()
+        model.disconnect_from_database()
+    return results
+
+
+def timed(size: int, name: str, func: Callable, setup: Optional[Callable],
+          repeat: int) -> dict:
+    result = {'rows': size, 'case': name, **measure(func, repeat, setup)}
+    print_progress(f"{size} rows: {name:<45} {result['median_ms']:>10.3f} ms")
+    return result
+
+
+def print_progress(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def environment() -> dict:
+    """Describes the machine and revision the results were taken on."""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': revision,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()}
+
+
+def compare(results: List[dict], previous: dict) -> None:
+    """Prints the median of every case next to that of a previous run,
+    on standard error like the progress."""
+    baseline = {(result['rows'], result['case']): result['median_ms']
+                for result in previous['results'] if 'median_ms' in result}
+    print_progress(f"{'rows':>9} {'case':<45} {'before ms':>10} "
+                   f"{'after ms':>10} {'ratio':>7}")
+    for result in results:
+        before = baseline.get((result['rows'], result['case']))
+        if before is None or 'median_ms' not in result:
+            continue
+        after = result['median_ms']
+        ratio = after / before if before else float('inf')
+        print_progress(f"{result['rows']:>9} {result['case']:<45} "
+                       f"{before:>10.3f} {after:>10.3f} {ratio:>6.2f}x")
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None
+                    ) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes',
+                        type=parse_sizes,
+                        default=parse_sizes('10k,100k'),
+                        help="comma-separated row counts, e.g. "
+                             "10k,100k,1M,10M (default: 10k,100k)")
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=5,
+                        help="timed runs per case (default: 5)")
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help="seed of the synthetic data (default: 0)")
+    parser.add_argument('--db-dir',
+                        help="keep the databases in this directory and "
+                             "reuse them across runs (default: in memory)")
+    parser.add_argument('--output',
+                        help="write the JSON results to this file "
+                             "(default: standard output)")
+    parser.add_argument('--compare',
+                        metavar='PATH',
+                        help="print the change against an earlier "
+                             "JSON result file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_arguments(argv)
+    setup_logging(logging.WARNING)
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args))
+
+    report = {'environment': environment(),
+              'seed': args.seed,
+              'repeat': args.repeat,
+              'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            compare(results, json.load(file))
+    return 0
@@ -0,0 +1,44 @@
+"""A database file shared by the tests that need one."""
+import os
+import tempfile
+import unittest
+
+from config import configure_database
+from mvc.model import Model
+
+
+def expense(product: str) -> dict:
+    return {'product': product,
+            'quantity': 2,
+            'amount': 1.5,
+            'responsible': 'Alice',
+            'category': 'Food',
+            'supplier': 'Market',
+            'payment_method': 'Cash',
+            'date': '2024-06-01',
+            'due_date': 'N/A'}
+
+
+class FileDatabaseTest(unittest.TestCase):
+    """Runs against a new database file, whose connections only see
+    each other's committed writes."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'test.db')
+        self.create_database(path)
+        configure_database(path)
+        self.model = Model()
+        self.addCleanup(self.model.disconnect_from_database)
+        self.directory = directory.name
+
+    def create_database(self, path: str) -> None:
+        """Prepares the file before the model opens it; none by default."""
+
+    def committed_ids(self) -> list:
+        conn = self.model.open_connection()
+        try:
+            return [row[0] for row in conn.execute("SELECT id FROM expenses")]
+        finally:
+            conn.close()
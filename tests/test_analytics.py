@@ -0,0 +1,74 @@
+from mvc.controller import Controller
+
+from .database import FileDatabaseTest, expense
+
+
+class AnalyticsTest(FileDatabaseTest):
+    """Dashboard totals served by the column store as it is updated by
+    each write, checked against the same totals computed by SQLite."""
+
+    def setUp(self):
+        super().setUp()
+        self.milk = self.model.add_to_db(expense('Milk'))
+        self.rent = self.model.add_to_db(dict(expense('Rent'),
+                                              category='Housing',
+                                              amount=500.0,
+                                              quantity=1))
+        self.store = self.model.get_analytics()
+
+    def assertStoreMatchesRecords(self):
+        self.assertIs(self.model.column_store, self.store)
+        expected = self.model.conn.execute(
+            """SELECT IFNULL(category, ''), COUNT(*), ROUND(SUM(subtotal), 2)
+            FROM expenses
+            WHERE date >= '2024-06-01' AND date < '2024-07-01'
+            GROUP BY 1
+            ORDER BY 1"""
+        ).fetchall()
+        self.assertEqual(self.model.get_category_totals(6, 2024), expected)
+        self.assertEqual(self.model.get_month_total(6, 2024),
+                         round(sum(row[2] for row in expected), 2))
+        self.assertEqual(self.model.get_graph_data(6, 2024),
+                         [(row[0], row[2]) for row in expected])
+
+    def test_adds(self):
+        self.model.add_to_db(dict(expense('Eggs'), date='2024-06-30'))
+        self.model.add_many_to_db([('Tea', 1, 4.25, 'Bob', 4.25, 'Drinks',
+                                    'Market', 'Cash', '2024-06-09', 'N/A'),
+                                   ('Jam', 1, 3.0, 'Bob', 3.0, 'Food',
+                                    'Market', 'Cash', '2024-07-01', 'N/A')])
+        self.assertEqual(self.model.get_month_total(7, 2024), 3.0)
+        self.assertStoreMatchesRecords()
+
+    def test_updates(self):
+        self.model.update_db(self.milk, {'quantity': 3, 'amount': 1.25})
+        self.model.update_many_db([self.rent], 'category', 'Rent')
+        self.model.update_many_db([self.milk], 'date', '2024-07-02')
+        self.assertEqual(self.model.get_category_totals(7, 2024),
+                         [('Food', 1, 3.75)])
+        self.assertStoreMatchesRecords()
+
+    def test_deletes_and_restores(self):
+        controller = Controller(self.model)
+        uow = controller.unit_of_work
+        uow.delete([self.milk, self.rent])
+        self.assertEqual(self.model.get_category_totals(6, 2024), [])
+        uow.undo()
+        self.model.delete_from_db(self.rent)
+        self.assertStoreMatchesRecords()
+
+    def test_rollback_and_external_writes_reload_the_store(self):
+        self.model.rollback()
+        self.assertIsNone(self.model.column_store)
+        self.store = self.model.get_analytics()
+
+        conn = self.model.open_connection()
+        try:
+            conn.execute("DELETE FROM expenses WHERE id = ?", (self.rent,))
+            conn.commit()
+        finally:
+            conn.close()
+        self.assertEqual(self.model.get_month_total(6, 2024), 3.0)
+        self.assertIsNot(self.model.column_store, self.store)
+        self.store = self.model.column_store
+        self.assertStoreMatchesRecords()
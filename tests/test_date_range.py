@@ -0,0 +1,45 @@
+from utils.methods import get_date_range
+
+from .database import FileDatabaseTest, expense
+
+
+class DateRangeTest(FileDatabaseTest):
+    """Records filtered by month and year through the date index."""
+
+    dates = ('2023-12-31',
+             '2024-01-01',
+             '2024-05-31',
+             '2024-06-01',
+             '2024-06-30',
+             '2024-07-01',
+             '2024-12-31',
+             '2025-01-01')
+
+    def setUp(self):
+        super().setUp()
+        for date in self.dates:
+            self.model.add_to_db(dict(expense('Milk'), date=date))
+
+    def dates_of(self, **kwargs) -> list:
+        return [row.date for row in self.model.query_db(**kwargs)]
+
+    def test_month_and_year_ranges(self):
+        self.assertEqual(self.dates_of(month=6, year=2024),
+                         ['2024-06-01', '2024-06-30'])
+        self.assertEqual(self.dates_of(month=12, year=2024), ['2024-12-31'])
+        self.assertEqual(self.dates_of(year=2024), list(self.dates[1:7]))
+        self.assertEqual(self.dates_of(), list(self.dates))
+
+    def test_invalid_month_and_year(self):
+        self.assertEqual(self.dates_of(month=13, year=2024), [])
+        self.assertEqual(self.dates_of(month=6, year=0), [])
+
+    def test_half_open_ranges(self):
+        self.assertEqual(get_date_range(2024, 2),
+                         ('2024-02-01', '2024-03-01'))
+        self.assertEqual(get_date_range(2024, 12),
+                         ('2024-12-01', '2025-01-01'))
+        self.assertEqual(get_date_range(2024), ('2024-01-01', '2025-01-01'))
+
+    def test_query_plans_use_indexes(self):
+        self.assertTrue(self.model.verify_query_plans())
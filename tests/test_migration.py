@@ -0,0 +1,82 @@
+import sqlite3
+
+from .database import FileDatabaseTest
+
+
+class MigrationTest(FileDatabaseTest):
+    """An 'expenses' table of an earlier version moved to the encoded
+    'expense_records' table behind the 'expenses' view."""
+
+    rows = [(1, 'Milk', 2, 1.5, 'Alice', 3.0, 'Food', 'Market', 'Cash',
+             '2024-06-01', 'N/A'),
+            (2, 'Rent', 1, 500.0, 'Bob', 500.0, 'Housing', None, 'Transfer',
+             '2024-06-03', '2024-07-01'),
+            (4, 'Eggs', 1, 2.25, None, 2.25, 'Food', 'Market', None,
+             '2024-07-02', None),
+            (5, 'Bread', 3, 1.0, 'Alice', 3.0, None, 'Bakery', 'Cash',
+             None, 'N/A')]
+
+    def create_database(self, path: str) -> None:
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("""CREATE TABLE expenses (
+                         id INTEGER PRIMARY KEY AUTOINCREMENT,
+                         product_service TEXT,
+                         quantity INTEGER,
+                         amount FLOAT,
+                         responsible TEXT,
+                         subtotal FLOAT,
+                         category TEXT,
+                         supplier TEXT,
+                         payment_method TEXT,
+                         date DATE,
+                         due_date DATE
+                         );""")
+            conn.execute("CREATE INDEX idx_expenses_date ON expenses (date)")
+            conn.executemany("INSERT INTO expenses VALUES "
+                             "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             self.rows + [(6, 'Tea', 1, 4.0, 'Bob', 4.0,
+                                           'Food', 'Market', 'Cash',
+                                           '2024-06-09', 'N/A')])
+            conn.execute("DELETE FROM expenses WHERE id = 6")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_rows_are_kept(self):
+        self.assertEqual([tuple(row) for row in self.model.query_db()],
+                         self.rows)
+        conn = self.model.conn
+        self.assertEqual(conn.execute("""SELECT type FROM sqlite_master
+                                      WHERE name = 'expenses'""").fetchone(),
+                         ('view',))
+        self.assertIsNone(conn.execute("""SELECT 1 FROM sqlite_master
+                                       WHERE name = 'idx_expenses_date'""")
+                          .fetchone())
+
+    def test_text_columns_are_encoded(self):
+        conn = self.model.conn
+        self.assertEqual(conn.execute("SELECT name FROM categories "
+                                      "ORDER BY id").fetchall(),
+                         [('Food',), ('Housing',)])
+        self.assertEqual(conn.execute("""SELECT COUNT(*) FROM expense_records
+                                      WHERE category_id IS NULL""")
+                         .fetchone(), (1,))
+
+    def test_derived_tables_are_rebuilt(self):
+        self.assertEqual(self.model.get_category_totals(6, 2024),
+                         [('Food', 1, 3.0), ('Housing', 1, 500.0)])
+        self.assertEqual(self.model.get_month_total(7, 2024), 2.25)
+        self.assertEqual(sorted(self.model.search('market')), [1, 4])
+
+    def test_new_ids_continue_the_sequence(self):
+        record_id = self.model.add_to_db({'product': 'Tea',
+                                          'quantity': 1,
+                                          'amount': 4.0,
+                                          'responsible': 'Bob',
+                                          'category': 'Food',
+                                          'supplier': 'Market',
+                                          'payment_method': 'Cash',
+                                          'date': '2024-06-09',
+                                          'due_date': 'N/A'})
+        self.assertEqual(record_id, 7)
@@ -0,0 +1,71 @@
+from .database import FileDatabaseTest, expense
+
+
+class MonthlyTotalsTest(FileDatabaseTest):
+    """Monthly category totals kept up to date by triggers."""
+
+    def setUp(self):
+        super().setUp()
+        self.milk = self.model.add_to_db(expense('Milk'))
+        self.eggs = self.model.add_to_db(expense('Eggs'))
+        self.rent = self.model.add_to_db(dict(expense('Rent'),
+                                              category='Housing',
+                                              amount=500.0,
+                                              quantity=1))
+
+    def assertTotalsMatchRecords(self):
+        conn = self.model.conn
+        expected = conn.execute("""SELECT CAST(substr(date, 1, 4) AS INTEGER),
+                                          CAST(substr(date, 6, 2) AS INTEGER),
+                                          IFNULL(category_id, 0),
+                                          COUNT(*),
+                                          ROUND(SUM(subtotal), 2)
+                                   FROM expense_records
+                                   WHERE date IS NOT NULL
+                                   GROUP BY 1, 2, 3
+                                   ORDER BY 1, 2, 3""").fetchall()
+        totals = conn.execute("""SELECT year, month, category_id,
+                                        record_count, ROUND(subtotal_sum, 2)
+                                 FROM monthly_category_totals
+                                 ORDER BY 1, 2, 3""").fetchall()
+        self.assertEqual(totals, expected)
+
+    def test_insert(self):
+        self.assertEqual(self.model.get_category_totals(6, 2024),
+                         [('Food', 2, 6.0), ('Housing', 1, 500.0)])
+        self.assertEqual(self.model.get_month_total(6, 2024), 506.0)
+        self.assertTotalsMatchRecords()
+
+    def test_update_moves_between_months_and_categories(self):
+        self.model.update_db(self.milk, {'quantity': 4, 'amount': 1.5})
+        self.assertEqual(self.model.get_month_total(6, 2024), 509.0)
+
+        self.model.update_many_db([self.eggs], 'date', '2024-07-15')
+        self.model.update_many_db([self.rent], 'category', 'Rent')
+        self.assertEqual(self.model.get_category_totals(6, 2024),
+                         [('Food', 1, 6.0), ('Rent', 1, 500.0)])
+        self.assertEqual(self.model.get_category_totals(7, 2024),
+                         [('Food', 1, 3.0)])
+        self.assertTotalsMatchRecords()
+
+    def test_delete_removes_empty_groups(self):
+        self.model.delete_from_db(self.rent)
+        self.model.delete_many_from_db([self.milk])
+        self.assertEqual(self.model.get_category_totals(6, 2024),
+                         [('Food', 1, 3.0)])
+        self.assertEqual(self.model.get_month_total(6, 2024), 3.0)
+
+        self.model.delete_from_db(self.eggs)
+        self.assertEqual(self.model.get_category_totals(6, 2024), [])
+        self.assertTotalsMatchRecords()
+
+    def test_records_without_date_or_category(self):
+        self.model.conn.execute("""UPDATE expense_records SET date = NULL
+                                WHERE id = ?""", (self.milk,))
+        self.model.conn.execute("""UPDATE expense_records
+                                SET category_id = NULL
+                                WHERE id = ?""", (self.eggs,))
+        self.model.conn.commit()
+        self.model.invalidate_cache()
+        self.assertEqual(self.model.get_month_total(6, 2024), 503.0)
+        self.assertTotalsMatchRecords()
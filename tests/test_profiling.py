@@ -0,0 +1,48 @@
+import sqlite3
+import unittest
+
+from utils.profiling import ProfilingConnection, profiler
+
+
+class QueryProfilerTest(unittest.TestCase):
+    """Statistics of a profiled in-memory connection."""
+
+    def setUp(self):
+        profiler.reset()
+        self.conn = sqlite3.connect(':memory:', factory=ProfilingConnection)
+        self.addCleanup(self.conn.close)
+        profiler.instrument(self.conn)
+        self.conn.execute("CREATE TABLE t (a INTEGER UNIQUE)")
+        self.conn.execute("CREATE TABLE log (a INTEGER)")
+        self.conn.execute("""CREATE TRIGGER t_insert AFTER INSERT ON t
+                          BEGIN INSERT INTO log VALUES (new.a); END""")
+        profiler.reset()
+
+    def test_counts_trigger_statements_and_failures(self):
+        self.conn.executemany("INSERT INTO t VALUES (?)",
+                              iter([(1,), (2,)]))
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.conn.execute("INSERT INTO t VALUES (1)")
+        self.conn.execute("SELECT a FROM t").fetchall()
+
+        stats = profiler.stats()
+        self.assertEqual(stats['failed'], 1)
+        self.assertGreater(stats['executed'], 3)
+        counts = {entry['statement']: (entry['count'], entry['rows'])
+                  for entry in stats['statements']}
+        self.assertEqual(counts, {'INSERT INTO t VALUES (?)': (1, 0),
+                                  'SELECT a FROM t': (1, 2)})
+
+    def test_executemany_is_explained_with_its_first_parameters(self):
+        parameters, first = self.conn.cursor().first_parameters(
+            ((value,) for value in range(3))
+        )
+        self.assertEqual(first, (0,))
+        self.assertEqual(list(parameters), [(0,), (1,), (2,)])
+        plan = profiler.explain(self.conn, "SELECT a FROM t WHERE a = ?",
+                                first)
+        self.assertNotIn("unavailable", plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+from .database import FileDatabaseTest, expense
+
+
+class SearchTest(FileDatabaseTest):
+    """Full-text search kept in sync with the records by triggers."""
+
+    def setUp(self):
+        super().setUp()
+        self.assertTrue(self.model.fts_enabled)
+        self.milk = self.model.add_to_db(expense('Whole milk'))
+        self.eggs = self.model.add_to_db(dict(expense('Eggs'),
+                                              category='Breakfast'))
+
+    def assertIndexIntact(self):
+        self.model.conn.execute("""INSERT INTO expenses_fts(expenses_fts)
+                                VALUES ('integrity-check')""")
+
+    def test_words_and_prefixes_match(self):
+        self.assertEqual(self.model.search('milk'), [self.milk])
+        self.assertEqual(self.model.search('who mil'), [self.milk])
+        self.assertEqual(self.model.search('breakfast'), [self.eggs])
+        self.assertEqual(sorted(self.model.search('market')),
+                         [self.milk, self.eggs])
+        self.assertEqual(self.model.search('milk eggs'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.model.update_db(self.milk, {'product_service': 'Oat drink',
+                                         'quantity': 2,
+                                         'amount': 1.5,
+                                         'supplier': 'Corner shop'})
+        self.assertEqual(self.model.search('milk'), [])
+        self.assertEqual(self.model.search('oat corner'), [self.milk])
+
+        self.model.delete_from_db(self.eggs)
+        self.assertEqual(self.model.search('eggs'), [])
+        self.assertEqual(self.model.search('market'), [])
+        self.assertIndexIntact()
+
+    def test_matches_the_search_without_index(self):
+        self.model.add_many_to_db([('Milk chocolate', 1, 3.0, 'Bob', 3.0,
+                                    'Sweets', 'Market', 'Card',
+                                    '2024-06-02', 'N/A')])
+        indexed = sorted(self.model.search('milk'))
+        self.model.fts_enabled = False
+        self.assertEqual(sorted(self.model.search('milk')), indexed)
+        self.assertEqual(len(indexed), 2)
+        self.assertIndexIntact()
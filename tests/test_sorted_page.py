@@ -0,0 +1,78 @@
+from .database import FileDatabaseTest, expense
+
+
+class SortedPageTest(FileDatabaseTest):
+    """Keyset pages walked forwards and backwards in either direction."""
+
+    columns = ('supplier', 'due_date', 'quantity', 'id')
+    page_size = 3
+
+    def setUp(self):
+        super().setUp()
+        suppliers = ('Market', 'Bakery', 'Market', 'Corner', 'Bakery')
+        due_dates = ('2024-07-01', 'N/A', '2024-06-15', 'N/A', '2024-07-01')
+        for index in range(13):
+            self.model.add_to_db(dict(expense(f'Item {index}'),
+                                      supplier=suppliers[index % 5],
+                                      due_date=due_dates[index % 5],
+                                      quantity=index % 4 + 1))
+        conn = self.model.conn
+        conn.execute("""UPDATE expense_records SET supplier_id = NULL
+                     WHERE id IN (2, 7, 8)""")
+        conn.execute("""UPDATE expense_records SET due_date = NULL
+                     WHERE id IN (1, 9, 13)""")
+        conn.commit()
+        self.rows = self.model.query_db()
+
+    def expected(self, column: str, descending: bool) -> list:
+        def sort_key(row):
+            value = getattr(row, column)
+            return value is not None, value, row.id
+
+        return [row.id for row in sorted(self.rows, key=sort_key,
+                                         reverse=descending)]
+
+    def key(self, row, column: str) -> tuple:
+        return getattr(row, column), row.id
+
+    def walk_forwards(self, column: str, descending: bool) -> list:
+        pages = []
+        page = self.model.query_sorted_page(column, descending,
+                                            limit=self.page_size)
+        while page:
+            pages.append(page)
+            page = self.model.query_sorted_page(
+                column, descending, after=self.key(page[-1], column),
+                limit=self.page_size
+            )
+        return pages
+
+    def test_pages_follow_the_sort_order(self):
+        for column in self.columns:
+            for descending in (False, True):
+                with self.subTest(column=column, descending=descending):
+                    pages = self.walk_forwards(column, descending)
+                    self.assertTrue(all(len(page) == self.page_size
+                                        for page in pages[:-1]))
+                    self.assertEqual([row.id for page in pages
+                                      for row in page],
+                                     self.expected(column, descending))
+
+    def test_pages_before_mirror_pages_after(self):
+        for column in self.columns:
+            for descending in (False, True):
+                with self.subTest(column=column, descending=descending):
+                    pages = self.walk_forwards(column, descending)
+                    for previous, page in zip(pages, pages[1:]):
+                        self.assertEqual(
+                            self.model.query_sorted_page(
+                                column, descending,
+                                before=self.key(page[0], column),
+                                limit=self.page_size
+                            ),
+                            previous
+                        )
+
+    def test_invalid_sort_column(self):
+        with self.assertRaises(ValueError):
+            self.model.query_sorted_page('id; DROP TABLE expenses')
@@ -0,0 +1,31 @@
+import unittest
+
+from mvc.totals import RunningTotals
+
+
+class RunningTotalsTest(unittest.TestCase):
+    """Deltas applied to the running totals of June 2024."""
+
+    def setUp(self):
+        self.totals = RunningTotals()
+        self.totals.seed(2024, 6, [('Food', 1, 2.0)], self.totals.revision)
+
+    def test_deltas_of_the_tracked_month(self):
+        self.totals.apply(None, ('2024-06-02', 'Food', 3.0))
+        self.totals.apply(None, ('2024-07-01', 'Food', 5.0))
+        self.totals.apply(('2024-06-02', 'Food', 3.0),
+                          ('2024-06-02', 'Rent', 4.0))
+        self.assertEqual(self.totals.graph_data(),
+                         [('Food', 2.0), ('Rent', 4.0)])
+        self.assertEqual(self.totals.month_total(), 6.0)
+
+    def test_rows_without_date_or_subtotal(self):
+        self.totals.apply(None, (None, 'Food', 3.0))
+        self.totals.apply(None, ('2024-06-03', None, None))
+        self.totals.apply(('2024-06-01', 'Food', 2.0), (None, 'Food', 2.0))
+        self.assertEqual(self.totals.categories, {'': [1, 0.0]})
+        self.assertEqual(self.totals.month_total(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import os
+
+from mvc.controller import Controller
+
+from .database import FileDatabaseTest, expense
+
+
+class TransferTest(FileDatabaseTest):
+    """Exported files imported back into the database."""
+
+    def test_export_round_trip_with_missing_due_date(self):
+        controller = Controller(self.model)
+        self.model.add_to_db(expense('Milk'))
+        self.model.conn.execute("UPDATE expenses SET due_date = NULL")
+        self.model.conn.commit()
+
+        paths = [os.path.join(self.directory, name)
+                 for name in ('records.csv', 'records.jsonl')]
+        for path in paths:
+            self.assertEqual(controller.export_records(path), 1)
+        for path in paths:
+            stats = controller.import_records(path)
+            self.assertEqual(stats['inserted'], 1)
+            self.assertEqual(stats['rejected'], [])
+
+        due_dates = [row[0] for row in self.model.conn.execute(
+            "SELECT due_date FROM expenses ORDER BY id")]
+        self.assertEqual(due_dates, [None, 'N/A', 'N/A'])
+
+    def test_fractional_quantity_is_rejected(self):
+        rows, rejected = self.model.validate_expense_batch(
+            [(1, dict(expense('Milk'), quantity=2.5)),
+             (2, dict(expense('Eggs'), quantity='2.5')),
+             (3, dict(expense('Rice'), quantity=3.0))]
+        )
+        self.assertEqual([line for line, reason in rejected], [1, 2])
+        self.assertEqual([row[:2] for row in rows], [('Rice', 3)])
@@ -0,0 +1,134 @@
+import json
+import os
+import unittest
+
+from mvc.controller import Controller
+from mvc.records import Expense
+
+from .database import FileDatabaseTest, expense
+
+
+class Root:
+    """Stands in for the Tk root; finished requests are waited for
+    through their futures instead of being polled."""
+
+    def after(self, delay, func):
+        return None
+
+
+class DeferredCommitTest(FileDatabaseTest):
+    """Writes left uncommitted by the unit of work."""
+
+    def start(self, controller: Controller) -> None:
+        controller.worker.start(Root())
+        self.addCleanup(self.model.local.conn.close)
+        self.addCleanup(controller.shutdown)
+
+    def read(self, controller: Controller, func, *args):
+        return controller.worker.submit_read(func, *args).result()
+
+    def test_commits_only_deferred_in_batch_mode(self):
+        controller = Controller(self.model)
+        self.assertFalse(self.model.commits_deferred)
+
+        record_id = controller.unit_of_work.add(expense('Bread'))
+        self.assertEqual(self.committed_ids(), [record_id])
+
+        controller.unit_of_work.set_batch_mode(True)
+        self.assertTrue(self.model.commits_deferred)
+        controller.unit_of_work.set_batch_mode(False)
+        self.assertFalse(self.model.commits_deferred)
+
+    def test_paged_read_after_deferred_add(self):
+        controller = Controller(self.model)
+        self.start(controller)
+        uow = controller.unit_of_work
+        controller.worker.submit_write(uow.set_batch_mode, True).result()
+        record_id = controller.worker.submit_write(
+            uow.add, expense('Bread')
+        ).result()
+
+        page = self.read(controller, self.model.query_page)
+        self.assertEqual([row.id for row in page], [record_id])
+        page = self.read(controller, self.model.query_sorted_page,
+                         'product_service')
+        self.assertEqual([row.product_service for row in page], ['Bread'])
+
+        controller.worker.submit_write(uow.discard).result()
+        controller.worker.submit_write(uow.set_batch_mode, False).result()
+        self.assertEqual(self.read(controller, self.model.query_page), [])
+
+    def write_import_file(self) -> str:
+        path = os.path.join(self.directory, 'import.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for product in ('Milk', 'Eggs', 'Rice'):
+                file.write(json.dumps(expense(product)) + '\n')
+        return path
+
+    def test_import_is_refused_with_unsaved_batch_edits(self):
+        controller = Controller(self.model)
+        uow = controller.unit_of_work
+        uow.set_batch_mode(True)
+        uow.add(expense('Bread'))
+
+        with self.assertRaises(ValueError):
+            controller.import_records(self.write_import_file())
+        self.assertEqual(self.committed_ids(), [])
+        self.assertEqual(uow.pending, 1)
+        self.assertEqual(uow.discard(), 1)
+        self.assertEqual(self.model.query_page(), [])
+
+    def test_import_commits_in_batch_mode(self):
+        controller = Controller(self.model)
+        uow = controller.unit_of_work
+        uow.set_batch_mode(True)
+
+        stats = controller.import_records(self.write_import_file(),
+                                          chunk_size=2)
+        self.assertEqual(stats['inserted'], 3)
+        self.assertEqual(len(self.committed_ids()), 3)
+        self.assertEqual(uow.pending, 0)
+
+
+class ReplayTest(FileDatabaseTest):
+    """Undo and redo of operations whose inverse can no longer apply."""
+
+    def test_failed_undo_keeps_the_logs(self):
+        uow = Controller(self.model).unit_of_work
+        record_id = uow.add(expense('Bread'))
+        self.model.delete_many_from_db([record_id])
+
+        with self.assertRaises(Exception):
+            uow.undo()
+        self.assertEqual(len(uow.undo_stack), 1)
+        self.assertEqual(uow.redo_stack, [])
+
+    def test_undo_and_redo(self):
+        uow = Controller(self.model).unit_of_work
+        record_id = uow.add(expense('Bread'))
+
+        description, applied = uow.undo()
+        self.assertEqual(description, f"add record {record_id}")
+        self.assertEqual(self.model.query_by_ids([record_id]), [])
+        uow.redo()
+        self.assertEqual(self.model.query_by_ids([record_id]),
+                         applied['before'])
+        self.assertEqual((len(uow.undo_stack), len(uow.redo_stack)), (1, 0))
+
+    def test_undo_restores_stored_values(self):
+        uow = Controller(self.model).unit_of_work
+        row = Expense(7, 'Bread', 3, 1.23456, 'Alice', 3.7, 'Food', None,
+                      'Cash', '2024-06-01', None)
+        self.model.restore_records([row])
+        values = uow.row_values(row._replace(amount=2.0, supplier='Market'))
+
+        self.assertEqual(uow.modify(row.id, values), row)
+        modified = self.model.query_by_ids([row.id])
+        self.assertEqual(uow.delete([row.id]), modified)
+        uow.undo()
+        uow.undo()
+        self.assertEqual(self.model.query_by_ids([row.id]), [row])
+
+
+if __name__ == '__main__':
+    unittest.main()